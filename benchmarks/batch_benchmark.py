@@ -0,0 +1,52 @@
+"""Measures throughput and latency of batched decoding for batch sizes 1 to 8.
+
+The fixtures are split into speech segments with the live segmenter, then
+decoded in batches of each size. Latency is the time from a batch starting
+to its results being available, which is what every utterance in that batch
+waits for.
+
+    python -m benchmarks.batch_benchmark --model base
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.common import FIXTURES_DIR, find_fixtures, load_wav
+from whisper_sst.core.batch import segment_audio
+from whisper_sst.core.engines import create_engine
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fixtures", default=FIXTURES_DIR)
+    parser.add_argument("--backend", default="whisper")
+    parser.add_argument("--model", default="base")
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--max-batch", type=int, default=8)
+    args = parser.parse_args()
+
+    segments = [segment for path in find_fixtures(args.fixtures)
+                for _, segment in segment_audio(load_wav(path))]
+    if not segments:
+        raise SystemExit("The fixtures contain no speech segments")
+    audio_seconds = sum(len(segment) for segment in segments) / 16000
+    print(f"{len(segments)} segments, {audio_seconds:.1f} s of audio")
+
+    engine = create_engine(args.backend, args.model, device="cpu").warm_up()
+    print(f"{'batch':>5} {'audio s/s':>10} {'p50 ms':>8} {'p95 ms':>8}")
+    for batch_size in range(1, args.max_batch + 1):
+        latencies = []
+        start = time.perf_counter()
+        for offset in range(0, len(segments), batch_size):
+            batch = segments[offset:offset + batch_size]
+            batch_start = time.perf_counter()
+            engine.transcribe_batch(batch, language=args.language)
+            latencies.extend([time.perf_counter() - batch_start] * len(batch))
+        wall = time.perf_counter() - start
+        p50, p95 = np.percentile(latencies, [50, 95]) * 1000
+        print(f"{batch_size:>5} {audio_seconds / wall:>10.2f} {p50:>8.0f} {p95:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
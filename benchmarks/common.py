@@ -0,0 +1,54 @@
+import glob
+import os
+import wave
+
+import numpy as np
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def load_wav(path):
+    with wave.open(path, 'rb') as wf:
+        if wf.getframerate() != 16000 or wf.getnchannels() != 1 or wf.getsampwidth() != 2:
+            raise SystemExit(f"{path}: expected a 16 kHz mono 16-bit WAV file")
+        frames = wf.readframes(wf.getnframes())
+    return np.frombuffer(frames, dtype=np.int16).astype(np.float32) / 32768.0
+
+
+def write_wav(path, audio, samplerate=16000):
+    with wave.open(path, 'wb') as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(samplerate)
+        wf.writeframes((np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16).tobytes())
+
+
+def fixture_paths(directory=FIXTURES_DIR):
+    return sorted(glob.glob(os.path.join(directory, "*.wav")))
+
+
+def find_fixtures(directory=FIXTURES_DIR):
+    paths = fixture_paths(directory)
+    if not paths:
+        raise SystemExit(f"No WAV fixtures found in {directory}")
+    return paths
+
+
+def synthetic_speech(seconds, samplerate=16000, seed=0, regions=None):
+    """Reproducible speech-like signal: modulated tone bursts separated by pauses, over low noise.
+
+    The (start, end) seconds of every burst are appended to ``regions`` when given.
+    """
+    rng = np.random.default_rng(seed)
+    audio = (rng.standard_normal(int(seconds * samplerate)) * 0.002).astype(np.float32)
+    position = int(0.5 * samplerate)
+    while position < len(audio):
+        burst = int(rng.uniform(1.0, 4.0) * samplerate)
+        t = np.arange(min(burst, len(audio) - position)) / samplerate
+        envelope = np.abs(np.sin(2 * np.pi * rng.uniform(2.0, 5.0) * t))  # syllable rate
+        tone = np.sin(2 * np.pi * rng.uniform(120, 250) * t)
+        audio[position:position + len(t)] += (0.2 * envelope * tone).astype(np.float32)
+        if regions is not None:
+            regions.append((position / samplerate, (position + len(t)) / samplerate))
+        position += burst + int(rng.uniform(1.2, 2.0) * samplerate)
+    return audio
@@ -0,0 +1,68 @@
+"""Compares decode profiles and the session language cache on the fixtures.
+
+Each fixture is transcribed through TranscriptionWorker.transcribe, as the
+tray app does for a final utterance, once per decode profile and language
+mode. ``auto`` detects the language on every utterance, ``cached`` lets the
+language cache take over after ``--confirmations`` detections. The text of
+each run is compared word by word with the first profile given, so speedups
+can be weighed against changed output. ``sampling`` with ``auto`` is how
+finals were decoded before decode profiles and the language cache, so put
+it first for before/after numbers.
+
+    python -m benchmarks.decode_benchmark --model base --profiles sampling fast balanced
+"""
+import argparse
+import time
+
+from benchmarks.common import FIXTURES_DIR, find_fixtures, load_wav
+from whisper_sst.core.engines import DECODE_PROFILES, create_engine
+from whisper_sst.core.language_cache import LanguageCache
+from whisper_sst.core.metrics import metrics
+from whisper_sst.core.transcription_worker import TranscriptionWorker
+
+
+def changed_words(reference, text):
+    reference, text = reference.split(), text.split()
+    same = sum(a == b for a, b in zip(reference, text))
+    return max(len(reference), len(text)) - same
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fixtures", default=FIXTURES_DIR)
+    parser.add_argument("--backend", default="whisper")
+    parser.add_argument("--model", default="base")
+    parser.add_argument("--compute-type", default="int8")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--profiles", nargs="+", default=list(DECODE_PROFILES))
+    parser.add_argument("--confirmations", type=int, default=3)
+    args = parser.parse_args()
+
+    fixtures = [load_wav(path) for path in find_fixtures(args.fixtures)]
+    audio_seconds = sum(len(audio) for audio in fixtures) / 16000
+    print(f"{len(fixtures)} fixtures, {audio_seconds:.1f} s of audio")
+
+    engine = create_engine(args.backend, args.model, device=args.device, compute_type=args.compute_type)
+    engine.warm_up()
+
+    print(f"{'profile':<10} {'language':<8} {'decode s':>9} {'RTF':>6} {'detections':>10} {'changed words':>14}")
+    reference = None
+    for profile in args.profiles:
+        for mode in ("auto", "cached"):
+            worker = TranscriptionWorker(engine, language="auto", decode_profile=profile,
+                                         language_cache=LanguageCache(args.confirmations if mode == "cached" else 0))
+            detections = metrics.counters["language_detections"]
+            start = time.perf_counter()
+            texts = [worker.transcribe(audio)["text"] for audio in fixtures]
+            decode_time = time.perf_counter() - start
+            detections = metrics.counters["language_detections"] - detections
+
+            if reference is None:
+                reference = texts
+            changed = sum(changed_words(a, b) for a, b in zip(reference, texts))
+            print(f"{profile:<10} {mode:<8} {decode_time:>9.2f} {decode_time / audio_seconds:>6.3f} "
+                  f"{int(detections):>10} {changed:>14}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Reports the real-time factor of each inference backend and model.
+
+Every fixture in the fixture directory (16 kHz mono WAV) is transcribed once
+to warm up and then timed. RTF is decode time divided by audio duration, so
+lower is better and anything under 1.0 keeps up with live speech. Without
+fixtures, ``--seconds`` of synthetic speech in 20 s clips is used instead;
+it isn't real speech, so only compare its numbers with each other.
+
+    python -m benchmarks.engine_benchmark --backends whisper faster-whisper --models tiny base
+"""
+import argparse
+import time
+
+from benchmarks.common import FIXTURES_DIR, fixture_paths, load_wav, synthetic_speech
+from whisper_sst.core.engines import BACKENDS, create_engine
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fixtures", default=FIXTURES_DIR)
+    parser.add_argument("--seconds", type=float, default=60.0, help="synthetic speech to use without fixtures")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS))
+    parser.add_argument("--models", nargs="+", default=["tiny", "base", "small"])
+    parser.add_argument("--compute-type", default="int8")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--language", default="en")
+    args = parser.parse_args()
+
+    paths = fixture_paths(args.fixtures)
+    if paths:
+        fixtures = [load_wav(path) for path in paths]
+    else:
+        print(f"No WAV fixtures in {args.fixtures}, using synthetic speech")
+        fixtures = [synthetic_speech(20.0, seed=i) for i in range(max(1, round(args.seconds / 20)))]
+    audio_seconds = sum(len(audio) for audio in fixtures) / 16000
+    print(f"{len(fixtures)} fixtures, {audio_seconds:.1f} s of audio")
+    print(f"{'backend':<15} {'model':<8} {'load s':>7} {'decode s':>9} {'RTF':>6}")
+
+    for backend in args.backends:
+        for model in args.models:
+            try:
+                start = time.perf_counter()
+                engine = create_engine(backend, model, device=args.device, compute_type=args.compute_type)
+                load_time = time.perf_counter() - start
+            except Exception as e:
+                print(f"{backend:<15} {model:<8} unavailable: {e}")
+                continue
+
+            engine.transcribe(fixtures[0], language=args.language)  # warm up
+            start = time.perf_counter()
+            for audio in fixtures:
+                engine.transcribe(audio, language=args.language)
+            decode_time = time.perf_counter() - start
+            print(f"{backend:<15} {model:<8} {load_time:>7.1f} {decode_time:>9.2f} {decode_time / audio_seconds:>6.3f}")
+
+
+if __name__ == "__main__":
+    main()
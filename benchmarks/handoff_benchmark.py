@@ -0,0 +1,57 @@
+"""Compares end-of-speech-to-text latency for the WAV and in-memory handoffs.
+
+The WAV path reproduces the old behaviour: write the utterance to disk, then
+let Whisper decode it again through ffmpeg. The in-memory path passes the
+float32 array straight to ``transcribe``.
+
+    python -m benchmarks.handoff_benchmark --model tiny --wav speech.wav
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import numpy as np
+import whisper
+
+from benchmarks.common import load_wav, write_wav
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default="tiny")
+    parser.add_argument("--wav", help="16 kHz mono WAV to use as the utterance")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.wav:
+        audio = load_wav(args.wav)
+    else:
+        rng = np.random.default_rng(0)
+        audio = (rng.standard_normal(16000 * 5) * 0.05).astype(np.float32)
+
+    model = whisper.load_model(args.model, device="cpu")
+    options = dict(language="en", task="transcribe", temperature=0.0, fp16=False)
+    model.transcribe(audio, **options)  # warm up
+
+    with tempfile.TemporaryDirectory() as tmp:
+        wav_path = os.path.join(tmp, "utterance.wav")
+        wav_times, memory_times = [], []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            write_wav(wav_path, audio)
+            model.transcribe(wav_path, **options)
+            wav_times.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            model.transcribe(audio, **options)
+            memory_times.append(time.perf_counter() - start)
+
+    for name, times in (("wav file", wav_times), ("in-memory", memory_times)):
+        print(f"{name:>10}: median {statistics.median(times) * 1000:.1f} ms, "
+              f"min {min(times) * 1000:.1f} ms over {len(times)} runs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+"""End-to-end pipeline benchmark with a fake audio device and a fake model.
+
+Replays WAV fixtures (or a synthetic signal) through a stand-in for
+``sounddevice.InputStream`` at real-time or accelerated speed, and runs the
+real RecordingThread -> TranscriptionWorker -> TextOutput path against a stub
+engine whose decode time is a fixed fraction of the audio duration. Reports
+callback CPU, memory high-water mark, latency and throughput.
+
+Results can be appended to ``benchmarks/results.jsonl`` keyed by git commit
+(``--record``) and compared against the previous record of another commit
+made with the same options (``--compare``), which exits with status 1 when
+a metric regressed by more than ``--tolerance`` percent.
+
+    python -m benchmarks.harness --speed 8 --record --compare
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+from PyQt5.QtCore import QCoreApplication, Qt
+
+from benchmarks.common import find_fixtures, load_wav, synthetic_speech
+from whisper_sst.core import recording_thread
+from whisper_sst.core.engines import TranscriptionEngine
+from whisper_sst.core.recording_thread import RecordingThread
+from whisper_sst.core.resampler import PolyphaseResampler
+from whisper_sst.core.text_output import FileSink, TextOutput
+from whisper_sst.core.transcription_worker import TranscriptionWorker
+
+RESULTS_FILE = os.path.join(os.path.dirname(__file__), "results.jsonl")
+
+# Lower is better for all of these except throughput
+TRACKED = ("callback_cpu_us", "callback_max_us", "memory_peak_kib", "latency_p50_ms", "latency_p95_ms")
+# Runs are only compared with earlier runs of the same configuration
+CONFIGURATION = ("speed", "rtf", "batch", "capture_rate", "channels", "fixtures", "seconds")
+
+
+class CallbackStatus:
+    """The ``input_overflow`` flag PortAudio raises when a callback ran too late to keep up."""
+    input_overflow = True
+
+    def __bool__(self):
+        return True
+
+
+class FakeInputStream:
+    """Replays audio into an InputStream callback from its own thread, like PortAudio would.
+
+    A callback that starts more than a block late is passed an overflow
+    status, since a real device would have overwritten that audio by then.
+    """
+
+    def __init__(self, audio, speed=1.0, device=None, samplerate=16000, channels=1, dtype="float32",
+                 callback=None, blocksize=1024):
+        self.audio = audio
+        self.speed = speed
+        self.samplerate = samplerate
+        self.channels = channels
+        self.callback = callback
+        self.blocksize = blocksize
+        self.callback_cpu = 0.0
+        self.callback_max = 0.0
+        self.callbacks = 0
+        self.finished = threading.Event()
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="FakeInputStream", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        indata = np.zeros((self.blocksize, self.channels), dtype=np.float32)
+        period = self.blocksize / self.samplerate / self.speed
+        overflow = CallbackStatus()
+        start = time.perf_counter()
+        for i, offset in enumerate(range(0, len(self.audio) - self.blocksize + 1, self.blocksize)):
+            if not self._running:
+                break
+            delay = start + i * period - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+            indata[:] = self.audio[offset:offset + self.blocksize].reshape(self.blocksize, -1)
+            wall = time.perf_counter()
+            cpu = time.thread_time()
+            self.callback(indata, self.blocksize, None, overflow if delay < -period else None)
+            self.callback_cpu += time.thread_time() - cpu
+            self.callback_max = max(self.callback_max, time.perf_counter() - wall)
+            self.callbacks += 1
+        self.finished.set()
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join()
+
+    def close(self):
+        pass
+
+
+class FakeSoundDevice:
+    """Stands in for the sounddevice module inside recording_thread."""
+
+    def __init__(self, audio, speed):
+        self.audio = audio
+        self.speed = speed
+        self.stream = None
+
+    def query_devices(self, device=None, kind=None):
+        return {"name": "fake", "default_samplerate": 16000, "max_input_channels": 1}
+
+    def InputStream(self, **kwargs):
+        self.stream = FakeInputStream(self.audio, self.speed, **kwargs)
+        return self.stream
+
+
+class FakeEngine(TranscriptionEngine):
+    """Sleeps for ``rtf`` times the audio duration and returns placeholder text."""
+    backend = "fake"
+
+    def __init__(self, rtf=0.1):
+        super().__init__("fake", device="cpu")
+        self.rtf = rtf
+
+    def load(self):
+        return self
+
+    def memory_footprint(self):
+        return 0
+
+    def transcribe(self, audio, language=None, task="transcribe", temperature=0.0, best_of=None, beam_size=None,
+                   prompt=None):
+        duration = len(audio) / 16000
+        time.sleep(duration * self.rtf)
+        return {"text": f" utterance of {duration:.2f} seconds", "language": language or "en",
+                "segments": [{"start": 0.0, "end": duration, "text": " utterance"}]}
+
+
+def run_pipeline(audio, speed, rtf, max_batch=1, capture_format=(16000, 1)):
+    # The device replays the audio in its own format; the thread resamples it back
+    rate, channels = capture_format
+    native = PolyphaseResampler(16000, rate).process(audio) if rate != 16000 else audio
+    if channels > 1:
+        native = np.repeat(native[:, None], channels, axis=1)
+    fake_sd = FakeSoundDevice(native, speed)
+    recording_thread.sd = fake_sd
+
+    worker = TranscriptionWorker(FakeEngine(rtf), language="en", max_batch=max_batch, max_queue=64)
+    output = TextOutput(FileSink(os.devnull))
+    latencies = []
+
+    def collect(trace):
+        # Runs on the output thread via a direct connection, after "typing"
+        latencies.append(trace.marks["typed"] - trace.marks["vad_close"])
+
+    worker.result_ready.connect(lambda result: output.submit(result["text"] + " ", result["trace"]),
+                                Qt.DirectConnection)
+    output.typed.connect(collect, Qt.DirectConnection)
+    worker.start()
+    output.start()
+
+    thread = RecordingThread(None, capture_format=capture_format)
+    thread.finished.connect(worker.submit, Qt.DirectConnection)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    thread.start()
+    while fake_sd.stream is None or not fake_sd.stream.finished.is_set():
+        time.sleep(0.01)
+    while thread.ring_buffer.available() >= len(thread._capture_block):
+        time.sleep(0.01)
+    thread.stop()
+    while worker.pending():
+        time.sleep(0.01)
+    worker.stop()
+    output.stop()
+    wall = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    stream = fake_sd.stream
+    audio_seconds = len(audio) / 16000
+    p50, p95 = np.percentile(latencies, [50, 95]) * 1000 if latencies else (0.0, 0.0)
+    return {
+        "audio_seconds": round(audio_seconds, 2),
+        "utterances": len(latencies),
+        "callback_cpu_us": round(stream.callback_cpu / max(stream.callbacks, 1) * 1e6, 2),
+        "callback_max_us": round(stream.callback_max * 1e6, 2),
+        "dropped_frames": thread.ring_buffer.dropped_frames // channels,
+        "memory_peak_kib": round(peak / 1024, 1),
+        "max_rss_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "latency_p50_ms": round(float(p50), 1),
+        "latency_p95_ms": round(float(p95), 1),
+        "throughput": round(audio_seconds / wall, 2),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def compare(current, tolerance):
+    if not os.path.exists(RESULTS_FILE):
+        print("No previous results to compare against")
+        return True
+    with open(RESULTS_FILE) as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    previous = next((r for r in reversed(records) if r["commit"] != current["commit"]
+                     and all(r.get(key) == current[key] for key in CONFIGURATION)), None)
+    if previous is None:
+        print("No previous results with the same configuration to compare against")
+        return True
+
+    ok = True
+    print(f"Compared with {previous['commit']}:")
+    for name in TRACKED + ("throughput",):
+        before, after = previous["metrics"].get(name), current["metrics"][name]
+        if not before:
+            continue
+        change = (after - before) / before * 100
+        regressed = change < -tolerance if name == "throughput" else change > tolerance
+        ok = ok and not regressed
+        print(f"  {name:<18} {before:>10} -> {after:>10} ({change:+.1f}%){'  REGRESSION' if regressed else ''}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fixtures", help="replay these WAV fixtures instead of the synthetic signal")
+    parser.add_argument("--seconds", type=float, default=120.0, help="length of the synthetic signal")
+    parser.add_argument("--speed", type=float, default=4.0, help="replay speed; 1.0 is real time")
+    parser.add_argument("--rtf", type=float, default=0.1, help="fake model decode time per audio second")
+    parser.add_argument("--batch", type=int, default=1)
+    parser.add_argument("--capture-rate", type=int, default=16000, help="sample rate of the fake device")
+    parser.add_argument("--channels", type=int, default=1, help="channel count of the fake device")
+    parser.add_argument("--record", action="store_true", help=f"append the results to {RESULTS_FILE}")
+    parser.add_argument("--compare", action="store_true", help="compare with the previous recorded commit")
+    parser.add_argument("--tolerance", type=float, default=20.0, help="allowed regression in percent")
+    args = parser.parse_args()
+
+    if args.fixtures:
+        audio = np.concatenate([load_wav(path) for path in find_fixtures(args.fixtures)])
+    else:
+        audio = synthetic_speech(args.seconds)
+    # Trailing silence so the last utterance closes
+    audio = np.concatenate([audio, np.zeros(3 * 16000, dtype=np.float32)])
+
+    app = QCoreApplication.instance() or QCoreApplication([])
+    results = run_pipeline(audio, args.speed, args.rtf, args.batch, (args.capture_rate, args.channels))
+    for name, value in results.items():
+        print(f"{name:<18} {value}")
+
+    record = {"commit": git_commit(), "time": time.time(), "speed": args.speed, "rtf": args.rtf, "batch": args.batch,
+              "capture_rate": args.capture_rate, "channels": args.channels, "fixtures": args.fixtures,
+              "seconds": None if args.fixtures else args.seconds, "metrics": results}
+    ok = compare(record, args.tolerance) if args.compare else True
+    if args.record:
+        with open(RESULTS_FILE, "a") as f:
+            f.write(json.dumps(record) + "\n")
+    del app
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""Long-form dictation: chunk sizes, stitched-text accuracy and memory over an hour of speech.
+
+The fixture is generated as it is played: an hour (by default) of
+continuous "speech" in which every word is a short tone burst whose pitch
+says which word it is. Gaps between words are short, and the occasional
+breath pause is well under the one-second silence that would end an
+utterance, so the whole hour is one utterance. It is fed through
+RecordingThread's capture path as fast as possible. Each chunk is decoded
+right away by a stub model that recognises the tones, and the text is
+stitched as the tray would type it. The stitched words are then compared
+with the words that were played.
+
+Memory is what the whisper_sst modules hold at the end of every ten
+minutes, as traced by tracemalloc; it should not grow. ``--chunk 0``
+disables long-form mode for comparison, leaving only the hard cut when the
+120 s utterance buffer fills up.
+
+    python -m benchmarks.longform_benchmark --minutes 60 --chunk 30
+"""
+import argparse
+import difflib
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from whisper_sst.core.engines import TranscriptionEngine
+from whisper_sst.core.recording_thread import RecordingThread
+from whisper_sst.core.streaming import TextStitcher
+from whisper_sst.core.transcription_worker import TranscriptionWorker
+from whisper_sst.core.vad import EnergyVAD
+
+SAMPLERATE = 16000
+VOCABULARY = 40
+PITCHES = 300 + 40 * np.arange(VOCABULARY)
+
+
+def continuous_speech(seconds, blocksize, truth, seed=0):
+    """Yields blocks of tone-burst words; appends each word played to ``truth``."""
+    rng = np.random.default_rng(seed)
+    buffer = np.zeros(0, dtype=np.float32)
+    played = 0
+    next_pause = rng.uniform(20, 60)
+    while played < seconds * SAMPLERATE:
+        word = int(rng.integers(VOCABULARY))
+        truth.append(word)
+        length = int(rng.uniform(0.2, 0.4) * SAMPLERATE)
+        t = np.arange(length) / SAMPLERATE
+        burst = 0.2 * np.hanning(length) * np.sin(2 * np.pi * PITCHES[word] * t)
+        if played / SAMPLERATE > next_pause:
+            gap = rng.uniform(0.3, 0.6)  # a breath
+            next_pause += rng.uniform(20, 60)
+        else:
+            gap = rng.uniform(0.08, 0.15)
+        silence = np.zeros(int(gap * SAMPLERATE))
+        noise = rng.standard_normal(length + len(silence)) * 0.002
+        buffer = np.concatenate([buffer, (np.concatenate([burst, silence]) + noise).astype(np.float32)])
+        played += length + len(silence)
+        while len(buffer) >= blocksize:
+            yield buffer[:blocksize]
+            buffer = buffer[blocksize:]
+    # Trailing silence ends the utterance
+    for _ in range(int(2 * SAMPLERATE / blocksize)):
+        yield np.zeros(blocksize, dtype=np.float32)
+
+
+class ToneEngine(TranscriptionEngine):
+    """Recognises the tone-burst words of ``continuous_speech``."""
+    backend = "fake"
+
+    def __init__(self):
+        super().__init__("fake", device="cpu")
+
+    def load(self):
+        return self
+
+    def memory_footprint(self):
+        return 0
+
+    def transcribe(self, audio, language=None, task="transcribe", temperature=0.0, best_of=None, beam_size=None,
+                   prompt=None):
+        frame = SAMPLERATE // 100
+        frames = audio[:len(audio) // frame * frame].reshape(-1, frame)
+        loud = np.sqrt((frames ** 2).mean(axis=1)) > 0.02
+        edges = np.flatnonzero(np.diff(np.concatenate([[0], loud.astype(np.int8), [0]])))
+        words = []
+        for start, end in zip(edges[::2], edges[1::2]):
+            if end - start < 8:  # too little of a word to recognise
+                continue
+            burst = audio[start * frame:end * frame]
+            spectrum = np.abs(np.fft.rfft(burst))
+            pitch = np.argmax(spectrum) * SAMPLERATE / len(burst)
+            words.append(f"w{int(np.argmin(np.abs(PITCHES - pitch)))}")
+        return {"text": " " + " ".join(words), "language": language or "en", "segments": []}
+
+
+# (previous chunk, next chunk, text that should be typed for the next chunk)
+STITCH_CASES = [
+    ("we sat on a bench in the middle of the", "of the park for an hour", "park for an hour"),
+    # One word in common is as likely to be said again as repeated
+    ("we walked over to the", "the dog was asleep", "the dog was asleep"),
+    # A phrase that comes up again later in the chunk is not the overlap
+    ("we sat on a bench in the middle of the", "park for an hour and talked in the middle of the night",
+     "park for an hour and talked in the middle of the night"),
+    # The word at the edge was heard differently
+    ("and then we went to the shop today", "um shop today we bought bread", "we bought bread"),
+]
+
+
+def check_stitching():
+    """Returns the STITCH_CASES the stitcher gets wrong, with what it typed."""
+    failures = []
+    for previous, text, expected in STITCH_CASES:
+        stitcher = TextStitcher()
+        stitcher.add(previous, 0)
+        typed = stitcher.add(text, SAMPLERATE)  # one second of overlap
+        if typed != expected:
+            failures.append((previous, text, typed))
+    return failures
+
+
+def traced_kib(snapshot):
+    package = os.path.join("whisper_sst", "")
+    return sum(stat.size for stat in snapshot.statistics("filename")
+               if package in stat.traceback[0].filename) / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--minutes", type=float, default=60.0)
+    parser.add_argument("--chunk", type=float, default=30.0, help="long-form chunk length; 0 turns it off")
+    parser.add_argument("--overlap", type=float, default=1.0)
+    args = parser.parse_args()
+
+    failures = check_stitching()
+    for previous, text, typed in failures:
+        print(f"Stitching failed: {previous!r} + {text!r} typed {typed!r}")
+    print(f"Stitching checks: {len(STITCH_CASES) - len(failures)}/{len(STITCH_CASES)} passed")
+
+    thread = RecordingThread(None, vad=EnergyVAD(), capture_format=(SAMPLERATE, 1),
+                             chunk_duration=args.chunk or None, chunk_overlap=args.overlap)
+    worker = TranscriptionWorker(ToneEngine(), language="en")
+    chunks = []
+    typed = []
+
+    def decode(audio, trace, overlap):
+        # Decoded in place; the worker's thread isn't started
+        chunks.append(len(audio) / SAMPLERATE)
+        text = worker.stitcher.add(worker.transcribe(audio)["text"], overlap)
+        typed.extend(int(word[1:]) for word in text.split())
+
+    thread.finished.connect(decode)
+
+    truth = []
+    blocks_per_report = int(600 * SAMPLERATE / thread.blocksize)
+    indata = np.zeros((thread.blocksize, 1), dtype=np.float32)
+    tracemalloc.start()
+    start = time.perf_counter()
+    print(f"{'minute':>6} {'chunks':>6} {'whisper_sst KiB':>15}")
+    for i, block in enumerate(continuous_speech(args.minutes * 60, thread.blocksize, truth)):
+        indata[:, 0] = block
+        thread._audio_callback(indata, thread.blocksize, None, None)
+        thread._consume()
+        if (i + 1) % blocks_per_report == 0:
+            print(f"{(i + 1) * thread.blocksize / SAMPLERATE / 60:>6.0f} {len(chunks):>6} "
+                  f"{traced_kib(tracemalloc.take_snapshot()):>15.1f}")
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    wall = time.perf_counter() - start
+
+    matcher = difflib.SequenceMatcher(None, truth, typed, autojunk=False)
+    missing = duplicated = substituted = 0
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "delete":
+            missing += i2 - i1
+        elif tag == "insert":
+            duplicated += j2 - j1
+        elif tag == "replace":
+            substituted += max(i2 - i1, j2 - j1)
+
+    lengths = np.array(chunks or [0.0])
+    print(f"Played {len(truth)} words in {args.minutes:.0f} min, processed in {wall:.1f} s")
+    print(f"Chunks: {len(chunks)}, {lengths.min():.1f} / {lengths.mean():.1f} / {lengths.max():.1f} s min/mean/max")
+    print(f"Typed {len(typed)} words: {missing} missing, {duplicated} extra, {substituted} substituted")
+    print(f"Traced peak: {peak / 1024:.1f} KiB")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+"""Cross-thread signals, repaints and GUI-thread CPU of the level meter, per block versus polled.
+
+A producer thread plays the part of RecordingThread's consumer, handling one
+block of noise every ``blocksize`` samples at real-time pace. ``signal``
+is the previous path: the block's RMS is emitted to the GUI thread, which
+sets a QProgressBar. ``polled`` is the current one: the producer updates a
+LevelMeter and RecordingDialog reads it from its refresh timer. CPU is
+measured on the GUI thread only. Run with ``QT_QPA_PLATFORM=offscreen`` on
+a machine without a display.
+
+    python -m benchmarks.meter_benchmark --seconds 10 --blocksize 1024 256
+"""
+import argparse
+import threading
+import time
+
+import numpy as np
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+from PyQt5.QtWidgets import QApplication, QProgressBar
+
+from whisper_sst.core.level_meter import LevelMeter, block_levels
+from whisper_sst.gui import recording_dialog
+from whisper_sst.gui.recording_dialog import RecordingDialog
+
+
+class NoDevices:
+    def query_devices(self):
+        return []
+
+
+class CountingProgressBar(QProgressBar):
+    repaints = 0
+
+    def paintEvent(self, event):
+        self.repaints += 1
+        super().paintEvent(event)
+
+
+class Emitter(QObject):
+    level = pyqtSignal(float)
+
+
+def produce(blocksize, seconds, handle):
+    rng = np.random.default_rng(0)
+    # Speech-like loudness changes, so the meter has something to show
+    envelope = np.abs(np.sin(np.linspace(0, 40, int(seconds * 16000 / blocksize))))
+    noise = (rng.standard_normal(blocksize) * 0.1).astype(np.float32)
+    start = time.perf_counter()
+    for i, gain in enumerate(envelope):
+        delay = start + i * blocksize / 16000 - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        handle(noise * np.float32(gain))
+
+
+def open_dialog():
+    recording_dialog.sd = NoDevices()
+    dialog = RecordingDialog(None, lambda device: None)
+    dialog.show()
+    return dialog
+
+
+def run_signal(app, blocksize, seconds):
+    # The dialog as it was: a progress bar in place of the meter, and no timer
+    dialog = open_dialog()
+    dialog.meter_timer.stop()
+    dialog.level_meter.hide()
+    bar = CountingProgressBar()
+    bar.setRange(0, 100)
+    dialog.layout().insertWidget(1, bar)
+    emitter = Emitter()
+    signals = [0]
+
+    def update_audio_level(level):
+        signals[0] += 1
+        bar.setValue(min(int(level * 1000), 100))
+
+    emitter.level.connect(update_audio_level)
+
+    def handle(block):
+        emitter.level.emit(float(np.sqrt(np.dot(block, block) / len(block))))
+
+    results = measure(app, blocksize, seconds, handle, lambda: (signals[0], bar.repaints))
+    dialog.hide()
+    return results
+
+
+def run_polled(app, blocksize, seconds):
+    dialog = open_dialog()
+    meter = LevelMeter()
+    dialog.attach_meter(meter)
+
+    def handle(block):
+        meter.update(*block_levels(block))
+
+    results = measure(app, blocksize, seconds, handle, lambda: (0, dialog.level_meter.repaints))
+    dialog.hide()
+    return results
+
+
+def measure(app, blocksize, seconds, handle, counts):
+    producer = threading.Thread(target=produce, args=(blocksize, seconds, handle), daemon=True)
+    app.processEvents()
+    _, repaints_before = counts()
+    cpu = time.thread_time()
+    producer.start()
+    QTimer.singleShot(int(seconds * 1000) + 200, app.quit)
+    app.exec_()
+    cpu = time.thread_time() - cpu
+    producer.join()
+    signals, repaints = counts()
+    return signals, repaints - repaints_before, cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--blocksize", type=int, nargs="+", default=[1024, 256])
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication([])
+    print(f"{'path':<8} {'block':>6} {'signals/s':>10} {'repaints/s':>11} {'GUI CPU %':>10}")
+    for blocksize in args.blocksize:
+        for name, run in (("signal", run_signal), ("polled", run_polled)):
+            signals, repaints, cpu = run(app, blocksize, args.seconds)
+            print(f"{name:<8} {blocksize:>6} {signals / args.seconds:>10.1f} {repaints / args.seconds:>11.1f} "
+                  f"{cpu / args.seconds * 100:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""Callback overruns and UI stalls under sustained load, in one process and split across three.
+
+Replays a synthetic signal through the fake audio device from
+``benchmarks.harness`` while a fake model keeps the GIL busy for ``--rtf``
+times the audio duration, in uninterruptible stretches of ``--gil-hold-ms``
+(like the Python-side parts of a Whisper decode). Meanwhile a 16 ms timer on
+the main thread stands in for GUI repaints.
+
+An overrun is an audio callback that started more than a block late, which
+would lose audio on a real device. A UI stall is a timer tick that came more
+than ``--stall-ms`` after the previous one. ``single`` runs capture,
+inference and the GUI in this process, as the tray does by default;
+``multi`` runs them through ProcessPipeline.
+
+    python -m benchmarks.multiprocess_benchmark --seconds 60 --rtf 0.5
+"""
+import argparse
+import functools
+import time
+
+import numpy as np
+from PyQt5.QtCore import QCoreApplication, QTimer
+
+from benchmarks.common import synthetic_speech
+from benchmarks.harness import FakeSoundDevice
+from whisper_sst.core import multiprocess, recording_thread
+from whisper_sst.core.engines import TranscriptionEngine
+from whisper_sst.core.multiprocess import ProcessPipeline
+from whisper_sst.core.recording_thread import RecordingThread
+from whisper_sst.core.transcription_worker import TranscriptionWorker
+
+
+class BusyEngine(TranscriptionEngine):
+    """Computes for ``rtf`` times the audio duration without releasing the GIL for ``hold`` seconds at a time."""
+    backend = "fake"
+
+    def __init__(self, rtf=0.5, hold=0.1):
+        super().__init__("fake", device="cpu")
+        self.rtf = rtf
+        start = time.perf_counter()
+        sum(range(1000000))
+        # A builtin running a C loop never offers the GIL to other threads
+        self.hold_count = max(1, int(1000000 * hold / (time.perf_counter() - start)))
+
+    def load(self):
+        return self
+
+    def memory_footprint(self):
+        return 0
+
+    def transcribe(self, audio, language=None, task="transcribe", temperature=0.0, best_of=None, beam_size=None,
+                   prompt=None):
+        duration = len(audio) / 16000
+        deadline = time.perf_counter() + duration * self.rtf
+        while time.perf_counter() < deadline:
+            sum(range(self.hold_count))
+        return {"text": f" utterance of {duration:.2f} seconds", "language": language or "en",
+                "segments": [{"start": 0.0, "end": duration, "text": " utterance"}]}
+
+
+def fake_capture_main(audio, speed, *args):
+    recording_thread.sd = FakeSoundDevice(audio, speed)
+    multiprocess.capture_main(*args)
+
+
+def fake_inference_main(rtf, hold, *args):
+    multiprocess.create_engine = lambda *spec: BusyEngine(rtf, hold)
+    multiprocess.inference_main(*args)
+
+
+class FrameProbe:
+    """Ticks every 16 ms on the GUI thread and records how late each tick was."""
+
+    def __init__(self, stall):
+        self.stall = stall
+        self.gaps = []
+        self._last = None
+        self.timer = QTimer()
+        self.timer.timeout.connect(self._tick)
+
+    def start(self):
+        self._last = time.perf_counter()
+        self.timer.start(16)
+
+    def _tick(self):
+        now = time.perf_counter()
+        self.gaps.append(now - self._last)
+        self._last = now
+
+    def report(self):
+        gaps = np.array(self.gaps or [0.0])
+        return {"ui_stalls": int((gaps > self.stall).sum()), "ui_max_gap_ms": round(float(gaps.max()) * 1000, 1)}
+
+
+def run_until(app, seconds):
+    QTimer.singleShot(int(seconds * 1000), app.quit)
+    app.exec_()
+
+
+def run_single(app, audio, args, duration):
+    fake_sd = FakeSoundDevice(audio, args.speed)
+    recording_thread.sd = fake_sd
+    results = []
+
+    worker = TranscriptionWorker(BusyEngine(args.rtf, args.gil_hold_ms / 1000), language="en", max_queue=64)
+    worker.result_ready.connect(results.append)
+    thread = RecordingThread(None, capture_format=(16000, 1))
+    thread.finished.connect(worker.submit)
+
+    probe = FrameProbe(args.stall_ms / 1000)
+    worker.start()
+    thread.start()
+    probe.start()
+    run_until(app, duration)
+    thread.stop()
+    worker.stop()
+    return {"utterances": len(results), "callback_overruns": thread.input_overflows, **probe.report()}
+
+
+def run_multi(app, audio, args, duration):
+    results = []
+    pipeline = ProcessPipeline(
+        ("fake", "fake", "default"),
+        {"language": "en"},
+        capture_target=functools.partial(fake_capture_main, audio, args.speed),
+        inference_target=functools.partial(fake_inference_main, args.rtf, args.gil_hold_ms / 1000)
+    )
+    pipeline.result_ready.connect(results.append)
+    loaded = []
+    pipeline.engine_loaded.connect(loaded.append)
+    pipeline.start()
+    # Process start-up is not part of the measurement
+    while not loaded:
+        app.processEvents()
+        time.sleep(0.01)
+
+    probe = FrameProbe(args.stall_ms / 1000)
+    pipeline.start_capture(None, (16000, 1), {"kind": "energy"})
+    probe.start()
+    run_until(app, duration)
+    pipeline.stop()
+    app.processEvents()
+    return {"utterances": len(results), "callback_overruns": pipeline.counters.get("callback_overruns", 0),
+            "inference_restarts": pipeline.restarts, **probe.report()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=30.0, help="length of the synthetic signal")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed; 1.0 is real time")
+    parser.add_argument("--rtf", type=float, default=0.5, help="fake model compute time per audio second")
+    parser.add_argument("--gil-hold-ms", type=float, default=100.0,
+                        help="longest stretch the fake model holds the GIL")
+    parser.add_argument("--stall-ms", type=float, default=50.0, help="timer gap counted as a UI stall")
+    parser.add_argument("--drain", type=float, default=5.0, help="seconds to wait for the last results")
+    parser.add_argument("--modes", nargs="+", choices=["single", "multi"], default=["single", "multi"])
+    args = parser.parse_args()
+
+    audio = np.concatenate([synthetic_speech(args.seconds), np.zeros(3 * 16000, dtype=np.float32)])
+    duration = len(audio) / 16000 / args.speed + args.drain
+    app = QCoreApplication.instance() or QCoreApplication([])
+
+    print(f"{'mode':<8} {'utterances':>10} {'overruns':>9} {'UI stalls':>10} {'max gap ms':>11}")
+    for mode in args.modes:
+        run = run_single if mode == "single" else run_multi
+        results = run(app, audio, args, duration)
+        print(f"{mode:<8} {results['utterances']:>10} {results['callback_overruns']:>9} "
+              f"{results['ui_stalls']:>10} {results['ui_max_gap_ms']:>11}")
+
+
+if __name__ == "__main__":
+    main()
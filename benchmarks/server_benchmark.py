@@ -0,0 +1,136 @@
+"""Load generator for the transcription server: how many real-time streams it sustains.
+
+Each simulated client streams a synthetic speech signal to the server in
+64 ms chunks at real-time pace, and the server segments and decodes it.
+The number of concurrent streams doubles each round. A round passes when
+no utterance was rejected and the 95th percentile of the time utterances
+spent in the server stays under ``--budget`` seconds. The report shows
+server time, queue wait and mean batch size per round and the largest
+count that passed.
+
+Without ``--server`` an in-process server with a stub model is used, whose
+decode takes ``--rtf`` times the longest utterance in the batch plus 20%
+for each extra utterance:
+
+    python -m benchmarks.server_benchmark --rtf 0.3
+    python -m benchmarks.server_benchmark --server 127.0.0.1:8765 --max-streams 32
+"""
+import argparse
+import socket
+import threading
+import time
+
+import numpy as np
+
+from benchmarks.common import synthetic_speech
+from whisper_sst.core.engines import TranscriptionEngine
+from whisper_sst.core.server import TranscriptionServer, encode_audio, parse_address, recv_message, send_message
+
+CHUNK = 1024
+
+
+class BatchingFakeEngine(TranscriptionEngine):
+    backend = "fake"
+
+    def __init__(self, rtf=0.3):
+        super().__init__("fake", device="cpu")
+        self.rtf = rtf
+
+    def load(self):
+        return self
+
+    def memory_footprint(self):
+        return 0
+
+    def transcribe_batch(self, audios, language=None, task="transcribe", temperature=0.0, best_of=None,
+                         beam_size=None, prompt=None):
+        longest = max(len(audio) for audio in audios) / 16000
+        time.sleep(self.rtf * longest * (1 + 0.2 * (len(audios) - 1)))
+        return [{"text": f" utterance of {len(audio) / 16000:.2f} seconds", "language": language or "en",
+                 "segments": []} for audio in audios]
+
+
+def run_stream(address, audio, results, errors):
+    address = parse_address(address)
+    sock = socket.socket(socket.AF_UNIX if isinstance(address, str) else socket.AF_INET, socket.SOCK_STREAM)
+    sock.connect(address)
+    send_message(sock, {"type": "hello", "language": "en"})
+    recv_message(sock)
+
+    def read():
+        while True:
+            message = recv_message(sock)
+            if message is None:
+                break
+            header = message[0]
+            if header["type"] == "result":
+                results.append(header)
+            elif header["type"] == "error":
+                errors.append(header["message"])
+
+    reader = threading.Thread(target=read, daemon=True)
+    reader.start()
+    start = time.perf_counter()
+    for i, offset in enumerate(range(0, len(audio), CHUNK)):
+        delay = start + i * CHUNK / 16000 - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        send_message(sock, {"type": "audio"}, encode_audio(audio[offset:offset + CHUNK]))
+    send_message(sock, {"type": "bye"})
+    reader.join()
+    sock.close()
+
+
+def run_round(address, streams, seconds):
+    results, errors = [], []
+    threads = []
+    for i in range(streams):
+        # Each client speaks differently so utterances don't end in lockstep
+        audio = np.concatenate([synthetic_speech(seconds, seed=i), np.zeros(2 * 16000, dtype=np.float32)])
+        thread = threading.Thread(target=run_stream, args=(address, audio, results, errors), daemon=True)
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--server", help="address of a running server (default: in-process stub)")
+    parser.add_argument("--rtf", type=float, default=0.3, help="stub model decode time per audio second")
+    parser.add_argument("--seconds", type=float, default=20.0, help="audio per stream per round")
+    parser.add_argument("--max-streams", type=int, default=16)
+    parser.add_argument("--budget", type=float, default=2.0, help="p95 server time allowed, in seconds")
+    args = parser.parse_args()
+
+    server = None
+    address = args.server
+    if address is None:
+        server = TranscriptionServer(BatchingFakeEngine(args.rtf), language="en")
+        address = server.start(("127.0.0.1", 0))
+
+    capacity = 0
+    streams = 1
+    print(f"{'streams':>7} {'utterances':>10} {'rejected':>8} {'p50 s':>7} {'p95 s':>7} {'queue p95 s':>11} "
+          f"{'batch':>6}")
+    while streams <= args.max_streams:
+        results, errors = run_round(address, streams, args.seconds)
+        server_seconds = [r["server_seconds"] for r in results] or [0.0]
+        queue = [r["timings"]["server_queue_wait"] for r in results] or [0.0]
+        p50, p95 = np.percentile(server_seconds, [50, 95])
+        batch = np.mean([r["batch_size"] for r in results]) if results else 0.0
+        print(f"{streams:>7} {len(results):>10} {len(errors):>8} {p50:>7.2f} {p95:>7.2f} "
+              f"{np.percentile(queue, 95):>11.2f} {batch:>6.2f}")
+        if errors or p95 > args.budget:
+            break
+        capacity = streams
+        streams *= 2
+
+    print(f"Sustained {capacity} concurrent real-time stream(s) within a p95 of {args.budget:.1f} s")
+    if server:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
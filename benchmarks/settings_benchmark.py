@@ -0,0 +1,70 @@
+"""Time spent in Settings.set on the calling thread, and file writes, with and without write debouncing.
+
+``sync`` is the previous behaviour: every ``set`` rewrote settings.json
+before returning. ``debounced`` is the current one: ``set`` updates memory
+and a background thread writes the file once the changes stop. The changes
+come in bursts, like a slider dragged across a range of values, in a
+temporary directory (pass ``--dir`` to measure a particular disk).
+
+    python -m benchmarks.settings_benchmark --bursts 20 --burst-size 50
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from whisper_sst.utils.settings import Settings
+
+
+class CountingSettings(Settings):
+    writes = 0
+
+    def _write(self, text):
+        self.writes += 1
+        super()._write(text)
+
+
+def write_sync(settings):
+    # What save() used to do
+    with open(settings.settings_file, "w") as f:
+        json.dump(settings._settings, f)
+    settings.writes += 1
+
+
+def run(mode, directory, bursts, burst_size, pause):
+    settings = CountingSettings(os.path.join(directory, f"{mode}.json"))
+    if mode == "sync":
+        settings.save = lambda: write_sync(settings)
+    durations = []
+    for burst in range(bursts):
+        for i in range(burst_size):
+            start = time.perf_counter()
+            settings.set("vad_min_threshold", 0.001 * (burst * burst_size + i + 1))
+            durations.append(time.perf_counter() - start)
+        time.sleep(pause)
+    settings.close()
+    return np.array(durations) * 1e6, settings.writes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bursts", type=int, default=20)
+    parser.add_argument("--burst-size", type=int, default=50, help="changes in quick succession")
+    parser.add_argument("--pause", type=float, default=0.6, help="seconds between bursts")
+    parser.add_argument("--dir", help="where to write (default: a temporary directory)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        directory = args.dir or directory
+        print(f"{'mode':<10} {'sets':>6} {'writes':>7} {'p50 us':>8} {'p99 us':>8} {'max us':>8}")
+        for mode in ("sync", "debounced"):
+            durations, writes = run(mode, directory, args.bursts, args.burst_size, args.pause)
+            p50, p99 = np.percentile(durations, [50, 99])
+            print(f"{mode:<10} {len(durations):>6} {writes:>7} {p50:>8.1f} {p99:>8.1f} {durations.max():>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Measures characters per second for each text output sink.
+
+Sinks other than ``file`` type into whatever window has focus, so click into
+an empty editor during the countdown. Each sink types the same English,
+Hindi and Bengali sentences; a sink that can't handle a script reports the
+error instead of a rate.
+
+    python -m benchmarks.typing_benchmark --sinks file xdotool clipboard pyautogui
+"""
+import argparse
+import os
+import time
+
+from whisper_sst.core.text_output import create_sink
+
+SAMPLES = {
+    "english": "The quick brown fox jumps over the lazy dog, twice, without stopping for breath. ",
+    "hindi": "तेज़ भूरी लोमड़ी आलसी कुत्ते के ऊपर से कूदती है। ",
+    "bengali": "দ্রুত বাদামী শিয়াল অলস কুকুরের উপর দিয়ে লাফ দেয়। ",
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sinks", nargs="+", default=["file"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--countdown", type=float, default=3.0)
+    args = parser.parse_args()
+
+    if any(kind != "file" for kind in args.sinks):
+        print(f"Focus a text field; typing starts in {args.countdown:.0f} s")
+        time.sleep(args.countdown)
+
+    print(f"{'sink':<10} {'script':<8} {'chars/s':>10}")
+    for kind in args.sinks:
+        try:
+            sink = create_sink(kind, os.devnull if kind == "file" else None)
+        except Exception as e:
+            print(f"{kind:<10} unavailable: {e}")
+            continue
+
+        for script, text in SAMPLES.items():
+            try:
+                start = time.perf_counter()
+                for _ in range(args.repeat):
+                    sink.type(text)
+                elapsed = time.perf_counter() - start
+            except Exception as e:
+                print(f"{kind:<10} {script:<8} failed: {e}")
+                continue
+            print(f"{kind:<10} {script:<8} {len(text) * args.repeat / elapsed:>10.0f}")
+        sink.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Evaluates the VAD and segmenter on labelled fixtures.
+
+Each fixture WAV needs a ``<name>.json`` next to it with the labelled speech
+regions in seconds, e.g. ``{"speech": [[0.52, 2.10], [3.00, 4.75]]}``.
+Reports block-level precision/recall of the raw VAD decision, sample-level
+precision/recall of the emitted segments, and CPU time per second of audio.
+Without labelled fixtures, ``--seconds`` of synthetic speech is used, with
+its tone bursts as the labels.
+
+    python -m benchmarks.vad_benchmark --vad silero --model-path silero_vad.onnx
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from benchmarks.common import FIXTURES_DIR, fixture_paths, load_wav, synthetic_speech
+from whisper_sst.core.segmenter import SpeechSegmenter
+from whisper_sst.core.vad import create_vad
+
+BLOCKSIZE = 1024
+
+
+class LoggingVAD:
+    """Records every raw decision of the wrapped VAD."""
+
+    def __init__(self, vad):
+        self.vad = vad
+        self.decisions = []
+
+    def is_speech(self, block, level):
+        speech = self.vad.is_speech(block, level)
+        self.decisions.append(speech)
+        return speech
+
+
+def precision_recall(predicted, truth):
+    hits = np.count_nonzero(predicted & truth)
+    precision = hits / max(np.count_nonzero(predicted), 1)
+    recall = hits / max(np.count_nonzero(truth), 1)
+    return precision, recall
+
+
+def labelled_fixtures(directory):
+    """Yields (name, audio, speech regions) for every WAV with a label file."""
+    for path in fixture_paths(directory):
+        if not os.path.exists(os.path.splitext(path)[0] + ".json"):
+            continue
+        with open(os.path.splitext(path)[0] + ".json") as f:
+            labels = json.load(f)["speech"]
+        yield os.path.basename(path), load_wav(path), labels
+
+
+def evaluate(audio, labels, args):
+    truth = np.zeros(len(audio), dtype=bool)
+    for start, end in labels:
+        truth[int(start * 16000):int(end * 16000)] = True
+
+    vad = LoggingVAD(create_vad(args.vad, args.model_path))
+    segmenter = SpeechSegmenter(vad=vad)
+    kept = np.zeros(len(audio), dtype=bool)
+    block_truth = []
+
+    cpu_start = time.process_time()
+    for offset in range(0, len(audio) - BLOCKSIZE + 1, BLOCKSIZE):
+        block = audio[offset:offset + BLOCKSIZE]
+        _, events = segmenter.feed(block)
+        block_truth.append(truth[offset + BLOCKSIZE // 2])
+        for event, segment in events:
+            if event == "segment":
+                kept[segmenter.segment_start:segmenter.segment_start + len(segment)] = True
+    segment = segmenter.flush()
+    if segment is not None:
+        kept[segmenter.segment_start:segmenter.segment_start + len(segment)] = True
+    cpu = time.process_time() - cpu_start
+
+    return (np.array(vad.decisions), np.array(block_truth), kept, truth, cpu, len(audio) / 16000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fixtures", default=FIXTURES_DIR)
+    parser.add_argument("--vad", default="energy", choices=["energy", "silero"])
+    parser.add_argument("--model-path")
+    parser.add_argument("--seconds", type=float, default=300.0, help="synthetic speech to use without fixtures")
+    args = parser.parse_args()
+
+    fixtures = list(labelled_fixtures(args.fixtures))
+    if not fixtures:
+        print(f"No labelled fixtures in {args.fixtures}, using synthetic speech")
+        labels = []
+        fixtures = [("synthetic", synthetic_speech(args.seconds, regions=labels), labels)]
+
+    totals = [[], [], [], []]
+    total_cpu = total_audio = 0.0
+    print(f"{'fixture':<30} {'block P':>8} {'block R':>8} {'seg P':>6} {'seg R':>6} {'CPU ms/s':>9}")
+    for name, audio, labels in fixtures:
+        block_predicted, block_truth, kept, truth, cpu, seconds = evaluate(audio, labels, args)
+        bp, br = precision_recall(block_predicted, block_truth)
+        sp, sr = precision_recall(kept, truth)
+        print(f"{name:<30} {bp:>8.3f} {br:>8.3f} {sp:>6.3f} {sr:>6.3f} {cpu / seconds * 1000:>9.3f}")
+        for total, values in zip(totals, (block_predicted, block_truth, kept, truth)):
+            total.append(values)
+        total_cpu += cpu
+        total_audio += seconds
+
+    bp, br = precision_recall(np.concatenate(totals[0]), np.concatenate(totals[1]))
+    sp, sr = precision_recall(np.concatenate(totals[2]), np.concatenate(totals[3]))
+    print(f"{'overall':<30} {bp:>8.3f} {br:>8.3f} {sp:>6.3f} {sr:>6.3f} {total_cpu / total_audio * 1000:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
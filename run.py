@@ -1,11 +1,36 @@
+import argparse
 import sys
-from PyQt5.QtWidgets import QApplication
-from whisper_sst.gui.system_tray import SystemTrayApp
+from whisper_sst.utils.profiling import profiler
 
 def main():
+    parser = argparse.ArgumentParser(description="Whisper SST system tray app")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="print a breakdown of startup phases once the model is ready, then exit")
+    parser.add_argument("--startup-budget", type=float, metavar="SECONDS",
+                        help="with --profile-startup, exit with status 1 if the tray took longer than this to appear")
+    args = parser.parse_args()
+
+    with profiler.phase("import PyQt5"):
+        from PyQt5.QtWidgets import QApplication
+    with profiler.phase("import whisper_sst"):
+        from whisper_sst.gui.system_tray import SystemTrayApp
+
     app = QApplication(sys.argv)
     app.setQuitOnLastWindowClosed(False)
     tray_app = SystemTrayApp()
+
+    if args.profile_startup:
+        def finish_profile():
+            print(profiler.report())
+            tray_visible = profiler.milestones.get("tray visible")
+            over_budget = args.startup_budget is not None and tray_visible > args.startup_budget
+            if over_budget:
+                print(f"Tray took {tray_visible:.2f} s to appear, over the {args.startup_budget:.2f} s budget")
+            tray_app.quit_app()
+            app.exit(1 if over_budget else 0)
+
+        tray_app.ready.connect(finish_profile)
+
     sys.exit(app.exec_())
 
 if __name__ == "__main__":
@@ -0,0 +1,53 @@
+import argparse
+import sys
+import time
+from whisper_sst.core.engines import BACKENDS, COMPUTE_TYPES, DECODE_PROFILES, create_engine
+from whisper_sst.core.metrics import start_metrics_server
+from whisper_sst.core.server import DEFAULT_PORT, TranscriptionServer
+from whisper_sst.utils.settings import Settings
+
+def main():
+    settings = Settings()
+    parser = argparse.ArgumentParser(
+        description="Serve one loaded model to tray apps and other clients on this machine"
+    )
+    parser.add_argument("--listen", default=f"127.0.0.1:{DEFAULT_PORT}", help="host:port or a Unix socket path")
+    parser.add_argument("--model", default=settings.get("model", "large"))
+    parser.add_argument("--backend", choices=list(BACKENDS), default=settings.get("backend", "whisper"))
+    parser.add_argument("--compute-type", choices=COMPUTE_TYPES, default=settings.get("compute_type", "int8"))
+    parser.add_argument("--language", default=settings.get("language", "auto"),
+                        help="default for clients that stream audio")
+    parser.add_argument("--decode-profile", choices=list(DECODE_PROFILES),
+                        default=settings.get("decode_profile", "fast"), help="default for clients that stream audio")
+    parser.add_argument("--batch-size", type=int, default=8, help="utterances decoded together at most")
+    parser.add_argument("--batch-window-ms", type=float, default=10, help="how long a batch waits to fill up")
+    parser.add_argument("--max-pending", type=int, default=16, help="queued utterances allowed per client")
+    parser.add_argument("--metrics-port", type=int, default=settings.get("metrics_port"))
+    args = parser.parse_args()
+
+    print(f"Loading {args.model} ({args.backend})...")
+    engine = create_engine(args.backend, args.model, compute_type=args.compute_type).warm_up()
+    if args.metrics_port:
+        start_metrics_server(args.metrics_port)
+
+    server = TranscriptionServer(
+        engine,
+        language=args.language,
+        decode_profile=args.decode_profile,
+        max_batch=args.batch_size,
+        batch_window=args.batch_window_ms / 1000,
+        max_pending=args.max_pending
+    )
+    address = server.start(args.listen)
+    print(f"Serving {engine} on {address}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
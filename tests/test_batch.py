@@ -0,0 +1,55 @@
+import json
+import os
+
+from benchmarks.common import synthetic_speech, write_wav
+from whisper_sst.core import batch
+from whisper_sst.core.batch import BatchTranscriber
+
+
+class FakeEngine:
+    def transcribe_batch(self, audios, language=None):
+        return [{"text": f"{len(audio)} samples", "language": "en", "segments": []} for audio in audios]
+
+
+def transcriber(tmp_path, monkeypatch):
+    # Pool processes are forked, so they pick up the fake engine
+    monkeypatch.setattr(batch, "create_engine", lambda *args, **kwargs: FakeEngine())
+    return BatchTranscriber(str(tmp_path / "out"), output_format="srt", workers=1, batch_size=2)
+
+
+def speech_file(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    write_wav(path, synthetic_speech(6.0))
+    return path
+
+
+def test_unreadable_input_fails_and_is_retried(tmp_path, monkeypatch):
+    good = speech_file(str(tmp_path / "in" / "good.wav"))
+    bad = str(tmp_path / "in" / "bad.wav")
+    with open(bad, "wb") as f:
+        f.write(b"not a wav file")
+
+    run = transcriber(tmp_path, monkeypatch)
+    run.run([bad, good])
+    assert list(run.failed) == [bad]
+    assert run.completed() == {good}
+
+    again = transcriber(tmp_path, monkeypatch)
+    again.run([bad, good])
+    assert list(again.failed) == [bad]
+
+
+def test_resumed_run_keeps_output_paths(tmp_path, monkeypatch):
+    first = speech_file(str(tmp_path / "in" / "a" / "x.wav"))
+    second = speech_file(str(tmp_path / "in" / "b" / "x.wav"))
+    out = tmp_path / "out"
+    out.mkdir()
+    with open(out / batch.PROGRESS_FILE, "w") as f:
+        f.write(json.dumps({"file": first, "segments": 1}) + "\n")
+
+    run = transcriber(tmp_path, monkeypatch)
+    run.run([first, second])
+    assert not run.failed
+    assert (out / "b" / "x.srt").exists()
+    assert not (out / "x.srt").exists()
+    assert len(run.completed()) == 2
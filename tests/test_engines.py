@@ -0,0 +1,29 @@
+import numpy as np
+
+from whisper_sst.core.engines import WhisperEngine
+
+
+class FakeWhisperModel:
+    is_multilingual = True
+
+    def transcribe(self, audio, language=None, **options):
+        segment = {"start": 0.0, "end": 1.0, "text": " hello", "avg_logprob": -0.2, "temperature": 0.0}
+        return {"text": " hello", "language": language, "segments": [segment]}
+
+
+def engine():
+    engine = WhisperEngine("base", device="cpu")
+    engine.model = FakeWhisperModel()
+    engine.detect_language = lambda audio: ("en", 0.9)
+    return engine
+
+
+def test_lone_utterance_reports_language_and_decode_timings():
+    result = engine().transcribe(np.zeros(16000, dtype=np.float32))
+    assert set(result["timings"]) == {"language", "decode"}
+    assert result["language"] == "en"
+
+
+def test_known_language_skips_the_language_timing():
+    result = engine().transcribe(np.zeros(16000, dtype=np.float32), language="en")
+    assert set(result["timings"]) == {"decode"}
@@ -0,0 +1,23 @@
+import pytest
+
+from whisper_sst.core import model_loader
+from whisper_sst.core.engines import TranscriptionEngine
+from whisper_sst.core.model_loader import ModelCache, cache_budget
+
+
+def engine(model_name):
+    # fp32, as the whisper backend loads on CPU
+    return TranscriptionEngine(model_name, device="cpu", compute_type="float32")
+
+
+@pytest.mark.parametrize("memory", [16 * 1024 ** 3, None])
+def test_large_and_small_fit_the_default_budget(monkeypatch, memory):
+    monkeypatch.setattr(model_loader, "physical_memory", lambda: memory)
+    cache = ModelCache(cache_budget())
+    cache.put("large", engine("large"))
+    cache.put("small", engine("small"))
+    assert "large" in cache and "small" in cache
+
+
+def test_set_budget_is_used():
+    assert cache_budget(1024) == 1024 ** 3
@@ -0,0 +1,32 @@
+import json
+import socket
+import struct
+
+import pytest
+
+from whisper_sst.core.server import MAX_HEADER_BYTES, MAX_PAYLOAD_BYTES, recv_message, send_message
+
+
+def test_message_round_trip():
+    client, server = socket.socketpair()
+    with client, server:
+        send_message(client, {"type": "audio"}, b"\0" * 8)
+        assert recv_message(server) == ({"type": "audio", "bytes": 8}, b"\0" * 8)
+
+
+def test_oversized_header_is_refused():
+    client, server = socket.socketpair()
+    with client, server:
+        client.sendall(struct.pack("!I", MAX_HEADER_BYTES + 1))
+        with pytest.raises(ValueError):
+            recv_message(server)
+
+
+@pytest.mark.parametrize("length", [MAX_PAYLOAD_BYTES + 1, -1, "lots"])
+def test_bad_payload_length_is_refused(length):
+    client, server = socket.socketpair()
+    with client, server:
+        data = json.dumps({"type": "audio", "bytes": length}).encode()
+        client.sendall(struct.pack("!I", len(data)) + data)
+        with pytest.raises(ValueError):
+            recv_message(server)
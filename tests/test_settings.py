@@ -0,0 +1,67 @@
+import json
+
+import pytest
+
+from whisper_sst.core.engines import DECODE_PROFILES
+from whisper_sst.core.text_output import SINKS
+from whisper_sst.core.transcription_worker import BACKPRESSURE_POLICIES
+from whisper_sst.utils.settings import CHOICES, SCHEMA, Settings, validate
+
+BAD_VALUES = {
+    "decode_profile": "fastest",
+    "backpressure": "drop_newest",
+    "vad": "webrtc",
+    "output": "telepathy",
+    "transcription_queue_size": 0,
+    "hotwords": [1, 2],
+}
+
+
+def test_choices_match_the_code():
+    assert set(CHOICES["decode_profile"]) == set(DECODE_PROFILES)
+    assert set(CHOICES["backpressure"]) == set(BACKPRESSURE_POLICIES)
+    assert set(CHOICES["output"]) == set(SINKS) | {"auto"}
+
+
+@pytest.mark.parametrize("key, value", BAD_VALUES.items())
+def test_validate_rejects_bad_values(key, value):
+    with pytest.raises(ValueError):
+        validate(key, value)
+
+
+def test_bad_values_load_as_defaults(tmp_path):
+    path = tmp_path / "settings.json"
+    path.write_text(json.dumps({**BAD_VALUES, "batch_size": 2}))
+    settings = Settings(str(path))
+    try:
+        for key in BAD_VALUES:
+            assert settings.get(key) == SCHEMA[key][1]
+        assert settings.get("batch_size") == 2
+    finally:
+        settings.close()
+
+
+def test_set_rejects_bad_values_before_storing(tmp_path):
+    settings = Settings(str(tmp_path / "settings.json"))
+    try:
+        with pytest.raises(ValueError):
+            settings.set("decode_profile", "fastest")
+        assert settings.get("decode_profile") == "fast"
+    finally:
+        settings.close()
+
+
+def test_bad_edits_keep_the_current_value(tmp_path):
+    path = tmp_path / "settings.json"
+    settings = Settings(str(path))
+    try:
+        settings.set("backpressure", "merge")
+        settings.flush()
+        changes = []
+        settings._callbacks.append(changes.append)
+        path.write_text(json.dumps({"backpressure": "drop_newest", "batch_size": 2}))
+        settings._check()
+        assert settings.get("backpressure") == "merge"
+        assert changes == [{"batch_size": 2}]
+    finally:
+        settings.close()
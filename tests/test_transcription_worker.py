@@ -0,0 +1,47 @@
+import threading
+
+import numpy as np
+from PyQt5.QtCore import Qt
+
+from whisper_sst.core.engines import TranscriptionEngine
+from whisper_sst.core.metrics import Trace, metrics
+from whisper_sst.core.transcription_worker import TranscriptionWorker
+
+
+class FakeEngine(TranscriptionEngine):
+    def __init__(self):
+        super().__init__("fake", device="cpu")
+
+    def transcribe(self, audio, language=None, task="transcribe", temperature=0.0, best_of=None, beam_size=None,
+                   prompt=None):
+        return {"text": f"{len(audio)} samples", "language": "en"}
+
+
+def test_merged_utterance_keeps_its_trace():
+    worker = TranscriptionWorker(FakeEngine(), language="en", max_queue=1, backpressure="merge", max_batch=1)
+    # Nothing is decoded until there is an engine, so both utterances queue up
+    engine, worker.engine = worker.engine, None
+    first, second = Trace(1.0), Trace(1.0)
+    worker.submit(np.zeros(16000, dtype=np.float32), trace=first)
+    worker.submit(np.zeros(16000, dtype=np.float32), trace=second)
+    assert worker.pending() == 1
+
+    done = threading.Event()
+    results = []
+    worker.result_ready.connect(lambda result: (results.append(result), done.set()), Qt.DirectConnection)
+    worker.start()
+    worker.set_engine(engine)
+    assert done.wait(5)
+    worker.stop()
+
+    trace = results[0]["trace"]
+    assert trace is first
+    assert trace.merged == [second]
+    assert "queue_wait" in second.spans
+    assert trace.audio_seconds > 2.0
+
+    finished = metrics.counters["utterances_total"]
+    trace.mark("typed")
+    metrics.finish(trace)
+    assert metrics.counters["utterances_total"] == finished + 2
+    assert "typed" in second.marks
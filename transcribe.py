@@ -0,0 +1,52 @@
+import argparse
+import sys
+from whisper_sst.core.batch import BatchTranscriber, find_inputs
+from whisper_sst.core.engines import BACKENDS, COMPUTE_TYPES
+from whisper_sst.core.vad import create_vad
+from whisper_sst.utils.settings import Settings
+
+def main():
+    settings = Settings()
+    parser = argparse.ArgumentParser(
+        description="Transcribe audio files with the same VAD and model settings as the tray app"
+    )
+    parser.add_argument("inputs", nargs="+", help="audio files, globs or directories")
+    parser.add_argument("-o", "--output-dir", default="transcripts")
+    parser.add_argument("-f", "--format", choices=["jsonl", "srt", "txt"], default="jsonl")
+    parser.add_argument("--model", default=settings.get("model", "large"))
+    parser.add_argument("--backend", choices=list(BACKENDS), default=settings.get("backend", "whisper"))
+    parser.add_argument("--compute-type", choices=COMPUTE_TYPES, default=settings.get("compute_type", "int8"))
+    parser.add_argument("--language", default=settings.get("language", "auto"))
+    parser.add_argument("--workers", type=int, help="number of model processes (default: one per 4 cores)")
+    parser.add_argument("--batch-size", type=int, default=8, help="segments sent to a worker at a time")
+    args = parser.parse_args()
+
+    paths = find_inputs(args.inputs)
+    if not paths:
+        print("No audio files found")
+        return 1
+
+    def vad_factory():
+        return create_vad(
+            settings.get("vad", "energy"),
+            settings.get("vad_model_path"),
+            min_threshold=settings.get("vad_min_threshold", 0.005),
+            noise_ratio=settings.get("vad_noise_ratio", 3.0)
+        )
+
+    transcriber = BatchTranscriber(
+        args.output_dir,
+        output_format=args.format,
+        backend=args.backend,
+        model_name=args.model,
+        compute_type=args.compute_type,
+        language=None if args.language == "auto" else args.language,
+        vad_factory=vad_factory,
+        workers=args.workers,
+        batch_size=args.batch_size
+    )
+    transcriber.run(paths)
+    return 1 if transcriber.failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
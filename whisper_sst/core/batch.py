@@ -0,0 +1,262 @@
+import concurrent.futures
+import glob
+import json
+import os
+import subprocess
+import time
+import wave
+
+import numpy as np
+
+from .engines import create_engine
+from .segmenter import SpeechSegmenter
+
+SAMPLERATE = 16000
+BLOCKSIZE = 1024
+AUDIO_EXTENSIONS = (".wav", ".flac", ".mp3", ".ogg", ".m4a", ".webm", ".mp4")
+PROGRESS_FILE = ".whisper_sst_progress.jsonl"
+
+
+def find_inputs(patterns):
+    """Expand files, globs and directories into a sorted, de-duplicated list of audio files."""
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for root, _, files in os.walk(pattern):
+                paths.extend(os.path.join(root, name) for name in files
+                             if name.lower().endswith(AUDIO_EXTENSIONS))
+        else:
+            paths.extend(glob.glob(pattern, recursive=True) or [pattern])
+
+    seen = set()
+    unique = []
+    for path in sorted(paths):
+        path = os.path.abspath(path)
+        if path not in seen:
+            seen.add(path)
+            unique.append(path)
+    return unique
+
+
+def load_audio(path):
+    """Load a file as 16 kHz mono float32, decoding through ffmpeg unless it is already 16 kHz mono WAV."""
+    if path.lower().endswith(".wav"):
+        with wave.open(path, 'rb') as wf:
+            if wf.getframerate() == SAMPLERATE and wf.getnchannels() == 1 and wf.getsampwidth() == 2:
+                frames = wf.readframes(wf.getnframes())
+                return np.frombuffer(frames, dtype=np.int16).astype(np.float32) / 32768.0
+
+    cmd = ["ffmpeg", "-nostdin", "-threads", "0", "-i", path,
+           "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(SAMPLERATE), "-"]
+    out = subprocess.run(cmd, capture_output=True, check=True).stdout
+    return np.frombuffer(out, dtype=np.int16).astype(np.float32) / 32768.0
+
+
+def segment_audio(audio, vad=None):
+    """Yield ``(start_seconds, audio)`` speech segments using the live segmentation logic."""
+    segmenter = SpeechSegmenter(samplerate=SAMPLERATE, vad=vad)
+    block = np.zeros(BLOCKSIZE, dtype=np.float32)
+    for offset in range(0, len(audio), BLOCKSIZE):
+        chunk = audio[offset:offset + BLOCKSIZE]
+        block[:len(chunk)] = chunk
+        block[len(chunk):] = 0
+        _, events = segmenter.feed(block)
+        for event, segment in events:
+            if event == "segment":
+                yield segmenter.segment_start / SAMPLERATE, segment
+
+    segment = segmenter.flush()
+    if segment is not None:
+        yield segmenter.segment_start / SAMPLERATE, segment
+
+
+# Each pool process loads its own engine once
+_engine = None
+
+
+def _init_worker(backend, model_name, compute_type, threads):
+    global _engine
+    # Must be set before torch/ctranslate2 are imported in this process
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    _engine = create_engine(backend, model_name, device="cpu", compute_type=compute_type, threads=threads)
+
+
+def _transcribe_batch(batch, language):
+    results = _engine.transcribe_batch([audio for _, _, _, audio in batch], language=language)
+    return [(path, index, start, len(audio) / SAMPLERATE, result)
+            for (path, index, start, audio), result in zip(batch, results)]
+
+
+def format_timestamp(seconds):
+    millis = int(round(seconds * 1000))
+    hours, millis = divmod(millis, 3_600_000)
+    minutes, millis = divmod(millis, 60_000)
+    seconds, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d},{millis:03d}"
+
+
+def to_entries(segment_results):
+    """Flatten per-segment results into ``{start, end, text, language}`` entries with absolute times."""
+    entries = []
+    for start, duration, result in segment_results:
+        parts = result.get("segments") or [{"start": 0.0, "end": duration, "text": result["text"]}]
+        for part in parts:
+            text = part["text"].strip()
+            if text:
+                entries.append({
+                    "start": round(start + part["start"], 3),
+                    "end": round(start + min(part["end"], duration), 3),
+                    "text": text,
+                    "language": result.get("language")
+                })
+    return entries
+
+
+class BatchTranscriber:
+    """Transcribes files through the VAD and a pool of engine processes.
+
+    Segments from consecutive files are grouped into batches of
+    ``batch_size`` and fanned out across ``workers`` processes. A file's
+    outputs are written once all its segments are done, and the file is then
+    recorded in the progress file so an interrupted run can be resumed.
+    Outputs keep the files' paths relative to the directory they have in
+    common, so files with the same name in different directories don't
+    overwrite each other. A file that can't be loaded or whose segments fail
+    to transcribe is reported in ``failed`` and left out of the progress file, so the next
+    run tries it again; the other files carry on.
+    """
+
+    def __init__(self, output_dir, output_format="jsonl", backend="whisper", model_name="base",
+                 compute_type="default", language=None, vad_factory=None, workers=None, batch_size=8):
+        self.output_dir = output_dir
+        self.output_format = output_format
+        self.backend = backend
+        self.model_name = model_name
+        self.compute_type = compute_type
+        self.language = language
+        self.vad_factory = vad_factory
+        cpus = os.cpu_count() or 1
+        self.workers = workers or max(1, cpus // 4)
+        self.threads = max(1, cpus // self.workers)
+        self.batch_size = batch_size
+        self.progress_path = os.path.join(output_dir, PROGRESS_FILE)
+        self.failed = {}  # path -> error
+        self._base = None
+
+    def completed(self):
+        if not os.path.exists(self.progress_path):
+            return set()
+        with open(self.progress_path) as f:
+            return {json.loads(line)["file"] for line in f if line.strip()}
+
+    def run(self, paths):
+        os.makedirs(self.output_dir, exist_ok=True)
+        done = self.completed()
+        todo = [path for path in paths if path not in done]
+        if len(todo) < len(paths):
+            print(f"Skipping {len(paths) - len(todo)} already transcribed file(s)")
+
+        if paths:
+            # From every input, not just what is left, so a resumed run names its outputs the same way
+            self._base = os.path.commonpath([os.path.dirname(path) for path in paths])
+
+        start_time = time.perf_counter()
+        audio_seconds = 0.0
+        pending = {}  # path -> [segments left (None while still segmenting), results]
+        in_flight = {}  # future -> (path, index, start) of each segment in its batch
+        batch = []
+
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(self.backend, self.model_name, self.compute_type, self.threads)
+        ) as pool:
+            def submit(batch):
+                future = pool.submit(_transcribe_batch, batch, self.language)
+                in_flight[future] = [(path, index, start) for path, index, start, _ in batch]
+                # Keep memory bounded by limiting the number of queued batches
+                while len(in_flight) >= self.workers * 2:
+                    self._collect(in_flight, pending, concurrent.futures.FIRST_COMPLETED)
+
+            for path in todo:
+                try:
+                    audio = load_audio(path)
+                except Exception as e:
+                    self.failed[path] = str(e)
+                    print(f"Failed to load {path}: {e}")
+                    continue
+
+                audio_seconds += len(audio) / SAMPLERATE
+                vad = self.vad_factory() if self.vad_factory else None
+                pending[path] = [None, []]
+                count = 0
+                for index, (start, segment) in enumerate(segment_audio(audio, vad)):
+                    batch.append((path, index, start, segment))
+                    count += 1
+                    if len(batch) >= self.batch_size:
+                        submit(batch)
+                        batch = []
+                del audio
+
+                pending[path][0] = count - len(pending[path][1])
+                if pending[path][0] == 0:
+                    self._finish_file(path, pending.pop(path)[1])
+
+            if batch:
+                submit(batch)
+            while in_flight:
+                self._collect(in_flight, pending, concurrent.futures.ALL_COMPLETED)
+
+        wall = time.perf_counter() - start_time
+        print(f"Transcribed {len(todo) - len(self.failed)} file(s), {audio_seconds:.1f} s of audio in {wall:.1f} s "
+              f"({audio_seconds / wall if wall else 0:.2f} audio-seconds per wall-second)")
+        if self.failed:
+            print(f"{len(self.failed)} file(s) failed and will be retried on the next run")
+        return audio_seconds, wall
+
+    def _collect(self, in_flight, pending, return_when):
+        finished, _ = concurrent.futures.wait(in_flight, return_when=return_when)
+        for future in finished:
+            segments = in_flight.pop(future)
+            try:
+                done = future.result()
+            except Exception as e:
+                # Only the files in this batch fail; the rest of the run carries on
+                done = [(path, index, start, None, None) for path, index, start in segments]
+                for path, _, _ in segments:
+                    if path not in self.failed:
+                        self.failed[path] = str(e)
+                        print(f"Failed to transcribe {path}: {e}")
+            for path, index, start, duration, result in done:
+                state = pending[path]
+                state[1].append((index, start, duration, result))
+                if state[0] is not None:
+                    state[0] -= 1
+                    if state[0] == 0:
+                        self._finish_file(path, pending.pop(path)[1])
+
+    def _finish_file(self, path, results):
+        if path in self.failed:
+            return
+        results.sort(key=lambda r: r[0])
+        entries = to_entries([(start, duration, result) for _, start, duration, result in results])
+        name = os.path.splitext(os.path.relpath(path, self._base))[0]
+        if self.output_format != "jsonl":
+            os.makedirs(os.path.dirname(os.path.join(self.output_dir, name)), exist_ok=True)
+
+        if self.output_format == "jsonl":
+            with open(os.path.join(self.output_dir, "transcripts.jsonl"), "a", encoding="utf-8") as f:
+                for entry in entries:
+                    f.write(json.dumps({"file": path, **entry}, ensure_ascii=False) + "\n")
+        elif self.output_format == "srt":
+            with open(os.path.join(self.output_dir, f"{name}.srt"), "w", encoding="utf-8") as f:
+                for i, entry in enumerate(entries, 1):
+                    f.write(f"{i}\n{format_timestamp(entry['start'])} --> {format_timestamp(entry['end'])}\n"
+                            f"{entry['text']}\n\n")
+        else:
+            with open(os.path.join(self.output_dir, f"{name}.txt"), "w", encoding="utf-8") as f:
+                f.write(" ".join(entry["text"] for entry in entries) + "\n")
+
+        with open(self.progress_path, "a") as f:
+            f.write(json.dumps({"file": path, "segments": len(results)}) + "\n")
+        print(f"Finished {path} ({len(results)} segments)")
@@ -0,0 +1,90 @@
+import collections
+import time
+
+
+class ContextCache:
+    """Rolling decoder prompt built from recently committed text and a hotword list.
+
+    Consecutive utterances are usually part of the same dictation, so the
+    text committed for the last few of them is fed back as the prompt of the
+    next decode. That keeps punctuation, casing and vocabulary consistent
+    and makes the first-temperature decode fail less often. At most
+    ``max_tokens`` tokens are kept, hotwords first and then the newest
+    context, and everything is forgotten once ``max_age`` seconds pass
+    without a new utterance.
+
+    Text is tokenized once, when it is added, with the tokenizer of the
+    engine the cache is bound to; the assembled prompt is kept until the
+    context changes. Engines that only take text prompts get the text back,
+    budgeted by words instead.
+    """
+
+    def __init__(self, max_tokens=96, max_age=60.0, hotwords=()):
+        self.max_tokens = max_tokens
+        self.max_age = max_age
+        self.hotwords = [word.strip() for word in hotwords if word.strip()]
+        self._engine = None
+        self._tokenizes = False
+        self._entries = collections.deque()  # (time, text, tokens)
+        self._hotword_units = []
+        self._prompt = None
+
+    def bind(self, engine):
+        """Use ``engine``'s tokenizer; context tokenized for another engine is dropped."""
+        if engine is self._engine:
+            return
+        self._engine = engine
+        self._tokenizes = engine is not None and engine.tokenize("") is not None
+        self._entries.clear()
+        self._hotword_units = self._units(", ".join(self.hotwords) + ".") if self.hotwords else []
+        self._prompt = None
+
+    def configure(self, max_tokens=None, max_age=None, hotwords=None):
+        """Changes the budget, age limit or hotwords, keeping the context gathered so far."""
+        if max_tokens is not None:
+            self.max_tokens = max_tokens
+        if max_age is not None:
+            self.max_age = max_age
+        if hotwords is not None:
+            self.hotwords = [word.strip() for word in hotwords if word.strip()]
+            # Without an engine yet, bind works them out
+            if self._engine is not None:
+                self._hotword_units = self._units(", ".join(self.hotwords) + ".") if self.hotwords else []
+        self._prompt = None
+
+    def add(self, text, now=None):
+        text = text.strip()
+        if not text or self._engine is None:
+            return
+        now = time.time() if now is None else now
+        self._expire(now)
+        self._entries.append((now, text, self._units(text)))
+
+        # Older entries only matter while they still fit in the budget
+        budget = self.max_tokens - len(self._hotword_units)
+        while len(self._entries) > 1 and sum(len(e[2]) for e in list(self._entries)[1:]) >= budget:
+            self._entries.popleft()
+        self._prompt = None
+
+    def prompt(self, now=None):
+        """Token ids (or text) to condition the next decode on, or None."""
+        self._expire(time.time() if now is None else now)
+        if self._prompt is None:
+            budget = max(0, self.max_tokens - len(self._hotword_units))
+            context = [unit for _, _, units in self._entries for unit in units]
+            units = self._hotword_units + (context[-budget:] if budget else [])
+            if not units:
+                return None
+            self._prompt = units if self._tokenizes else " ".join(units)
+        return self._prompt
+
+    def clear(self):
+        self._entries.clear()
+        self._prompt = None
+
+    def _expire(self, now):
+        if self._entries and now - self._entries[-1][0] > self.max_age:
+            self.clear()
+
+    def _units(self, text):
+        return list(self._engine.tokenize(text)) if self._tokenizes else text.split()
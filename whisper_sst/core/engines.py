@@ -0,0 +1,360 @@
+import os
+import time
+
+import numpy as np
+
+# Compute types understood by CTranslate2; "default" keeps the model's own type
+COMPUTE_TYPES = ["default", "int8", "int8_float16", "int8_float32", "float16", "float32"]
+
+# Approximate parameter counts in millions, used to estimate memory use
+MODEL_PARAMETERS = {"tiny": 39, "base": 74, "small": 244, "medium": 769, "large": 1550}
+
+# Same schedule as openai-whisper's transcribe()
+TEMPERATURE_FALLBACK = (0.0, 0.2, 0.4, 0.6, 0.8, 1.0)
+
+# Decoding options per latency profile. A tuple of temperatures is a
+# fallback schedule: the next temperature is only tried when a decode fails
+# the compression-ratio or log-prob checks, so the common case is a single
+# greedy (or beam) pass.
+DECODE_PROFILES = {
+    "fast": {"temperature": TEMPERATURE_FALLBACK, "best_of": 2, "beam_size": None},
+    "balanced": {"temperature": TEMPERATURE_FALLBACK, "best_of": 5, "beam_size": 2},
+    "accurate": {"temperature": TEMPERATURE_FALLBACK, "best_of": 5, "beam_size": 5},
+    # Always samples twice at 0.2; what every utterance used to get
+    "sampling": {"temperature": 0.2, "best_of": 2, "beam_size": None},
+}
+
+
+class TranscriptionEngine:
+    """Common interface for the inference backends.
+
+    ``transcribe`` takes 16 kHz mono float32 audio and returns a dict with
+    ``text``, ``language`` and ``segments`` (a list of dicts with ``start``,
+    ``end`` and ``text``), matching what openai-whisper returns. Backends
+    that know them also fill in ``language_probability`` (when the language
+    was detected) and ``avg_logprob``.
+
+    ``temperature`` is a single value or a fallback schedule as in
+    ``DECODE_PROFILES``; ``fallbacks`` in the result counts the re-decodes
+    at higher temperatures. ``prompt`` is preceding text, either as a string
+    or as token ids from ``tokenize``, used to condition the decode.
+
+    ``threads`` caps the CPU threads the backend uses; by default it uses
+    every core.
+    """
+    backend = None
+
+    def __init__(self, model_name, device=None, compute_type="default", threads=None):
+        self.model_name = model_name
+        self.device = device or self.default_device()
+        self.compute_type = compute_type
+        self.threads = threads
+        self.model = None
+
+    @staticmethod
+    def default_device():
+        return "cpu"
+
+    def load(self):
+        raise NotImplementedError
+
+    def transcribe(self, audio, language=None, task="transcribe", temperature=0.0, best_of=None, beam_size=None,
+                   prompt=None):
+        raise NotImplementedError
+
+    def transcribe_batch(self, audios, language=None, task="transcribe", temperature=0.0, best_of=None,
+                         beam_size=None, prompt=None):
+        """Transcribe several utterances, returning results in the same order.
+
+        Backends that can share one encoder pass across utterances override
+        this; the default decodes them one by one.
+        """
+        return [self.transcribe(audio, language=language, task=task, temperature=temperature,
+                                best_of=best_of, beam_size=beam_size, prompt=prompt)
+                for audio in audios]
+
+    def tokenize(self, text):
+        """Token ids for ``text`` as a prompt, or None if the backend only takes text prompts."""
+        return None
+
+    def warm_up(self):
+        # One throwaway decode so the first real utterance doesn't pay for
+        # lazy initialisation, kernel selection and buffer allocation
+        rng = np.random.default_rng(0)
+        audio = (rng.standard_normal(16000) * 0.01).astype(np.float32)
+        self.transcribe(audio, language="en")
+        return self
+
+    def bytes_per_parameter(self):
+        if self.compute_type.startswith("int8"):
+            return 1
+        if self.compute_type == "float16":
+            return 2
+        return 4
+
+    def memory_footprint(self):
+        # "large+base" pairs a target with a draft model; both stay resident
+        parameters = sum(MODEL_PARAMETERS.get(name.split(".")[0].split("-")[0], 1550)
+                         for name in self.model_name.split("+"))
+        return parameters * 1_000_000 * self.bytes_per_parameter()
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.model_name!r}, device={self.device!r}, compute_type={self.compute_type!r})"
+
+
+class WhisperEngine(TranscriptionEngine):
+    backend = "whisper"
+
+    @staticmethod
+    def default_device():
+        import torch
+        return "cuda" if torch.cuda.is_available() else "cpu"
+
+    def load(self):
+        import whisper
+        if self.threads:
+            import torch
+            torch.set_num_threads(self.threads)
+        self.model = whisper.load_model(self.model_name, device=self.device)
+        return self
+
+    def memory_footprint(self):
+        return sum(p.numel() * p.element_size() for p in self.model.parameters())
+
+    def transcribe(self, audio, language=None, task="transcribe", temperature=0.0, best_of=None, beam_size=None,
+                   prompt=None):
+        probability = None
+        timings = {}
+        if language is None and self.model.is_multilingual:
+            # Detect up front (as transcribe() would) to keep the confidence
+            start = time.perf_counter()
+            language, probability = self.detect_language(audio)
+            timings["language"] = time.perf_counter() - start
+
+        if prompt is not None and not isinstance(prompt, str):
+            # transcribe() only takes a text prompt
+            prompt = self.tokenizer().decode(prompt)
+
+        start = time.perf_counter()
+        result = self.model.transcribe(
+            audio,
+            language=language,
+            task=task,
+            temperature=temperature,
+            best_of=best_of,
+            beam_size=beam_size,
+            initial_prompt=prompt or None,
+            fp16=self.device == "cuda"
+        )
+        # Mel, encoder and decoder all run inside transcribe()
+        timings["decode"] = time.perf_counter() - start
+        segments = result.get("segments", [])
+        schedule = tuple(temperature) if isinstance(temperature, (tuple, list)) else (temperature,)
+        return {
+            "text": result["text"],
+            "language": result.get("language", language),
+            "language_probability": probability,
+            "avg_logprob": float(np.mean([s["avg_logprob"] for s in segments])) if segments else None,
+            "fallbacks": sum(schedule.index(s["temperature"]) for s in segments if s["temperature"] in schedule),
+            "segments": [{"start": s["start"], "end": s["end"], "text": s["text"]} for s in segments],
+            "timings": timings
+        }
+
+    def tokenizer(self):
+        from whisper.tokenizer import get_tokenizer
+        return get_tokenizer(self.model.is_multilingual, num_languages=self.model.num_languages)
+
+    def tokenize(self, text):
+        return self.tokenizer().encode(" " + text.strip())
+
+    def detect_language(self, audio):
+        import torch
+        import whisper
+
+        mel = whisper.log_mel_spectrogram(whisper.pad_or_trim(audio), n_mels=self.model.dims.n_mels)
+        mel = mel.to(self.model.device)
+        with torch.no_grad():
+            _, probs = self.model.detect_language(mel.half() if self.device == "cuda" else mel)
+        language = max(probs, key=probs.get)
+        return language, probs[language]
+
+    def transcribe_batch(self, audios, language=None, task="transcribe", temperature=0.0, best_of=None,
+                         beam_size=None, prompt=None):
+        # Utterances that fit in one 30 s window share a single batched
+        # encoder and decoder pass; a lone one and longer ones go through
+        # transcribe().
+        # Each batched result carries the batch's mel/encode/language/decode
+        # timings; transcribe() reports its language and decode timings.
+        import torch
+        import whisper
+
+        results = [None] * len(audios)
+        failed = set()
+        short = [i for i, audio in enumerate(audios) if len(audio) <= whisper.audio.N_SAMPLES]
+        if len(short) > 1:
+            fp16 = self.device == "cuda"
+            timings = {}
+            start = time.perf_counter()
+            mel = torch.stack([
+                whisper.log_mel_spectrogram(whisper.pad_or_trim(audios[i]), n_mels=self.model.dims.n_mels)
+                for i in short
+            ]).to(self.model.device)
+            timings["mel"] = time.perf_counter() - start
+
+            start = time.perf_counter()
+            with torch.no_grad():
+                features = self.model.embed_audio(mel.half() if fp16 else mel)
+            timings["encode"] = time.perf_counter() - start
+
+            if language is not None or not self.model.is_multilingual:
+                languages = [language or "en"] * len(short)
+                probabilities = [None] * len(short)
+            else:
+                start = time.perf_counter()
+                _, probs = self.model.detect_language(features)
+                languages = [max(p, key=p.get) for p in probs]
+                probabilities = [p[l] for p, l in zip(probs, languages)]
+                timings["language"] = time.perf_counter() - start
+
+            # The batched pass only tries the first temperature; failures
+            # go through transcribe() with the rest of the schedule
+            first = temperature[0] if isinstance(temperature, (tuple, list)) else temperature
+            if isinstance(prompt, str):
+                prompt = self.tokenize(prompt)
+            start = time.perf_counter()
+            for lang in dict.fromkeys(languages):
+                group = [n for n, l in enumerate(languages) if l == lang]
+                options = whisper.DecodingOptions(
+                    language=lang,
+                    task=task,
+                    temperature=first,
+                    best_of=best_of if first > 0 else None,
+                    beam_size=beam_size if first == 0 else None,
+                    prompt=prompt or None,
+                    fp16=fp16,
+                    without_timestamps=True
+                )
+                for n, decoded in zip(group, whisper.decode(self.model, features[group], options)):
+                    if decoded.compression_ratio > 2.4 or decoded.avg_logprob < -1.0:
+                        failed.add(short[n])
+                        continue
+                    i = short[n]
+                    duration = len(audios[i]) / whisper.audio.SAMPLE_RATE
+                    results[i] = {
+                        "text": decoded.text,
+                        "language": decoded.language,
+                        "language_probability": probabilities[n],
+                        "avg_logprob": decoded.avg_logprob,
+                        "fallbacks": 0,
+                        "segments": [{"start": 0.0, "end": duration, "text": decoded.text}],
+                        "timings": timings
+                    }
+            timings["decode"] = time.perf_counter() - start
+
+        for i, audio in enumerate(audios):
+            if results[i] is None:
+                schedule = temperature
+                if i in failed and isinstance(temperature, (tuple, list)) and len(temperature) > 1:
+                    schedule = temperature[1:]
+                results[i] = self.transcribe(audio, language=language, task=task, temperature=schedule,
+                                             best_of=best_of, beam_size=beam_size, prompt=prompt)
+                if i in failed:
+                    results[i]["fallbacks"] += 1
+        return results
+
+
+class FasterWhisperEngine(TranscriptionEngine):
+    backend = "faster-whisper"
+
+    # openai-whisper's "large" is large-v3
+    MODEL_ALIASES = {"large": "large-v3"}
+
+    @staticmethod
+    def default_device():
+        import ctranslate2
+        return "cuda" if ctranslate2.get_cuda_device_count() > 0 else "cpu"
+
+    def load(self):
+        from faster_whisper import WhisperModel
+        self.model = WhisperModel(
+            self.MODEL_ALIASES.get(self.model_name, self.model_name),
+            device=self.device,
+            compute_type=self.compute_type,
+            cpu_threads=self.threads or os.cpu_count() or 4
+        )
+        return self
+
+    def tokenize(self, text):
+        return self.model.hf_tokenizer.encode(" " + text.strip(), add_special_tokens=False).ids
+
+    def transcribe(self, audio, language=None, task="transcribe", temperature=0.0, best_of=None, beam_size=None,
+                   prompt=None):
+        segments, info = self.model.transcribe(
+            audio,
+            language=language,
+            task=task,
+            temperature=list(temperature) if isinstance(temperature, (tuple, list)) else temperature,
+            best_of=best_of or 1,
+            beam_size=beam_size or 1,
+            initial_prompt=prompt or None
+        )
+        segments = list(segments)
+        schedule = list(temperature) if isinstance(temperature, (tuple, list)) else [temperature]
+        return {
+            "text": "".join(s.text for s in segments),
+            "language": info.language,
+            "language_probability": None if language else info.language_probability,
+            "avg_logprob": float(np.mean([s.avg_logprob for s in segments])) if segments else None,
+            "fallbacks": sum(schedule.index(s.temperature) for s in segments if s.temperature in schedule),
+            "segments": [{"start": s.start, "end": s.end, "text": s.text} for s in segments]
+        }
+
+
+class WhisperCppEngine(TranscriptionEngine):
+    backend = "whisper.cpp"
+
+    def bytes_per_parameter(self):
+        return 2  # ggml models are f16 unless a quantized file is given
+
+    def load(self):
+        from pywhispercpp.model import Model
+        self.model = Model(self.model_name, n_threads=self.threads or os.cpu_count() or 4, print_progress=False)
+        return self
+
+    def transcribe(self, audio, language=None, task="transcribe", temperature=0.0, best_of=None, beam_size=None,
+                   prompt=None):
+        segments = self.model.transcribe(
+            audio,
+            language=language or "auto",
+            translate=task == "translate",
+            # No fallback schedule here; whisper.cpp has its own
+            temperature=temperature[0] if isinstance(temperature, (tuple, list)) else temperature,
+            initial_prompt=prompt or ""
+        )
+        # whisper.cpp timestamps are in centiseconds
+        segments = [{"start": s.t0 / 100, "end": s.t1 / 100, "text": s.text} for s in segments]
+        return {
+            "text": "".join(s["text"] for s in segments),
+            "language": language,
+            "segments": segments
+        }
+
+
+BACKENDS = {
+    engine.backend: engine for engine in (WhisperEngine, FasterWhisperEngine, WhisperCppEngine)
+}
+
+
+def create_engine(backend, model_name, device=None, compute_type="default", threads=None):
+    if backend == "remote":
+        # model_name is the address of a TranscriptionServer
+        from .remote import RemoteEngine
+        return RemoteEngine(model_name, device=device, compute_type=compute_type).load()
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend: {backend}")
+    if "+" in model_name:
+        if backend != "whisper":
+            raise ValueError("Draft model pairings are only supported by the whisper backend")
+        from .speculative import SpeculativeWhisperEngine
+        return SpeculativeWhisperEngine(model_name, device=device, compute_type=compute_type, threads=threads).load()
+    return BACKENDS[backend](model_name, device=device, compute_type=compute_type, threads=threads).load()
@@ -0,0 +1,45 @@
+class LanguageCache:
+    """Remembers the session's language once detection keeps agreeing on it.
+
+    Until a language has been detected ``confirmations`` times in a row with
+    at least ``min_probability`` confidence, ``language()`` returns None and
+    every utterance runs language detection. After that the language is
+    passed to the engine directly. A decode in the cached language whose
+    average log-probability falls below ``min_logprob`` suggests the speaker
+    switched, so the cache is dropped and detection starts over; a detection
+    below ``min_probability`` resets the streak the same way.
+    """
+
+    def __init__(self, confirmations=3, min_probability=0.8, min_logprob=-1.0):
+        self.confirmations = confirmations
+        self.min_probability = min_probability
+        self.min_logprob = min_logprob
+        self.reset()
+
+    def reset(self):
+        self._candidate = None
+        self._streak = 0
+
+    def language(self):
+        if self.confirmations and self._streak >= self.confirmations:
+            return self._candidate
+        return None
+
+    def update(self, result, cached):
+        """Fold in a result; returns False when a decode in the cached language looks wrong."""
+        logprob = result.get("avg_logprob")
+        if cached:
+            if logprob is not None and logprob < self.min_logprob:
+                self.reset()
+                return False
+            return True
+
+        probability = result.get("language_probability")
+        if probability is not None and probability < self.min_probability:
+            self._streak = 0
+        elif result["language"] == self._candidate:
+            self._streak += 1
+        else:
+            self._candidate = result["language"]
+            self._streak = 1
+        return True
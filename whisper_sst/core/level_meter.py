@@ -0,0 +1,95 @@
+import math
+import threading
+import time
+
+import numpy as np
+
+DBFS_FLOOR = -60.0
+CLIP_LEVEL = 0.999
+
+
+def block_levels(block):
+    """RMS and absolute peak of a float32 block, without temporary arrays."""
+    rms = float(np.sqrt(np.dot(block, block) / len(block)))
+    peak = float(max(block.max(), -block.min()))
+    return rms, peak
+
+
+def to_dbfs(value, floor=DBFS_FLOOR):
+    if value <= 0:
+        return floor
+    return max(floor, 20 * math.log10(value))
+
+
+class LevelMeter:
+    """Levels of the blocks captured since the display last looked.
+
+    The capture thread calls ``update`` once per block; nothing crosses to
+    the GUI thread until the display polls ``read`` from its refresh timer.
+    A read covers every block since the previous one: the RMS over all of
+    them, the highest peak and whether any block clipped.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._energy = 0.0
+        self._peak = 0.0
+        self._blocks = 0
+        self._clipped = False
+
+    def update(self, rms, peak):
+        with self._lock:
+            self._energy += rms * rms
+            self._peak = max(self._peak, peak)
+            self._clipped = self._clipped or peak >= CLIP_LEVEL
+            self._blocks += 1
+
+    def read(self):
+        """``(rms, peak, clipped)`` since the last read, or None if no block arrived."""
+        with self._lock:
+            if not self._blocks:
+                return None
+            levels = math.sqrt(self._energy / self._blocks), self._peak, self._clipped
+            self._energy = 0.0
+            self._peak = 0.0
+            self._blocks = 0
+            self._clipped = False
+            return levels
+
+
+class PeakHold:
+    """Peak-hold and clip indicator state for a meter display, in dBFS.
+
+    A new peak is held for ``hold`` seconds and then falls at ``decay`` dB
+    per second. The clip indicator stays lit for ``clip_hold`` seconds after
+    the last clipped block.
+    """
+
+    def __init__(self, hold=1.5, decay=20.0, clip_hold=2.0):
+        self.hold = hold
+        self.decay = decay
+        self.clip_hold = clip_hold
+        self.level = DBFS_FLOOR
+        self._held = DBFS_FLOOR
+        self._held_at = 0.0
+        self._clipped_at = None
+
+    def update(self, peak_db, clipped=False, now=None):
+        now = time.monotonic() if now is None else now
+        if peak_db >= self.level:
+            self.level = self._held = peak_db
+            self._held_at = now
+        else:
+            fallen = self._held - self.decay * max(0.0, now - self._held_at - self.hold)
+            self.level = max(peak_db, fallen, DBFS_FLOOR)
+        if clipped:
+            self._clipped_at = now
+        return self.level
+
+    def clipping(self, now=None):
+        now = time.monotonic() if now is None else now
+        return self._clipped_at is not None and now - self._clipped_at < self.clip_hold
+
+    def reset(self):
+        self.level = self._held = DBFS_FLOOR
+        self._clipped_at = None
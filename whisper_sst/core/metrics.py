@@ -0,0 +1,156 @@
+import collections
+import http.server
+import json
+import threading
+import time
+
+import numpy as np
+
+
+class Trace:
+    """Timestamps and span durations for one utterance on its way to text."""
+
+    def __init__(self, audio_seconds=0.0):
+        self.audio_seconds = audio_seconds
+        self.marks = {}
+        self.spans = {}
+        # Utterances whose audio was merged into this one's while queued
+        self.merged = []
+
+    def mark(self, name, at=None):
+        self.marks[name] = time.time() if at is None else at
+
+    def span(self, name, seconds):
+        self.spans[name] = self.spans.get(name, 0.0) + seconds
+
+
+class Histogram:
+    """Keeps the most recent samples for percentile queries, plus lifetime count and sum."""
+
+    def __init__(self, size=2048):
+        self.samples = collections.deque(maxlen=size)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.samples.append(value)
+        self.count += 1
+        self.sum += value
+
+    def percentiles(self, quantiles=(50, 95, 99)):
+        if not self.samples:
+            return [0.0] * len(quantiles)
+        return list(np.percentile(np.fromiter(self.samples, dtype=float), quantiles))
+
+
+class Metrics:
+    """Process-wide registry of latency histograms and counters.
+
+    Finished traces are folded into ``<span>_seconds`` histograms, an
+    end-to-end latency histogram and a real-time factor histogram, and are
+    optionally appended to a JSONL trace file.
+    """
+
+    def __init__(self):
+        self.histograms = collections.defaultdict(Histogram)
+        self.counters = collections.defaultdict(float)
+        self.trace_file = None
+        self._lock = threading.Lock()
+
+    def observe(self, name, value):
+        with self._lock:
+            self.histograms[name].observe(value)
+
+    def increment(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def set(self, name, value):
+        with self._lock:
+            self.counters[name] = value
+
+    def finish(self, trace):
+        marks = trace.marks
+        spans = dict(trace.spans)
+        if "capture_end" in marks and "vad_close" in marks:
+            spans["vad_close"] = marks["vad_close"] - marks["capture_end"]
+        end_to_end = None
+        if "capture_end" in marks and "typed" in marks:
+            end_to_end = marks["typed"] - marks["capture_end"]
+
+        with self._lock:
+            for name, seconds in spans.items():
+                self.histograms[f"{name}_seconds"].observe(seconds)
+            if end_to_end is not None:
+                self.histograms["end_to_end_seconds"].observe(end_to_end)
+            processing = sum(spans.get(name, 0.0) for name in ("mel", "encode", "language", "decode"))
+            if trace.audio_seconds and processing:
+                self.histograms["real_time_factor"].observe(processing / trace.audio_seconds)
+            self.counters["utterances_total"] += 1
+            trace_file = self.trace_file
+
+        if trace_file:
+            record = {"time": marks.get("vad_close", time.time()), "audio_seconds": trace.audio_seconds,
+                      "end_to_end": end_to_end, "spans": spans}
+            with self._lock, open(trace_file, "a") as f:
+                f.write(json.dumps(record) + "\n")
+
+        for merged in trace.merged:
+            # Typed along with this one; its decode was counted here
+            if "typed" in marks:
+                merged.mark("typed", marks["typed"])
+            self.finish(merged)
+
+    def summary(self):
+        """Compact latency readout for the recording dialog."""
+        with self._lock:
+            latency = self.histograms.get("end_to_end_seconds")
+            rtf = self.histograms.get("real_time_factor")
+            if latency is None or not latency.samples:
+                return ""
+            p50, p95 = latency.percentiles((50, 95))
+            text = f"p50 {p50:.2f}s · p95 {p95:.2f}s"
+            if rtf is not None and rtf.samples:
+                text += f" · RTF {rtf.percentiles((50,))[0]:.2f}"
+            return text
+
+    def prometheus(self):
+        lines = []
+        with self._lock:
+            for name, value in sorted(self.counters.items()):
+                lines.append(f"# TYPE whisper_sst_{name} gauge")
+                lines.append(f"whisper_sst_{name} {value}")
+            for name, histogram in sorted(self.histograms.items()):
+                lines.append(f"# TYPE whisper_sst_{name} summary")
+                for quantile, value in zip(("0.5", "0.95", "0.99"), histogram.percentiles()):
+                    lines.append(f'whisper_sst_{name}{{quantile="{quantile}"}} {value}')
+                lines.append(f"whisper_sst_{name}_sum {histogram.sum}")
+                lines.append(f"whisper_sst_{name}_count {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+        body = metrics.prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port, host="127.0.0.1"):
+    """Serve ``/metrics`` in the Prometheus text format on a daemon thread."""
+    server = http.server.ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="MetricsServer", daemon=True).start()
+    print(f"Serving metrics on http://{host}:{port}/metrics")
+    return server
+
+
+metrics = Metrics()
@@ -0,0 +1,114 @@
+import collections
+import os
+import threading
+
+from PyQt5.QtCore import QThread, pyqtSignal
+from .engines import create_engine
+from ..utils.profiling import profiler
+
+# Used when the physical memory can't be read; large and small in fp32 fit
+DEFAULT_CACHE_MB = 8192
+
+
+def physical_memory():
+    """Total physical memory in bytes, or None where the platform doesn't report it."""
+    try:
+        return os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def cache_budget(megabytes=None):
+    """Memory budget in bytes: ``megabytes`` when set, else half of the physical memory."""
+    if megabytes is not None:
+        return megabytes * 1024 * 1024
+    total = physical_memory()
+    return total // 2 if total else DEFAULT_CACHE_MB * 1024 * 1024
+
+
+class ModelCache:
+    """LRU cache of loaded engines bounded by an estimated memory budget.
+
+    The most recently used engine is always kept, even if it alone exceeds
+    the budget.
+    """
+
+    def __init__(self, memory_budget):
+        self.memory_budget = memory_budget
+        self._engines = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            engine = self._engines.get(key)
+            if engine is not None:
+                self._engines.move_to_end(key)
+            return engine
+
+    def put(self, key, engine):
+        with self._lock:
+            self._engines[key] = engine
+            self._engines.move_to_end(key)
+            while len(self._engines) > 1 and self.memory_used() > self.memory_budget:
+                evicted_key, _ = self._engines.popitem(last=False)
+                print(f"Evicted {evicted_key} from the model cache")
+
+    def memory_used(self):
+        return sum(engine.memory_footprint() for engine in self._engines.values())
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._engines
+
+
+class ModelLoader(QThread):
+    """Loads and warms up engines in the background.
+
+    Only the newest request matters: if the model is changed again while a
+    load is in flight, the intermediate requests are skipped.
+    """
+    loaded = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    loading = pyqtSignal(str)
+
+    def __init__(self, memory_budget):
+        super().__init__()
+        self.cache = ModelCache(memory_budget)
+        self.running = True
+        self._request = None
+        self._condition = threading.Condition()
+
+    def request(self, backend, model_name, compute_type="default"):
+        with self._condition:
+            self._request = (backend, model_name, compute_type)
+            self._condition.notify_all()
+
+    def run(self):
+        while True:
+            with self._condition:
+                while self.running and self._request is None:
+                    self._condition.wait()
+                if not self.running:
+                    break
+                key, self._request = self._request, None
+
+            try:
+                engine = self.cache.get(key)
+                if engine is None:
+                    backend, model_name, compute_type = key
+                    self.loading.emit(f"Loading {model_name} ({backend})...")
+                    with profiler.phase("model load"):
+                        engine = create_engine(backend, model_name, compute_type=compute_type)
+                    with profiler.phase("model warm-up"):
+                        engine.warm_up()
+                    self.cache.put(key, engine)
+                self.loaded.emit(engine)
+            except Exception as e:
+                print(f"Model loading error: {str(e)}")
+                self.failed.emit(str(e))
+
+    def stop(self):
+        with self._condition:
+            self.running = False
+            self._condition.notify_all()
+        self.wait()
@@ -0,0 +1,548 @@
+import collections
+import multiprocessing
+import threading
+import time
+from multiprocessing import connection, shared_memory
+
+import numpy as np
+from PyQt5.QtCore import QThread, Qt, pyqtSignal
+from .engines import create_engine
+from .level_meter import LevelMeter
+from .metrics import metrics
+
+# How often the capture process reports levels and counters
+LEVEL_INTERVAL = 1 / 30
+COUNTER_INTERVAL = 1.0
+# Inference restarts wait this long, doubling after each failure in a row, up to MAX_RESTARTS
+RESTART_DELAY = 0.5
+MAX_RESTARTS = 5
+
+# Each process is started fresh rather than forked from a process that has
+# Qt, PortAudio or torch state
+_context = multiprocessing.get_context("spawn")
+
+
+class SharedSegmentRing:
+    """Utterance audio in shared memory, written by capture and read in place by inference.
+
+    Segments are stored contiguously (a segment that would wrap starts over
+    at the beginning instead), so the reader can use a plain numpy view of
+    the shared buffer without copying. The header holds the write position,
+    which only the capture process advances, and the read position, which
+    only the inference process advances once it is done with a segment, plus
+    a count of segments dropped because the ring was full. Positions are
+    monotonic sample counters, as in AudioRingBuffer.
+    """
+    HEADER = 3
+
+    def __init__(self, capacity, name=None):
+        self.capacity = int(capacity)
+        create = name is None
+        self._shm = shared_memory.SharedMemory(name=name, create=create, size=8 * self.HEADER + 4 * self.capacity)
+        self.name = self._shm.name
+        self._header = np.ndarray(self.HEADER, dtype=np.int64, buffer=self._shm.buf)
+        self._audio = np.ndarray(self.capacity, dtype=np.float32, buffer=self._shm.buf, offset=8 * self.HEADER)
+        if create:
+            self._header[:] = 0
+
+    @property
+    def dropped_segments(self):
+        return int(self._header[2])
+
+    def write(self, audio):
+        """Copy a segment in; returns its start position, or None if there is no room."""
+        frames = len(audio)
+        start = int(self._header[0])
+        index = start % self.capacity
+        if index + frames > self.capacity:
+            start += self.capacity - index
+            index = 0
+        if frames > self.capacity or start + frames - int(self._header[1]) > self.capacity:
+            self._header[2] += 1
+            return None
+
+        self._audio[index:index + frames] = audio
+        # Publish the position only after the samples are in place
+        self._header[0] = start + frames
+        return start
+
+    def view(self, start, frames):
+        index = start % self.capacity
+        return self._audio[index:index + frames]
+
+    def release(self, end):
+        self._header[1] = max(int(self._header[1]), end)
+
+    def close(self):
+        del self._header, self._audio
+        self._shm.close()
+
+    def unlink(self):
+        self._shm.unlink()
+
+
+def capture_main(conn, ring_name, ring_capacity, device, capture_format, vad_settings, chunking, stop_event):
+    """Capture process: runs RecordingThread's loop and hands segments over through the ring."""
+    from .recording_thread import RecordingThread
+    from .vad import create_vad
+
+    ring = SharedSegmentRing(ring_capacity, name=ring_name)
+    kind = vad_settings.pop("kind", "energy")
+    try:
+        vad = create_vad(kind, vad_settings.pop("model_path", None), **vad_settings)
+    except Exception as e:
+        conn.send(("error", f"Failed to load {kind} VAD, using energy VAD: {str(e)}"))
+        vad = create_vad("energy", **vad_settings)
+
+    thread = RecordingThread(device, vad=vad, capture_format=capture_format, **(chunking or {}))
+    send_lock = threading.Lock()
+
+    def send(message):
+        with send_lock:
+            conn.send(message)
+
+    def send_segment(audio, trace, overlap):
+        start = ring.write(audio)
+        if start is None:
+            send(("dropped", ring.dropped_segments))
+        else:
+            send(("segment", (start, len(audio), trace, overlap)))
+
+    def send_counters():
+        send(("counters", {"callback_overruns": thread.input_overflows,
+                           "callback_status_flags": thread.callback_status_count,
+                           "dropped_audio_frames": thread.ring_buffer.dropped_frames}))
+
+    # The thread's loop runs right here, so its signals are delivered directly
+    thread.finished.connect(send_segment, Qt.DirectConnection)
+    thread.status.connect(lambda status: send(("status", status)), Qt.DirectConnection)
+    thread.error.connect(lambda error: send(("error", error)), Qt.DirectConnection)
+
+    def report_until_stopped():
+        # Levels go out at the display rate rather than once per block
+        last_counters = time.time()
+        while not stop_event.wait(LEVEL_INTERVAL):
+            while conn.poll():
+                kind, payload = conn.recv()
+                if kind == "tune":
+                    thread.tune(*payload)
+            levels = thread.meter.read()
+            if levels:
+                send(("level", levels))
+            if time.time() - last_counters >= COUNTER_INTERVAL:
+                last_counters = time.time()
+                send_counters()
+        thread.running = False
+
+    threading.Thread(target=report_until_stopped, daemon=True).start()
+    try:
+        thread.run()
+        send_counters()
+    finally:
+        ring.close()
+        conn.close()
+
+
+def inference_main(conn, ring_name, ring_capacity, engine_spec, options):
+    """Inference process: decodes segments straight out of the shared ring."""
+    from .context_cache import ContextCache
+    from .language_cache import LanguageCache
+    from .transcription_worker import TranscriptionWorker
+
+    ring = SharedSegmentRing(ring_capacity, name=ring_name)
+    # Used synchronously for its decode logic; its thread is never started
+    worker = TranscriptionWorker(
+        None,
+        options.get("language", "auto"),
+        decode_profile=options.get("decode_profile", "fast"),
+        language_cache=LanguageCache(confirmations=options.get("language_confirmations", 3)),
+        context=ContextCache(
+            max_tokens=options.get("context_tokens", 96),
+            max_age=options.get("context_max_age", 60),
+            hotwords=options.get("hotwords", [])
+        )
+    )
+    worker.max_batch = options.get("batch_size", 4)
+
+    def load(spec):
+        try:
+            worker.set_engine(create_engine(*spec).warm_up())
+            conn.send(("loaded", spec))
+        except Exception as e:
+            conn.send(("load_failed", str(e)))
+
+    if engine_spec:
+        load(engine_spec)
+
+    messages = collections.deque()
+    try:
+        while True:
+            if not messages:
+                messages.append(conn.recv())
+            kind, payload = messages.popleft()
+            if kind == "stop":
+                break
+            elif kind == "engine":
+                load(payload)
+            elif kind == "configure":
+                options = dict(payload)
+                if "language" in options:
+                    worker.language = options.pop("language")
+                    worker.language_cache.reset()
+                    worker.context.clear()
+                try:
+                    worker.tune(**options)
+                except ValueError as e:
+                    print(f"Ignoring inference options: {e}")
+            elif kind == "segment":
+                # Segments that are already waiting are decoded as one batch
+                jobs = [payload]
+                while len(jobs) < worker.max_batch and not messages and conn.poll():
+                    message = conn.recv()
+                    if message[0] == "segment":
+                        jobs.append(message[1])
+                    else:
+                        messages.append(message)
+                _decode(conn, ring, worker, jobs)
+    except EOFError:
+        pass
+    finally:
+        ring.close()
+
+
+def _decode(conn, ring, worker, jobs):
+    if worker.engine is None:
+        for job_id, *_ in jobs:
+            conn.send(("failed", (job_id, "Model is not loaded")))
+        return
+
+    started = time.time()
+    try:
+        results = worker.transcribe_batch([ring.view(start, frames) for _, start, frames, *_ in jobs])
+    except Exception as e:
+        for job_id, *_ in jobs:
+            conn.send(("failed", (job_id, str(e))))
+        return
+    finally:
+        ring.release(max(start + frames for _, start, frames, *_ in jobs))
+
+    elapsed = time.time() - started
+    for (job_id, _, _, trace, submitted, overlap), result in zip(jobs, results):
+        if trace:
+            trace.span("queue_wait", started - submitted)
+            for name, seconds in (result["timings"] or {"decode": elapsed}).items():
+                trace.span(name, seconds)
+        result["trace"] = trace
+        result["text"] = worker.stitcher.add(result["text"], overlap)
+        worker.context.add(result["text"])
+        conn.send(("result", (job_id, result)))
+
+
+class ProcessPipeline(QThread):
+    """Runs capture and inference in their own processes and relays their output to Qt.
+
+    The capture process runs the normal RecordingThread loop, so its audio
+    callback never competes with inference or the GUI for the GIL. Segments
+    go into a SharedSegmentRing, and only their position travels over a
+    pipe. This thread forwards it to the inference process, which decodes
+    the samples in place and sends results back. Results and status come
+    out as signals, like the single-process classes, and levels through
+    ``meter``.
+
+    Inference is supervised. If its process dies (a crash or the OOM
+    killer), it is restarted with the current model. The utterance it was
+    working on, if its model had loaded, is given up, and the others still
+    waiting are sent to the new process. Restarts back off exponentially
+    from ``RESTART_DELAY``; after ``MAX_RESTARTS`` failures in a row without
+    a model loading, the pipeline gives up until another engine is chosen.
+    Capture keeps running throughout. All process management
+    happens on this thread; the public methods queue a command and wake it.
+    """
+    result_ready = pyqtSignal(object)
+    status = pyqtSignal(str)
+    error = pyqtSignal(str)
+    engine_loaded = pyqtSignal(object)
+    engine_failed = pyqtSignal(str)
+
+    def __init__(self, engine_spec=None, options=None, ring_seconds=300, capture_target=None,
+                 inference_target=None):
+        super().__init__()
+        self.engine_spec = engine_spec
+        self.options = dict(options or {})
+        self.capture_target = capture_target or capture_main
+        self.inference_target = inference_target or inference_main
+        self.ring = SharedSegmentRing(16000 * ring_seconds)
+        self.running = True
+        self.restarts = 0
+        self._failures = 0
+        self._restart_at = None
+        # Whether the current inference process loaded a model, and which jobs it was sent
+        self._inference_loaded = False
+        self._sent = set()
+        self.counters = {}
+        # Levels relayed from the capture process, for the display to poll
+        self.meter = LevelMeter()
+        self._commands = collections.deque()
+        self._wake_reader, self._wake_writer = _context.Pipe(duplex=False)
+        self._wake_lock = threading.Lock()
+        self._capture = None
+        self._capture_conn = None
+        self._capture_stop = None
+        self._inference = None
+        self._inference_conn = None
+        self._in_flight = collections.OrderedDict()
+        self._next_id = 0
+
+    # Called from the GUI thread
+
+    def start_capture(self, device, capture_format, vad_settings, chunking=None):
+        self._command("start_capture", (device, capture_format, dict(vad_settings), chunking))
+
+    def stop_capture(self):
+        self._command("stop_capture", None)
+
+    def set_engine(self, backend, model_name, compute_type="default"):
+        self._command("engine", (backend, model_name, compute_type))
+
+    def configure(self, **options):
+        """Changes the inference options (see ``TranscriptionWorker.tune``, plus ``language``)."""
+        self._command("configure", options)
+
+    def tune_capture(self, vad_settings=None, chunking=None):
+        """Applies new VAD thresholds and chunk sizes to the running capture process."""
+        self._command("tune_capture", (vad_settings, chunking))
+
+    def pending(self):
+        return len(self._in_flight)
+
+    def stop(self):
+        self.running = False
+        self._command("quit", None)
+        self.wait()
+
+    def _command(self, kind, payload):
+        with self._wake_lock:
+            self._commands.append((kind, payload))
+            self._wake_writer.send_bytes(b"")
+
+    # Pipeline thread
+
+    def run(self):
+        self._start_inference()
+        try:
+            while self.running:
+                waiting = [self._wake_reader]
+                waiting += [conn for conn in (self._capture_conn, self._inference_conn) if conn is not None]
+                for conn in connection.wait(waiting, timeout=0.5):
+                    if conn is self._wake_reader:
+                        conn.recv_bytes()
+                        self._handle_commands()
+                    else:
+                        self._drain(conn)
+                self._supervise()
+        finally:
+            self._stop_capture()
+            self._stop_inference()
+            self.ring.close()
+            self.ring.unlink()
+
+    def _drain(self, conn):
+        try:
+            while conn.poll():
+                kind, payload = conn.recv()
+                if conn is self._capture_conn:
+                    self._handle_capture(kind, payload)
+                else:
+                    self._handle_inference(kind, payload)
+        except (EOFError, OSError):
+            # The process is gone; _supervise deals with it
+            conn.close()
+            if conn is self._capture_conn:
+                self._capture_conn = None
+            else:
+                self._inference_conn = None
+
+    def _handle_commands(self):
+        while self._commands:
+            kind, payload = self._commands.popleft()
+            if kind == "start_capture":
+                self._start_capture(*payload)
+            elif kind == "stop_capture":
+                self._stop_capture()
+            elif kind == "engine":
+                self.engine_spec = payload
+                if self._inference is None and self._restart_at is None:
+                    # Inference was given up on; try again with this engine
+                    self._failures = 0
+                    self._start_inference()
+                    self._send_jobs()
+                else:
+                    self._send_inference(("engine", payload))
+            elif kind == "configure":
+                self.options.update(payload)
+                self._send_inference(("configure", payload))
+            elif kind == "tune_capture":
+                self._send_capture(("tune", payload))
+
+    def _handle_capture(self, kind, payload):
+        if kind == "segment":
+            start, frames, trace, overlap = payload
+            job = (self._next_id, start, frames, trace, time.time(), overlap)
+            self._next_id += 1
+            self._in_flight[job[0]] = job
+            self._send_job(job)
+        elif kind == "level":
+            rms, peak, _ = payload
+            self.meter.update(rms, peak)
+        elif kind == "status":
+            self.status.emit(payload)
+        elif kind == "error":
+            self.error.emit(payload)
+        elif kind == "dropped":
+            metrics.increment("dropped_utterances")
+            print("Inference is behind and the shared ring is full, dropped an utterance")
+        elif kind == "counters":
+            self.counters.update(payload)
+            for name, value in payload.items():
+                metrics.set(name, value)
+
+    def _handle_inference(self, kind, payload):
+        if kind == "result":
+            job_id, result = payload
+            self._in_flight.pop(job_id, None)
+            self._sent.discard(job_id)
+            self.result_ready.emit(result)
+        elif kind == "failed":
+            job_id, message = payload
+            self._in_flight.pop(job_id, None)
+            self._sent.discard(job_id)
+            self.error.emit(message)
+        elif kind == "loaded":
+            self._inference_loaded = True
+            self._failures = 0
+            self.engine_loaded.emit(payload)
+        elif kind == "load_failed":
+            self.engine_failed.emit(payload)
+
+    def _supervise(self):
+        if self._capture is not None and not self._capture.is_alive():
+            if self._capture_conn is not None:
+                self._drain(self._capture_conn)
+            if self._capture.exitcode:
+                self.error.emit(f"Capture process exited with code {self._capture.exitcode}")
+            self._close_capture()
+
+        if self.running and self._inference is not None and not self._inference.is_alive():
+            code = self._inference.exitcode
+            if self._inference_loaded:
+                # The oldest utterance it was sent was being decoded when it
+                # died; don't feed it to the next one
+                for job_id in self._in_flight:
+                    if job_id in self._sent:
+                        del self._in_flight[job_id]
+                        break
+            self._close_inference()
+            self._failures += 1
+            if self._failures > MAX_RESTARTS:
+                self._restart_at = None
+                self.error.emit(f"Inference process exited with code {code} {self._failures} times in a row, "
+                                f"giving up; choose a model to try again")
+                return
+            delay = RESTART_DELAY * 2 ** (self._failures - 1)
+            self._restart_at = time.monotonic() + delay
+            if self._failures == 1:
+                self.error.emit(f"Inference process exited with code {code}, restarting it")
+            else:
+                print(f"Inference process exited with code {code} again, restarting it in {delay:.1f} s")
+
+        if self.running and self._restart_at is not None and time.monotonic() >= self._restart_at:
+            self._restart_at = None
+            self.restarts += 1
+            metrics.increment("inference_restarts")
+            self._start_inference()
+            self._send_jobs()
+
+    def _send_jobs(self):
+        for job in self._in_flight.values():
+            self._send_job(job)
+
+    def _send_job(self, job):
+        if self._inference_conn is None:
+            return
+        self._send_inference(("segment", job))
+        self._sent.add(job[0])
+
+    def _start_capture(self, device, capture_format, vad_settings, chunking):
+        self._stop_capture()
+        self._capture_conn, child = _context.Pipe()
+        self._capture_stop = _context.Event()
+        self._capture = _context.Process(
+            target=self.capture_target,
+            args=(child, self.ring.name, self.ring.capacity, device, capture_format, vad_settings, chunking,
+                  self._capture_stop),
+            name="whisper-sst-capture",
+            daemon=True
+        )
+        self._capture.start()
+        child.close()
+
+    def _stop_capture(self):
+        if self._capture is None:
+            return
+        self._capture_stop.set()
+        self._capture.join(5)
+        if self._capture.is_alive():
+            self._capture.terminate()
+            self._capture.join()
+        if self._capture_conn is not None:
+            self._drain(self._capture_conn)
+        self._close_capture()
+
+    def _close_capture(self):
+        if self._capture_conn is not None:
+            self._capture_conn.close()
+        self._capture = self._capture_conn = self._capture_stop = None
+
+    def _start_inference(self):
+        self._inference_loaded = False
+        self._sent = set()
+        self._inference_conn, child = _context.Pipe()
+        self._inference = _context.Process(
+            target=self.inference_target,
+            args=(child, self.ring.name, self.ring.capacity, self.engine_spec, self.options),
+            name="whisper-sst-inference",
+            daemon=True
+        )
+        self._inference.start()
+        child.close()
+
+    def _stop_inference(self):
+        if self._inference is None:
+            return
+        self._send_inference(("stop", None))
+        self._inference.join(10)
+        if self._inference.is_alive():
+            self._inference.terminate()
+            self._inference.join()
+        self._close_inference()
+
+    def _close_inference(self):
+        if self._inference_conn is not None:
+            self._inference_conn.close()
+        self._inference = self._inference_conn = None
+
+    def _send_capture(self, message):
+        if self._capture_conn is None:
+            return
+        try:
+            self._capture_conn.send(message)
+        except (BrokenPipeError, OSError):
+            pass
+
+    def _send_inference(self, message):
+        if self._inference_conn is None:
+            return
+        try:
+            self._inference_conn.send(message)
+        except (BrokenPipeError, OSError):
+            pass  # picked up by _supervise
@@ -1,42 +1,87 @@
 import numpy as np
-import sounddevice as sd
-import wave
 import time
-import os
 from PyQt5.QtCore import QThread, pyqtSignal
+from ..utils.lazy import lazy_import
+from .level_meter import LevelMeter, block_levels
+from .resampler import PolyphaseResampler
+from .ring_buffer import AudioRingBuffer
+from .segmenter import SpeechSegmenter
+from .metrics import Trace, metrics
+
+sd = lazy_import("sounddevice")
+
+# Devices that report dozens of channels (e.g. PulseAudio's "default") are
+# opened in stereo; everything is downmixed to mono anyway
+MAX_CAPTURE_CHANNELS = 2
 
 class RecordingThread(QThread):
-    finished = pyqtSignal(object)
+    # audio, trace and the number of leading samples repeated from the previous long-form chunk
+    finished = pyqtSignal(object, object, int)
+    partial = pyqtSignal(object, int)
     error = pyqtSignal(str)
     status = pyqtSignal(str)
-    audio_level_updated = pyqtSignal(float)
 
-    def __init__(self, input_device):
+    def __init__(self, input_device, debug_sink=None, vad=None, capture_format=None, chunk_duration=None,
+                 chunk_overlap=1.0):
         super().__init__()
         self.input_device = input_device
+        # (samplerate, channels) to open the device with; queried when None
+        self.capture_format = capture_format
+        self.debug_sink = debug_sink
         self.running = True
-        self.silence_threshold = 0.02
+        self.samplerate = 16000
+        self.blocksize = 1024
         self.silence_duration = 1.0
+        self.max_utterance_duration = 120.0
+        # When set, the in-progress utterance is emitted through `partial`
+        # every `streaming_interval` seconds for streaming transcription.
+        self.streaming_interval = None
+        self.streaming_max_duration = 30.0
+        self._last_partial = 0
         self.stream = None
 
+        # The audio callback only copies into this preallocated ring; the
+        # resampling to 16 kHz mono, RMS and segmentation run on this thread
+        # as the consumer. The ring is resized once the capture format is known.
+        self.ring_buffer = AudioRingBuffer(self.samplerate * 10)
+        self.capture_rate = self.samplerate
+        self.capture_channels = 1
+        self.resampler = PolyphaseResampler(self.samplerate, self.samplerate)
+        self._capture_block = np.zeros(self.blocksize, dtype=np.float32)
+        self._pending = np.zeros(self.blocksize * 2 + 16, dtype=np.float32)
+        self._pending_length = 0
+        self.segmenter = SpeechSegmenter(
+            samplerate=self.samplerate,
+            vad=vad,
+            silence_duration=self.silence_duration,
+            max_duration=self.max_utterance_duration,
+            chunk_duration=chunk_duration,
+            chunk_overlap=chunk_overlap
+        )
+        self._block = np.zeros(self.blocksize, dtype=np.float32)
+        # Polled by the display on its own timer instead of a signal per block
+        self.meter = LevelMeter()
+        self.callback_status_count = 0
+        self.input_overflows = 0
+
     def run(self):
         try:
             self.status.emit("Listening...")
             print("Starting continuous audio capture...")
             
-            self.stream = sd.InputStream(
-                device=self.input_device,
-                samplerate=16000,
-                channels=1,
-                dtype="float32",
-                callback=self._audio_callback,  # Add callback
-                blocksize=1024  # Smaller blocksize for more frequent updates
-            )
-            self.stream.start()
-
-            # Keep thread alive while running
+            rate, channels = self.capture_format or self.query_capture_format()
+            try:
+                self._open_stream(rate, channels)
+            except Exception as e:
+                if (rate, channels) == (self.samplerate, 1):
+                    raise
+                print(f"Could not open the device at {rate} Hz x{channels} ({e}), trying 16 kHz mono")
+                self._open_stream(self.samplerate, 1)
+
+            # Drain the ring buffer while running
             while self.running:
-                time.sleep(0.1)  # Reduce CPU usage
+                if not self._consume():
+                    time.sleep(0.01)  # Reduce CPU usage
 
         except Exception as e:
             print(f"Recording error: {str(e)}")
@@ -46,68 +91,121 @@ class RecordingThread(QThread):
                 self.stream.stop()
                 self.stream.close()
 
+    def query_capture_format(self):
+        info = sd.query_devices(self.input_device, "input")
+        return int(info["default_samplerate"]), max(1, min(int(info["max_input_channels"]), MAX_CAPTURE_CHANNELS))
+
+    def _open_stream(self, rate, channels):
+        # Blocks cover the same ~64 ms at any rate
+        blocksize = round(self.blocksize * rate / self.samplerate)
+        if (rate, channels) != (self.capture_rate, self.capture_channels):
+            self.ring_buffer = AudioRingBuffer(rate * channels * 10)
+            self._capture_block = np.zeros(blocksize * channels, dtype=np.float32)
+        self.capture_rate = rate
+        self.capture_channels = channels
+        self.resampler = PolyphaseResampler(rate, self.samplerate, channels)
+        print(f"Capturing at {rate} Hz x{channels}")
+
+        self.stream = sd.InputStream(
+            device=self.input_device,
+            samplerate=rate,
+            channels=channels,
+            dtype="float32",
+            callback=self._audio_callback,
+            blocksize=blocksize
+        )
+        self.stream.start()
+
     def _audio_callback(self, indata, frames, time, status):
+        # Runs on the PortAudio thread: O(1) work, no allocations. indata is
+        # C-contiguous, so the interleaved frames are a view.
         if status:
-            print(status)
-        
-        # Calculate RMS value for better level visualization
-        audio_level = np.sqrt(np.mean(indata**2))
-        self.audio_level_updated.emit(audio_level)
-
-        # Store audio for speech detection
-        if not hasattr(self, 'audio_buffer'):
-            self.audio_buffer = []
-        
-        self.audio_buffer.append(indata.copy())
-        
-        # Check for speech and process
-        self._process_audio()
-
-    def _process_audio(self):
-        if not hasattr(self, 'audio_buffer'):
-            return
-
-        # Convert buffer to numpy array
-        audio = np.concatenate(self.audio_buffer)
-        audio_level = np.sqrt(np.mean(audio**2))
-
-        if audio_level > self.silence_threshold:
-            if not hasattr(self, 'recording_buffer'):
+            self.callback_status_count += 1
+            if status.input_overflow:
+                self.input_overflows += 1
+        self.ring_buffer.write(indata.reshape(-1))
+
+    def _consume(self):
+        consumed = False
+        while self.ring_buffer.available() >= len(self._capture_block):
+            self.ring_buffer.read_into(self._capture_block)
+            audio = self.resampler.process(self._capture_block.reshape(-1, self.capture_channels))
+            end = self._pending_length + len(audio)
+            self._pending[self._pending_length:end] = audio
+            self._pending_length = end
+
+            # The segmenter always sees 16 kHz blocks of `blocksize` samples
+            while self._pending_length >= self.blocksize:
+                self._block[:] = self._pending[:self.blocksize]
+                self._pending_length -= self.blocksize
+                self._pending[:self._pending_length] = self._pending[self.blocksize:self.blocksize + self._pending_length]
+                self._process_audio(self._block)
+            consumed = True
+        if consumed:
+            metrics.set("dropped_audio_frames", self.ring_buffer.dropped_frames // self.capture_channels)
+            metrics.set("callback_status_flags", self.callback_status_count)
+            metrics.set("callback_overruns", self.input_overflows)
+        return consumed
+
+    def _process_audio(self, block):
+        rms, peak = block_levels(block)
+        self.meter.update(rms, peak)
+        _, events = self.segmenter.feed(block, rms)
+
+        for event, audio in events:
+            if event == "speech_start":
                 print("Speech detected, starting recording.")
                 self.status.emit("Recording...")
-                self.recording_buffer = []
-            
-            self.recording_buffer.extend(self.audio_buffer)
-            self.last_voice_time = time.time()
-        elif hasattr(self, 'recording_buffer'):
-            if time.time() - self.last_voice_time >= self.silence_duration:
+                self._last_partial = 0
+            elif event == "segment":
                 print("Silence detected, processing...")
                 self.status.emit("Processing...")
-                audio = np.concatenate(self.recording_buffer)
-                self.process_and_emit(audio)
-                delattr(self, 'recording_buffer')
+                self.process_and_emit(audio, self.segmenter.segment_overlap)
+                self.status.emit("Listening...")
+                self._last_partial = 0
+            elif event == "chunk":
+                # Long-form mode: the speech goes on, and so does recording
+                print(f"Long-form chunk of {len(audio) / self.samplerate:.1f} s, processing...")
+                self.process_and_emit(audio, self.segmenter.segment_overlap, chunk=True)
+                self._last_partial = 0
+            elif event == "discard":
+                print("Too little speech, discarding.")
                 self.status.emit("Listening...")
+                self._last_partial = 0
+
+        if self.streaming_interval and self.segmenter.recording:
+            length = self.segmenter.length
+            if (length - self._last_partial >= self.streaming_interval * self.samplerate
+                    and length <= self.streaming_max_duration * self.samplerate):
+                self._last_partial = length
+                self.partial.emit(self.segmenter.current().copy(), self.segmenter.overlap_length)
+
+    def process_and_emit(self, audio, overlap=0, chunk=False):
+        if self.debug_sink:
+            self.debug_sink.submit(audio)
+
+        # The segment closed once the silence after the hangover ran out, so
+        # the last speech was captured roughly that long ago. A chunk is cut
+        # while speech is still coming in.
+        trace = Trace(len(audio) / self.samplerate)
+        trace.mark("vad_close")
+        trace.mark("capture_end", trace.marks["vad_close"]
+                   - (0 if chunk else self.segmenter.silence_duration - self.segmenter.hangover))
+        self.finished.emit(audio, trace, overlap)
+
+    def tune(self, vad_settings=None, chunking=None):
+        """Applies new VAD thresholds and long-form chunk sizes without reopening the stream.
 
-        # Clear the input buffer
-        self.audio_buffer = []
-
-    def process_and_emit(self, audio):
-        timestamp = time.strftime("%Y%m%d-%H%M%S")
-        debug_dir = "debug_audio"
-        if not os.path.exists(debug_dir):
-            os.makedirs(debug_dir)
-        
-        wav_path = os.path.join(debug_dir, f"recording_{timestamp}.wav")
-        audio_int16 = (audio * 32767).astype(np.int16)
-        
-        with wave.open(wav_path, 'wb') as wf:
-            wf.setnchannels(1)
-            wf.setsampwidth(2)
-            wf.setframerate(16000)
-            wf.writeframes(audio_int16.tobytes())
-        
-        print(f"Saved debug audio to: {wav_path}")
-        self.finished.emit((audio, wav_path))
+        ``vad_settings`` holds VAD attributes such as ``min_threshold``;
+        ``chunking`` the ``chunk_duration`` and ``chunk_overlap`` this thread
+        was created with. Chunk sizes only change in long-form mode.
+        """
+        vad = self.segmenter.vad
+        for name, value in (vad_settings or {}).items():
+            if hasattr(vad, name):
+                setattr(vad, name, value)
+        if chunking and self.segmenter.chunk_duration:
+            self.segmenter.set_chunking(chunking["chunk_duration"], chunking.get("chunk_overlap", 1.0))
 
     def stop(self):
         self.running = False
@@ -0,0 +1,104 @@
+import socket
+import threading
+import time
+
+from .engines import TranscriptionEngine
+from .server import encode_audio, parse_address, recv_message, send_message
+
+
+class RemoteEngine(TranscriptionEngine):
+    """Thin client for a TranscriptionServer, usable wherever a local engine is.
+
+    ``model_name`` is the server's address; once connected it is replaced
+    with the name of the model the server has loaded. Utterances are sent
+    whole with the caller's language, options and prompt, so language
+    caching and context keep working on this side. A batch is sent in one
+    go, so the server can decode it together. A dropped connection is
+    re-established once per call.
+    """
+    backend = "remote"
+
+    def __init__(self, model_name, device=None, compute_type="default"):
+        super().__init__(model_name, device="remote", compute_type=compute_type)
+        self.address = parse_address(model_name)
+        self.server_backend = None
+        self._sock = None
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def load(self):
+        with self._lock:
+            self._connect()
+        return self
+
+    def warm_up(self):
+        return self  # the server keeps its model warm
+
+    def memory_footprint(self):
+        return 0
+
+    def _connect(self):
+        if isinstance(self.address, str):
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        else:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.connect(self.address)
+        send_message(sock, {"type": "hello"})
+        message = recv_message(sock)
+        if message is None or message[0].get("type") != "ready":
+            sock.close()
+            raise ConnectionError(f"Unexpected reply from the server: {message and message[0]}")
+        info = message[0]
+        self.model_name = info["model"]
+        self.server_backend = info["backend"]
+        self.compute_type = info["compute_type"]
+        self._sock = sock
+
+    def close(self):
+        with self._lock:
+            if self._sock:
+                self._sock.close()
+                self._sock = None
+
+    def transcribe(self, audio, language=None, task="transcribe", temperature=0.0, best_of=None, beam_size=None,
+                   prompt=None):
+        return self.transcribe_batch([audio], language, task, temperature, best_of, beam_size, prompt)[0]
+
+    def transcribe_batch(self, audios, language=None, task="transcribe", temperature=0.0, best_of=None,
+                         beam_size=None, prompt=None):
+        options = {"temperature": temperature, "best_of": best_of, "beam_size": beam_size}
+        with self._lock:
+            try:
+                return self._request(audios, language, options, prompt)
+            except (ConnectionError, OSError):
+                print("Lost the connection to the transcription server, reconnecting")
+                if self._sock:
+                    self._sock.close()
+                self._connect()
+                return self._request(audios, language, options, prompt)
+
+    def _request(self, audios, language, options, prompt):
+        if self._sock is None:
+            self._connect()
+        ids = list(range(self._next_id, self._next_id + len(audios)))
+        self._next_id += len(audios)
+        started = time.time()
+        for job_id, audio in zip(ids, audios):
+            send_message(self._sock, {"type": "transcribe", "id": job_id, "language": language,
+                                      "options": options, "prompt": prompt}, encode_audio(audio))
+
+        results = {}
+        while len(results) < len(ids):
+            message = recv_message(self._sock)
+            if message is None:
+                raise ConnectionError("The transcription server closed the connection")
+            header = message[0]
+            if header.get("id") not in ids:
+                continue
+            if header["type"] == "error":
+                raise RuntimeError(f"Transcription server: {header['message']}")
+            # Time on the wire, in serialisation and in the kernel's buffers
+            header["timings"]["network"] = max(0.0, time.time() - started - header["server_seconds"])
+            results[header["id"]] = header
+        return [results[job_id] for job_id in ids]
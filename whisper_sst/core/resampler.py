@@ -0,0 +1,87 @@
+import math
+
+import numpy as np
+
+
+def design_filter(up, down, taps_per_phase, rolloff=0.94, beta=8.0):
+    """Kaiser-windowed sinc low-pass for resampling by ``up / down``, laid out per phase.
+
+    Returns an ``(up, taps_per_phase)`` array whose row ``p`` holds the taps
+    that produce an output landing on phase ``p`` of the upsampled grid,
+    ordered from the newest input sample to the oldest.
+    """
+    length = up * taps_per_phase
+    cutoff = rolloff * 0.5 / max(up, down)  # cycles per upsampled sample
+    t = np.arange(length) - (length - 1) / 2
+    taps = 2 * cutoff * np.sinc(2 * cutoff * t) * np.kaiser(length, beta)
+    taps *= up / taps.sum()  # unity gain once zero-stuffing is accounted for
+    # taps[p + k * up] multiplies x[i - k] for output phase p
+    return taps.reshape(taps_per_phase, up).T.astype(np.float32).copy()
+
+
+class PolyphaseResampler:
+    """Streaming downmix and rational-ratio resampler, e.g. 48 kHz stereo to 16 kHz mono.
+
+    ``process`` takes blocks of any length, shaped ``(frames, channels)`` or
+    1-D for mono, and returns the output samples they complete. The filter
+    history and the output phase carry across calls, so resampling a signal
+    in blocks gives the same result as resampling it in one go. Each block
+    is computed with one gather and one multiply-add over all outputs, with
+    no per-sample Python loop.
+    """
+
+    def __init__(self, in_rate, out_rate=16000, channels=1, zero_crossings=16):
+        g = math.gcd(int(in_rate), int(out_rate))
+        self.in_rate = int(in_rate)
+        self.out_rate = int(out_rate)
+        self.channels = channels
+        self.up = self.out_rate // g
+        self.down = self.in_rate // g
+        self.passthrough = self.up == 1 and self.down == 1
+        # The sinc spans ``zero_crossings`` lobes either side at the lower of the two rates
+        self.taps_per_phase = math.ceil(2 * zero_crossings * max(self.up, self.down) / self.up)
+        self.filters = design_filter(self.up, self.down, self.taps_per_phase)
+        self.reset()
+
+    @property
+    def delay(self):
+        """Group delay of the filter in output samples."""
+        if self.passthrough:
+            return 0.0
+        return (self.up * self.taps_per_phase - 1) / 2 / self.down
+
+    def reset(self):
+        self._history = np.zeros(self.taps_per_phase - 1, dtype=np.float32)
+        # Upsampled-grid position of the next output, relative to the first
+        # sample of the next block
+        self._position = 0
+        # x[i - k] sits at signal[i + taps - 1 - k] once the history is prepended
+        self._offsets = np.arange(self.taps_per_phase - 1, -1, -1)
+
+    def output_length(self, frames):
+        """Samples the next ``process`` call returns for a block of ``frames`` frames."""
+        if self.passthrough:
+            return frames
+        span = frames * self.up - self._position
+        return max(0, -(-span // self.down))
+
+    def process(self, block):
+        block = np.asarray(block, dtype=np.float32)
+        if block.ndim == 2:
+            mono = block[:, 0] if block.shape[1] == 1 else block.mean(axis=1, dtype=np.float32)
+        else:
+            mono = block
+        if self.passthrough:
+            return mono  # may be a view of the input
+
+        count = self.output_length(len(mono))
+        signal = np.concatenate([self._history, mono])
+        positions = self._position + np.arange(count) * self.down
+        index = positions // self.up
+        phase = positions % self.up
+        window = signal[index[:, None] + self._offsets[None, :]]
+        out = np.einsum("nk,nk->n", window, self.filters[phase])
+
+        self._position += count * self.down - len(mono) * self.up
+        self._history = signal[len(signal) - (self.taps_per_phase - 1):]
+        return out
@@ -0,0 +1,57 @@
+import numpy as np
+
+
+class AudioRingBuffer:
+    """Fixed-capacity float32 ring buffer for one producer and one consumer.
+
+    The audio callback only ever advances the write position and the consumer
+    only ever advances the read position, so neither side needs a lock.
+    Positions are monotonic frame counters; the storage index is taken modulo
+    the capacity.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = int(capacity)
+        self._buffer = np.zeros(self.capacity, dtype=np.float32)
+        self._write_pos = 0
+        self._read_pos = 0
+        self.dropped_frames = 0
+
+    def available(self):
+        return self._write_pos - self._read_pos
+
+    def free(self):
+        return self.capacity - self.available()
+
+    def write(self, data):
+        # Called from the audio callback: copies into preallocated storage and
+        # never allocates. If the consumer has fallen behind, the incoming
+        # block is dropped rather than overwriting unread audio.
+        frames = len(data)
+        if frames > self.free():
+            self.dropped_frames += frames
+            return False
+
+        start = self._write_pos % self.capacity
+        first = min(frames, self.capacity - start)
+        self._buffer[start:start + first] = data[:first]
+        if first < frames:
+            self._buffer[:frames - first] = data[first:]
+        self._write_pos += frames
+        return True
+
+    def read_into(self, out):
+        frames = min(len(out), self.available())
+        if frames == 0:
+            return 0
+
+        start = self._read_pos % self.capacity
+        first = min(frames, self.capacity - start)
+        out[:first] = self._buffer[start:start + first]
+        if first < frames:
+            out[first:frames] = self._buffer[:frames - first]
+        self._read_pos += frames
+        return frames
+
+    def clear(self):
+        self._read_pos = self._write_pos
@@ -0,0 +1,212 @@
+import numpy as np
+
+from .vad import EnergyVAD
+
+
+class SpeechSegmenter:
+    """Splits a stream of fixed-size blocks into speech segments.
+
+    Audio is accumulated into a preallocated buffer of ``max_duration``
+    seconds, so memory stays flat however long someone keeps talking. The
+    ``vad`` decides which blocks are speech. A segment closes after
+    ``silence_duration`` seconds without speech, or when the buffer is full.
+    Segments start ``pre_roll`` seconds before the first speech block, end
+    ``hangover`` seconds after the last one, and are discarded if they hold
+    less than ``min_speech`` seconds of speech.
+
+    With ``chunk_duration`` set (long-form mode), speech that goes on
+    without a long enough pause is cut into chunks of at most that many
+    seconds. A chunk is cut at the first pause between words once it is
+    longer than ``chunk_min``, or otherwise at the quietest block of the
+    last stretch before ``chunk_duration``. Each chunk is reported with a
+    ``chunk`` event, and the next one starts ``chunk_overlap`` seconds
+    before the cut, so a word split by the cut is heard whole at least once.
+    """
+
+    def __init__(self, samplerate=16000, vad=None, silence_duration=1.0, max_duration=120.0,
+                 pre_roll=0.3, hangover=0.2, min_speech=0.25, chunk_duration=None, chunk_overlap=1.0,
+                 pause_duration=0.2):
+        self.samplerate = samplerate
+        self.vad = vad or EnergyVAD()
+        self.silence_duration = silence_duration
+        self.hangover = hangover
+        self.min_speech = min_speech
+        self._buffer = np.zeros(int(max_duration * samplerate), dtype=np.float32)
+        self._history = np.zeros(int(pre_roll * samplerate), dtype=np.float32)
+        self._history_length = 0
+        self._length = 0
+        self._last_voice = 0
+        self._voiced = 0
+        self.position = 0
+        # Stream offset of the last segment taken, and of the one being recorded
+        self.segment_start = 0
+        self._recording_start = 0
+        self.recording = False
+
+        self.set_chunking(chunk_duration, chunk_overlap)
+        self.pause_duration = pause_duration
+        # Samples at the start of the buffer repeated from the previous chunk
+        self.overlap_length = 0
+        self.segment_overlap = 0
+        # RMS and end offset of each block in the buffer, to find quiet cut points
+        self._block_levels = None
+        self._block_ends = None
+        self._blocks = 0
+
+    def set_chunking(self, chunk_duration, chunk_overlap=1.0):
+        """Changes the long-form chunk length; takes effect from the next block."""
+        self.chunk_duration = chunk_duration
+        self.chunk_min = chunk_duration and max(chunk_duration / 2, chunk_duration - 10.0)
+        self.chunk_overlap = chunk_overlap
+
+    def feed(self, block, level=None):
+        """Process one block, returning ``(rms_level, events)``.
+
+        ``level`` is the block's RMS if the caller has already computed it.
+
+        ``events`` is a list of ``("speech_start", None)``,
+        ``("segment", audio)``, ``("chunk", audio)`` and ``("discard", None)``
+        tuples in the order they happened. After a ``segment`` or ``chunk``
+        event, ``segment_start`` is the stream offset of its first sample and
+        ``segment_overlap`` the number of its first samples that repeat the
+        end of the previous chunk.
+        """
+        if level is None:
+            level = float(np.sqrt(np.dot(block, block) / len(block)))
+        voiced = self.vad.is_speech(block, level)
+        events = []
+
+        if voiced and not self.recording:
+            self._start_recording()
+            events.append(("speech_start", None))
+
+        if not self.recording:
+            self._remember(block)
+            self.position += len(block)
+            return level, events
+
+        if self._length + len(block) > len(self._buffer):
+            # Buffer is full: flush what we have and keep recording
+            events.append(("segment", self._take(self._length)))
+            self.recording = True
+            self._recording_start = self.position
+
+        self._buffer[self._length:self._length + len(block)] = block
+        self._length += len(block)
+        self.position += len(block)
+        if voiced:
+            self._last_voice = self._length
+            self._voiced += len(block)
+
+        silence_samples = int(self.silence_duration * self.samplerate)
+        if self._length - self._last_voice >= silence_samples:
+            if self._voiced >= self.min_speech * self.samplerate:
+                events.append(("segment", self._take(self._end())))
+            else:
+                self._take(0)
+                events.append(("discard", None))
+        elif self.chunk_duration:
+            self._remember_level(level, len(block))
+            cut = self._chunk_cut()
+            if cut:
+                events.append(("chunk", self._take_chunk(cut)))
+
+        return level, events
+
+    @property
+    def length(self):
+        return self._length if self.recording else 0
+
+    def current(self):
+        """Return a view of the in-progress speech (valid until the next feed)."""
+        return self._buffer[:self._end() if self.recording else 0]
+
+    def flush(self):
+        """Return any in-progress speech as a segment, or None."""
+        if not self.recording or self._voiced < self.min_speech * self.samplerate:
+            self.recording = False
+            return None
+        return self._take(self._end())
+
+    def _remember_level(self, level, frames):
+        if self._block_levels is None:
+            blocks = len(self._buffer) // frames + 2
+            self._block_levels = np.zeros(blocks, dtype=np.float32)
+            self._block_ends = np.zeros(blocks, dtype=np.int64)
+        self._block_levels[self._blocks] = level
+        self._block_ends[self._blocks] = self._length
+        self._blocks += 1
+
+    def _chunk_cut(self):
+        """Where to end the current chunk, or None to keep going."""
+        rate = self.samplerate
+        if self._length >= self.chunk_min * rate and self._length - self._last_voice >= self.pause_duration * rate:
+            return self._length
+        if self._length >= self.chunk_duration * rate:
+            # No pause came; cut at the quietest block of the last stretch
+            search = (self.chunk_duration - self.chunk_min) * rate
+            start = int(np.searchsorted(self._block_ends[:self._blocks], self._length - search))
+            if start >= self._blocks:
+                return self._length
+            quietest = start + int(np.argmin(self._block_levels[start:self._blocks]))
+            return int(self._block_ends[quietest])
+        return None
+
+    def _take_chunk(self, cut):
+        audio = self._buffer[:cut].copy()
+        self.segment_start = self._recording_start
+        self.segment_overlap = self.overlap_length
+        # Carry the end of this chunk over as the start of the next one
+        keep = max(0, cut - int(self.chunk_overlap * self.samplerate))
+        remaining = self._length - keep
+        self._buffer[:remaining] = self._buffer[keep:self._length]
+        self._length = remaining
+        self._last_voice = max(0, self._last_voice - keep)
+        self._voiced = 0
+        self.overlap_length = cut - keep
+        self._recording_start += keep
+
+        kept = self._block_ends[:self._blocks] > keep
+        count = int(kept.sum())
+        self._block_levels[:count] = self._block_levels[:self._blocks][kept]
+        self._block_ends[:count] = self._block_ends[:self._blocks][kept] - keep
+        self._blocks = count
+        return audio
+
+    def _start_recording(self):
+        # Seed the buffer with the pre-roll so word onsets are not clipped
+        self.recording = True
+        self.overlap_length = 0
+        self._blocks = 0
+        self._length = self._history_length
+        self._buffer[:self._length] = self._history[len(self._history) - self._history_length:]
+        self._history_length = 0
+        self._last_voice = self._length
+        self._voiced = 0
+        self._recording_start = self.position - self._length
+
+    def _remember(self, block):
+        size = len(self._history)
+        if size == 0:
+            return
+        if len(block) >= size:
+            self._history[:] = block[-size:]
+        else:
+            self._history[:-len(block)] = self._history[len(block):]
+            self._history[-len(block):] = block
+        self._history_length = min(self._history_length + len(block), size)
+
+    def _end(self):
+        return min(self._length, self._last_voice + int(self.hangover * self.samplerate))
+
+    def _take(self, length):
+        audio = self._buffer[:length].copy()
+        self.segment_start = self._recording_start
+        self.segment_overlap = self.overlap_length
+        self.overlap_length = 0
+        self._blocks = 0
+        self._length = 0
+        self._last_voice = 0
+        self._voiced = 0
+        self.recording = False
+        return audio
@@ -0,0 +1,399 @@
+import collections
+import json
+import os
+import socket
+import socketserver
+import struct
+import threading
+import time
+
+import numpy as np
+from .engines import DECODE_PROFILES
+from .metrics import metrics
+from .segmenter import SpeechSegmenter
+from .vad import EnergyVAD
+
+SAMPLERATE = 16000
+DEFAULT_PORT = 8765
+
+# Wire format: a 4-byte big-endian header length, a JSON header, then
+# header["bytes"] bytes of payload. Audio payloads are 16 kHz mono
+# little-endian float32.
+
+# Larger frames are refused before anything is allocated for them
+MAX_HEADER_BYTES = 64 * 1024
+MAX_PAYLOAD_BYTES = 16 * 1024 * 1024  # about 260 s of audio
+
+
+def send_message(sock, header, payload=b""):
+    data = json.dumps(dict(header, bytes=len(payload))).encode()
+    sock.sendall(struct.pack("!I", len(data)) + data + payload)
+
+
+def recv_message(sock):
+    """Next ``(header, payload)`` from the socket, or None once the peer has closed it.
+
+    Raises ValueError for a malformed or oversized frame; the connection
+    can't be trusted to be in step after that and should be closed.
+    """
+    size = _recv_exactly(sock, 4)
+    if size is None:
+        return None
+    size = struct.unpack("!I", size)[0]
+    if size > MAX_HEADER_BYTES:
+        raise ValueError(f"Message header of {size} bytes is over the limit of {MAX_HEADER_BYTES}")
+    data = _recv_exactly(sock, size)
+    if data is None:
+        raise ConnectionError("Connection closed mid-message")
+    header = json.loads(data)
+    if not isinstance(header, dict):
+        raise ValueError("Message header is not a JSON object")
+    length = header.get("bytes") or 0
+    if not isinstance(length, int) or not 0 <= length <= MAX_PAYLOAD_BYTES:
+        raise ValueError(f"Message payload of {length!r} bytes is over the limit of {MAX_PAYLOAD_BYTES}")
+    payload = _recv_exactly(sock, length) if length else b""
+    if payload is None:
+        raise ConnectionError("Connection closed mid-message")
+    return header, payload
+
+
+def _recv_exactly(sock, size):
+    data = bytearray(size)
+    view = memoryview(data)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:])
+        if count == 0:
+            if received:
+                raise ConnectionError("Connection closed mid-message")
+            return None
+        received += count
+    return bytes(data)
+
+
+def encode_audio(audio):
+    return np.asarray(audio, dtype="<f4").tobytes()
+
+
+def decode_audio(payload):
+    return np.frombuffer(payload, dtype="<f4").astype(np.float32)
+
+
+def parse_address(address):
+    """``"host:port"``, ``":port"`` or a Unix socket path."""
+    if isinstance(address, tuple) or "/" in address:
+        return address
+    host, _, port = address.rpartition(":")
+    return host or "127.0.0.1", int(port or DEFAULT_PORT)
+
+
+class ServerJob:
+    def __init__(self, session, job_id, audio, language, options, prompt, start=None):
+        self.session = session
+        self.id = job_id
+        self.audio = audio
+        self.language = language
+        self.options = options
+        self.prompt = prompt
+        self.start = start
+        self.submitted = time.time()
+
+    def key(self):
+        # Jobs can share a decode when the engine would treat them the same
+        return self.language, json.dumps(self.options, sort_keys=True), json.dumps(self.prompt)
+
+
+class FairScheduler:
+    """Per-client job queues served round-robin, so one busy client can't starve the others.
+
+    ``next_batch`` starts with the oldest job of the client whose turn it
+    is, then adds jobs with the same decode settings from the following
+    clients, one per client per pass, up to ``max_batch``. Clients that got
+    a job in go to the back of the rotation. When the batch isn't full it
+    waits up to ``batch_window`` seconds for more work.
+    """
+
+    def __init__(self, max_batch=8, batch_window=0.01, max_pending=16):
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self.max_pending = max_pending
+        self.running = True
+        self._queues = collections.OrderedDict()
+        self._condition = threading.Condition()
+
+    def submit(self, job):
+        """Queue a job; returns False if its client already has ``max_pending`` jobs waiting."""
+        with self._condition:
+            queue = self._queues.setdefault(job.session, collections.deque())
+            if not self.running or len(queue) >= self.max_pending:
+                return False
+            queue.append(job)
+            self._condition.notify_all()
+            return True
+
+    def remove(self, session):
+        with self._condition:
+            self._queues.pop(session, None)
+
+    def pending(self):
+        with self._condition:
+            return sum(len(queue) for queue in self._queues.values())
+
+    def next_batch(self):
+        with self._condition:
+            while self.running and not any(self._queues.values()):
+                self._condition.wait()
+            if not self.running:
+                return []
+
+            batch = self._take(None)
+            deadline = time.time() + self.batch_window
+            while self.running and len(batch) < self.max_batch:
+                more = self._take(batch[0].key(), self.max_batch - len(batch))
+                batch += more
+                remaining = deadline - time.time()
+                if not more and remaining <= 0:
+                    break
+                if not more:
+                    self._condition.wait(remaining)
+            return batch
+
+    def _take(self, key, limit=1):
+        # Called with the lock held: one matching job per client in rotation order
+        batch = []
+        for session in list(self._queues):
+            queue = self._queues[session]
+            if len(batch) >= limit:
+                break
+            if queue and (key is None or queue[0].key() == key):
+                batch.append(queue.popleft())
+                self._queues.move_to_end(session)
+        return batch
+
+    def stop(self):
+        with self._condition:
+            self.running = False
+            self._condition.notify_all()
+
+
+class ClientSession:
+    """One connected client: its socket, server-side segmentation and outstanding jobs."""
+
+    def __init__(self, sock, server, language="auto", decode_profile="fast"):
+        self.sock = sock
+        self.server = server
+        self.language = language
+        self.decode_profile = decode_profile
+        self.segmenter = None
+        self.outstanding = 0
+        self._next_id = 0
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._condition = threading.Condition()
+
+    def send(self, header):
+        with self._condition:
+            try:
+                send_message(self.sock, header)
+            except OSError:
+                pass  # the client went away; its handler cleans up
+            if header["type"] in ("result", "error") and header.get("id") is not None:
+                self.outstanding -= 1
+                self._condition.notify_all()
+
+    def wait_idle(self, timeout=None):
+        with self._condition:
+            return self._condition.wait_for(lambda: self.outstanding <= 0, timeout)
+
+    def submit(self, audio, job_id=None, language=None, options=None, prompt=None, start=None):
+        if job_id is None:
+            job_id = self._next_id
+            self._next_id += 1
+        if options is None:
+            language = None if self.language == "auto" else self.language
+            options = dict(DECODE_PROFILES[self.decode_profile])
+        with self._condition:
+            self.outstanding += 1
+        if not self.server.scheduler.submit(ServerJob(self, job_id, audio, language, options, prompt, start)):
+            metrics.increment("server_rejected_jobs")
+            self.send({"type": "error", "id": job_id, "message": "Too many requests waiting"})
+
+    def feed(self, audio):
+        """Segment streamed audio with the VAD, submitting each utterance as it closes."""
+        if self.segmenter is None:
+            self.segmenter = SpeechSegmenter(SAMPLERATE, EnergyVAD(), max_duration=30.0)
+        audio = np.concatenate([self._pending, audio])
+        blocks = len(audio) // 1024
+        for block in audio[:blocks * 1024].reshape(-1, 1024):
+            _, events = self.segmenter.feed(block)
+            for event, segment in events:
+                if event == "segment":
+                    self.submit(segment, start=self.segmenter.segment_start / SAMPLERATE)
+        self._pending = audio[blocks * 1024:]
+
+    def flush(self):
+        if self.segmenter is None:
+            return
+        segment = self.segmenter.flush()
+        if segment is not None:
+            self.submit(segment, start=self.segmenter.segment_start / SAMPLERATE)
+        self._pending = np.zeros(0, dtype=np.float32)
+
+
+class _SessionHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        server = self.server.transcription_server
+        if self.request.family == socket.AF_INET:
+            # Results are small; don't hold them back waiting for an ACK
+            self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        session = ClientSession(self.request, server, server.language, server.decode_profile)
+        server.sessions.add(session)
+        try:
+            while True:
+                message = recv_message(self.request)
+                if message is None:
+                    break
+                header, payload = message
+                kind = header.get("type")
+                if kind == "hello":
+                    session.language = header.get("language", session.language)
+                    session.decode_profile = header.get("decode_profile", session.decode_profile)
+                    if session.decode_profile not in DECODE_PROFILES:
+                        session.send({"type": "error", "message": f"Unknown decode profile: {session.decode_profile}"})
+                        break
+                    session.send({"type": "ready", **server.describe()})
+                elif kind == "transcribe":
+                    # A whole utterance, decoded with the client's own options
+                    options = header.get("options")
+                    if options and isinstance(options.get("temperature"), list):
+                        options["temperature"] = tuple(options["temperature"])
+                    session.submit(decode_audio(payload), header.get("id"), header.get("language"),
+                                   options, header.get("prompt"))
+                elif kind == "audio":
+                    session.feed(decode_audio(payload))
+                elif kind == "flush":
+                    session.flush()
+                elif kind == "bye":
+                    session.flush()
+                    session.wait_idle(60)
+                    break
+                else:
+                    session.send({"type": "error", "message": f"Unknown message type: {kind}"})
+        except (ConnectionError, OSError, ValueError) as e:
+            print(f"Client {self.client_address or 'local'} disconnected: {e}")
+        finally:
+            server.scheduler.remove(session)
+            server.sessions.discard(session)
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+if hasattr(socketserver, "ThreadingUnixStreamServer"):
+    class _UnixServer(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+
+
+class TranscriptionServer:
+    """Serves one loaded engine to any number of local clients.
+
+    Clients either send whole utterances (``transcribe``, with their own
+    language, decoding options and prompt, which is what RemoteEngine does)
+    or stream raw audio (``audio``) that the server segments with an energy
+    VAD and decodes with the session's ``language`` and ``decode_profile``.
+    A single decode thread takes batches from a FairScheduler. Each result
+    carries its ``timings``: time spent waiting in the server queue, the
+    engine's own spans and the total time in the server.
+    """
+
+    def __init__(self, engine, language="auto", decode_profile="fast", max_batch=8, batch_window=0.01,
+                 max_pending=16):
+        self.engine = engine
+        self.language = language
+        self.decode_profile = decode_profile
+        self.scheduler = FairScheduler(max_batch, batch_window, max_pending)
+        self.sessions = set()
+        self._server = None
+        self._decoder = None
+
+    def describe(self):
+        return {"model": self.engine.model_name, "backend": self.engine.backend,
+                "compute_type": self.engine.compute_type}
+
+    def start(self, address):
+        """Listen on ``address`` (see ``parse_address``) and start decoding; returns the bound address."""
+        address = parse_address(address)
+        if isinstance(address, str):
+            if os.path.exists(address):
+                os.unlink(address)  # left behind by a previous run
+            self._server = _UnixServer(address, _SessionHandler)
+        else:
+            self._server = _TCPServer(address, _SessionHandler)
+        self._server.transcription_server = self
+        self._decoder = threading.Thread(target=self._decode_loop, name="ServerDecoder", daemon=True)
+        self._decoder.start()
+        threading.Thread(target=self._server.serve_forever, name="ServerAccept", daemon=True).start()
+        return self._server.server_address
+
+    def stop(self):
+        self.scheduler.stop()
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+        for session in list(self.sessions):
+            try:
+                session.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        if self._decoder:
+            self._decoder.join()
+
+    def _decode_loop(self):
+        while True:
+            jobs = self.scheduler.next_batch()
+            if not jobs:
+                break
+            first = jobs[0]
+            started = time.time()
+            try:
+                results = self.engine.transcribe_batch(
+                    [job.audio for job in jobs],
+                    language=first.language,
+                    task="transcribe",
+                    prompt=first.prompt,
+                    **first.options
+                )
+            except Exception as e:
+                print(f"Transcription error: {str(e)}")
+                for job in jobs:
+                    job.session.send({"type": "error", "id": job.id, "message": str(e)})
+                continue
+
+            finished = time.time()
+            metrics.observe("server_batch_size", len(jobs))
+            metrics.increment("server_audio_seconds", sum(len(job.audio) for job in jobs) / SAMPLERATE)
+            for job, result in zip(jobs, results):
+                timings = {"server_queue_wait": started - job.submitted}
+                timings.update(result.get("timings") or {"decode": finished - started})
+                job.session.send({
+                    "type": "result",
+                    "id": job.id,
+                    "text": result["text"],
+                    "language": result.get("language") or first.language,
+                    "language_probability": _number(result.get("language_probability")),
+                    "avg_logprob": _number(result.get("avg_logprob")),
+                    "fallbacks": int(result.get("fallbacks") or 0),
+                    "segments": [{"start": float(s["start"]), "end": float(s["end"]), "text": s["text"]}
+                                 for s in result.get("segments") or []],
+                    "start": job.start,
+                    "audio_seconds": len(job.audio) / SAMPLERATE,
+                    "batch_size": len(jobs),
+                    "timings": timings,
+                    "server_seconds": finished - job.submitted
+                })
+
+
+def _number(value):
+    # Engines may hand back numpy scalars, which json can't encode
+    return None if value is None else float(value)
@@ -0,0 +1,269 @@
+import time
+
+from .engines import WhisperEngine
+from .metrics import metrics
+
+
+class SpeculativeWhisperEngine(WhisperEngine):
+    """Greedy openai-whisper decoding sped up by a small draft model.
+
+    The model name is ``"<target>+<draft>"``, e.g. ``"large+base"``. For each
+    step the draft model proposes ``draft_tokens`` tokens greedily, and the
+    target model scores all of them in one decoder pass. Proposals are kept
+    up to the first one the target disagrees with, where the target's own
+    token is used instead. Every emitted token is the target's argmax, so the
+    text matches plain greedy decoding with the target (up to floating-point
+    ties); the draft only changes how many target passes that takes.
+
+    Both models must be multilingual (or both English-only) so their text
+    tokens line up. Temperature, best_of and beam_size are ignored: this is greedy only.
+    """
+    backend = "whisper"
+
+    def __init__(self, model_name, device=None, compute_type="default", draft_tokens=6, threads=None):
+        super().__init__(model_name, device=device, compute_type=compute_type, threads=threads)
+        self.target_name, self.draft_name = model_name.split("+")
+        self.draft_tokens = draft_tokens
+        self.draft = None
+
+    def load(self):
+        import whisper
+        if self.threads:
+            import torch
+            torch.set_num_threads(self.threads)
+        self.model = whisper.load_model(self.target_name, device=self.device)
+        self.draft = whisper.load_model(self.draft_name, device=self.device)
+        if self.model.is_multilingual != self.draft.is_multilingual:
+            raise ValueError("The draft and target models must both be multilingual or both English-only")
+        return self
+
+    def memory_footprint(self):
+        return sum(p.numel() * p.element_size()
+                   for model in (self.model, self.draft) for p in model.parameters())
+
+    def transcribe(self, audio, language=None, task="transcribe", temperature=0.0, best_of=None, beam_size=None,
+                   prompt=None):
+        import whisper
+
+        if isinstance(prompt, str):
+            prompt = self.tokenize(prompt)
+
+        texts = []
+        detected = language
+        probability = None
+        for offset in range(0, max(len(audio), 1), whisper.audio.N_SAMPLES):
+            window = audio[offset:offset + whisper.audio.N_SAMPLES]
+            # Later windows are conditioned on the previous one, like transcribe()
+            text, detected, window_probability, prompt = self._decode_window(window, detected, task, prompt)
+            probability = probability or window_probability
+            texts.append(text)
+
+        text = " ".join(t for t in texts if t)
+        duration = len(audio) / whisper.audio.SAMPLE_RATE
+        return {
+            "text": text,
+            "language": detected,
+            "language_probability": probability,
+            "fallbacks": 0,
+            "segments": [{"start": 0.0, "end": duration, "text": text}]
+        }
+
+    def transcribe_batch(self, audios, language=None, task="transcribe", temperature=0.0, best_of=None,
+                         beam_size=None, prompt=None):
+        # Verification works one sequence at a time
+        return [self.transcribe(audio, language=language, task=task, prompt=prompt) for audio in audios]
+
+    def _decode_window(self, audio, language, task, prompt):
+        import torch
+        import whisper
+        from whisper.tokenizer import get_tokenizer
+
+        fp16 = self.device == "cuda"
+        target, draft = self.model, self.draft
+
+        with torch.no_grad():
+            features = {}
+            for model in (target, draft):
+                mel = whisper.log_mel_spectrogram(whisper.pad_or_trim(audio), n_mels=model.dims.n_mels)
+                mel = mel.unsqueeze(0).to(model.device)
+                features[model] = model.embed_audio(mel.half() if fp16 else mel)
+
+            probability = None
+            if language is None:
+                if target.is_multilingual:
+                    _, probs = target.detect_language(features[target])
+                    language = max(probs[0], key=probs[0].get)
+                    probability = probs[0][language]
+                else:
+                    language = "en"
+
+            tokenizers = {
+                model: get_tokenizer(model.is_multilingual, num_languages=model.num_languages,
+                                     language=language, task=task)
+                for model in (target, draft)
+            }
+            started = time.perf_counter()
+            tokens, target_passes, proposed, accepted = self._generate(features, tokenizers, prompt)
+            elapsed = time.perf_counter() - started
+
+        if proposed:
+            metrics.observe("draft_acceptance_rate", accepted / proposed)
+        if target_passes:
+            # Each target pass would have produced a single token without the draft
+            metrics.observe("speculative_speedup", len(tokens) / target_passes)
+        metrics.observe("speculative_decode_seconds", elapsed)
+
+        text = tokenizers[target].decode(tokens).strip()
+        return text, language, probability, tokens
+
+    def _generate(self, features, tokenizers, prompt_tokens=None):
+        import torch
+
+        target, draft = self.model, self.draft
+        eot = tokenizers[target].eot
+        sample_len = target.dims.n_text_ctx // 2
+        decoders = {model: CachedDecoder(model, features[model]) for model in (target, draft)}
+
+        def suppressed(model, first):
+            tokenizer = tokenizers[model]
+            ids = set(tokenizer.non_speech_tokens)
+            ids.update([tokenizer.transcribe, tokenizer.translate, tokenizer.sot,
+                        tokenizer.sot_prev, tokenizer.sot_lm, tokenizer.no_speech])
+            if first:
+                # Same as whisper's SuppressBlank at the start of the sample
+                ids.update(tokenizer.encode(" ") + [tokenizer.eot])
+            return torch.tensor(sorted(ids), device=model.device)
+
+        suppress = {(model, first): suppressed(model, first) for model in (target, draft) for first in (True, False)}
+
+        def forward(model, new_tokens, position):
+            # The logits of the first new token predict sample index
+            # `position`, the next one position + 1, and so on
+            logits = decoders[model].forward(new_tokens)
+            for i in range(len(new_tokens)):
+                logits[i, suppress[(model, position + i == 0)]] = -float("inf")
+            return logits
+
+        # Text tokens are shared, so both models see the same prompt
+        context = list(prompt_tokens or [])[-(sample_len - 1):]
+        prefixes = {model: ([tokenizers[model].sot_prev] + context if context else [])
+                    + list(tokenizers[model].sot_sequence_including_notimestamps)
+                    for model in (target, draft)}
+        prompt = prefixes[target]
+        next_token = int(forward(target, prompt, 1 - len(prompt))[-1].argmax())
+        target_passes = 1
+
+        generated = []
+        proposed = accepted = 0
+        while next_token != eot and len(generated) < sample_len:
+            generated.append(next_token)
+
+            # The draft proposes greedily after everything accepted so far
+            sequence = prefixes[draft] + generated
+            draft_input = sequence[decoders[draft].length:]
+            position = len(generated) - len(draft_input) + 1
+            drafts = []
+            for _ in range(min(self.draft_tokens, sample_len - len(generated))):
+                token = int(forward(draft, draft_input, position)[-1].argmax())
+                position += len(draft_input)
+                if token > eot:
+                    break  # timestamps and special tokens differ between vocabularies
+                drafts.append(token)
+                if token == eot:
+                    break
+                draft_input = [token]
+
+            # The target scores next_token and every proposal in one pass
+            logits = forward(target, [next_token] + drafts, len(generated))
+            target_passes += 1
+            predictions = [int(token) for token in logits.argmax(dim=-1)]
+
+            matched = 0
+            while matched < len(drafts) and drafts[matched] == predictions[matched]:
+                matched += 1
+            proposed += len(drafts)
+            accepted += matched
+            generated.extend(drafts[:matched])
+            next_token = predictions[matched]
+            if eot in generated:
+                generated = generated[:generated.index(eot)]
+                break
+
+            # Roll both caches back to the accepted sequence
+            decoders[target].truncate(len(prompt) + len(generated))
+            decoders[draft].truncate(len(sequence) + matched)
+
+        return [t for t in generated if t < eot], target_passes, proposed, accepted
+
+
+class CachedDecoder:
+    """Runs a whisper TextDecoder incrementally over several new tokens at a time.
+
+    openai-whisper's own kv-cache path only supports one new token per call
+    once the cache is filled, because its causal mask assumes the query and
+    key lengths match. This reuses the model's layers with a mask offset by
+    the cached length, and keeps the self-attention cache in a form that can
+    be truncated after a rejected proposal.
+    """
+
+    def __init__(self, model, audio_features):
+        import torch
+
+        self.decoder = model.decoder
+        self.audio_features = audio_features
+        self.length = 0
+        self._self_cache = [None] * len(self.decoder.blocks)
+        with torch.no_grad():
+            self._cross_cache = [
+                {block.cross_attn.key: block.cross_attn.key(audio_features),
+                 block.cross_attn.value: block.cross_attn.value(audio_features)}
+                for block in self.decoder.blocks
+            ]
+
+    def forward(self, tokens):
+        import torch
+
+        decoder = self.decoder
+        n = len(tokens)
+        with torch.no_grad():
+            tokens = torch.tensor([tokens], device=decoder.token_embedding.weight.device)
+            x = decoder.token_embedding(tokens) + decoder.positional_embedding[self.length:self.length + n]
+            x = x.to(self._cross_cache[0][decoder.blocks[0].cross_attn.key].dtype)
+
+            # Query i sits at position length + i and may see keys up to there
+            mask = torch.full((n, self.length + n), float("-inf"), device=x.device).triu(self.length + 1)
+
+            for i, block in enumerate(decoder.blocks):
+                x = x + self._self_attention(i, block.attn, block.attn_ln(x), mask)
+                x = x + block.cross_attn(block.cross_attn_ln(x), self.audio_features, kv_cache=self._cross_cache[i])[0]
+                x = x + block.mlp(block.mlp_ln(x))
+
+            x = decoder.ln(x)
+            logits = (x @ torch.transpose(decoder.token_embedding.weight.to(x.dtype), 0, 1)).float()
+        self.length += n
+        return logits[0]
+
+    def truncate(self, length):
+        length = min(length, self.length)
+        self._self_cache = [(k[:, :length], v[:, :length]) for k, v in self._self_cache]
+        self.length = length
+
+    def _self_attention(self, index, attn, x, mask):
+        import torch
+
+        q, k, v = attn.query(x), attn.key(x), attn.value(x)
+        if self._self_cache[index] is not None:
+            cached_k, cached_v = self._self_cache[index]
+            k = torch.cat([cached_k, k], dim=1)
+            v = torch.cat([cached_v, v], dim=1)
+        self._self_cache[index] = (k, v)
+
+        n_batch, n_ctx, n_state = q.shape
+        scale = (n_state // attn.n_head) ** -0.25
+        q = q.view(n_batch, n_ctx, attn.n_head, -1).permute(0, 2, 1, 3)
+        k = k.view(n_batch, k.shape[1], attn.n_head, -1).permute(0, 2, 1, 3)
+        v = v.view(n_batch, v.shape[1], attn.n_head, -1).permute(0, 2, 1, 3)
+        qk = ((q * scale) @ (k * scale).transpose(-1, -2)).float() + mask
+        w = torch.softmax(qk, dim=-1).to(q.dtype)
+        out = (w @ v).permute(0, 2, 1, 3).flatten(start_dim=2)
+        return attn.out(out)
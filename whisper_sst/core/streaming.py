@@ -0,0 +1,123 @@
+import difflib
+import string
+
+
+def _normalize(word):
+    return word.strip(string.punctuation + "¿¡।").lower()
+
+
+class LocalAgreement:
+    """Commits the prefix that consecutive partial hypotheses agree on.
+
+    Each partial decode covers the whole utterance so far. A word is only
+    committed once two decodes in a row produce the same words up to and
+    including it, so text that is still changing is never typed.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.committed = []
+        self._previous = []
+
+    def update(self, text):
+        """Feed a partial hypothesis and return the newly committed words."""
+        words = text.split()
+        agreed = 0
+        for previous, current in zip(self._previous, words):
+            if _normalize(previous) != _normalize(current):
+                break
+            agreed += 1
+        self._previous = words
+
+        if agreed <= len(self.committed):
+            return []
+        new_words = words[len(self.committed):agreed]
+        self.committed.extend(new_words)
+        return new_words
+
+    def finalize(self, text):
+        """Return the words of the final hypothesis not committed yet and reset.
+
+        The final decode may word the committed part differently, so the
+        committed words are aligned against its start rather than counted
+        off: the cut goes after the last committed word it matches, plus
+        the committed words after that match.
+        """
+        words = text.split()
+        committed = [_normalize(word) for word in self.committed]
+        self.reset()
+        if not committed:
+            return words
+        # A few words of slack for words the final splits or adds
+        head = [_normalize(word) for word in words[:len(committed) + 3]]
+        blocks = [block for block in difflib.SequenceMatcher(None, committed, head, autojunk=False)
+                  .get_matching_blocks() if block.size]
+        if not blocks:
+            return words[len(committed):]
+        last = blocks[-1]
+        cut = last.b + last.size + len(committed) - (last.a + last.size)
+        return words[min(cut, len(words)):]
+
+    def hypothesis(self):
+        return " ".join(self._previous)
+
+
+class TextStitcher:
+    """Joins the text of overlapping long-form chunks without repeating words.
+
+    A chunk that starts with audio from the end of the previous one usually
+    starts with a few of the previous chunk's last words too. ``add`` drops
+    that repeated prefix, by matching the start of the new text against the
+    last ``window`` words typed: first as an exact suffix/prefix overlap and
+    otherwise as a run the two have in common, which tolerates a word at the
+    edge that was heard differently. Either must be at least two words long
+    and lie within the words ``overlap`` samples of speech can hold (at
+    ``words_per_second``), so a single common word or a phrase that merely
+    comes up again later in the chunk is not taken for the overlap.
+    """
+
+    def __init__(self, window=12, samplerate=16000, words_per_second=3.0):
+        self.window = window
+        self.samplerate = samplerate
+        self.words_per_second = words_per_second
+        self.reset()
+
+    def reset(self):
+        self._tail = []
+
+    def _repeated(self, words, overlap):
+        """How many of ``words`` repeat the end of the previous chunk."""
+        tail = [_normalize(word) for word in self._tail]
+        head = [_normalize(word) for word in words[:self.window]]
+        limit = 1 + int(overlap / self.samplerate * self.words_per_second)
+        # A single common word is more likely chance than overlap
+        for size in range(min(len(tail), len(head), limit), 1, -1):
+            if tail[-size:] == head[:size]:
+                return size
+
+        runs = [run for run in difflib.SequenceMatcher(None, tail, head, autojunk=False).get_matching_blocks()
+                if run.size >= 2 and run.b <= limit]
+        if not runs:
+            return 0
+        # Prefer a run that ends the previous chunk, then the longest
+        run = max(runs, key=lambda run: (run.a + run.size == len(tail), run.size))
+        return run.b + run.size
+
+    def peek(self, text, overlap):
+        """``text`` without the words repeated from the previous chunk, without consuming it."""
+        words = text.split()
+        if overlap:
+            words = words[self._repeated(words, overlap):]
+        return " ".join(words)
+
+    def add(self, text, overlap):
+        """Stitch a final chunk on; returns the text that is new."""
+        words = text.split()
+        if overlap:
+            words = words[self._repeated(words, overlap):]
+            self._tail = (self._tail + words)[-self.window:]
+        else:
+            self._tail = words[-self.window:]
+        return " ".join(words)
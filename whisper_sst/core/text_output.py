@@ -0,0 +1,217 @@
+import collections
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+
+from PyQt5.QtCore import QThread, pyqtSignal
+from .metrics import metrics
+
+
+class TextSink:
+    """Puts text where the user's cursor is. ``type`` blocks until it has been sent."""
+    name = None
+
+    def type(self, text):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class PyAutoGuiSink(TextSink):
+    """One synthetic key event per character; slow, but works everywhere for ASCII."""
+    name = "pyautogui"
+
+    def __init__(self):
+        self._paste = None
+
+    def type(self, text):
+        if text.isascii():
+            import pyautogui
+            pyautogui.typewrite(text)
+            return
+        # pyautogui can't type characters outside the keyboard layout
+        if self._paste is None:
+            self._paste = ClipboardSink()
+        self._paste.type(text)
+
+
+class ClipboardSink(TextSink):
+    """Pastes the whole text at once and then puts the previous clipboard back.
+
+    ``restore_delay`` gives the target application time to read the
+    clipboard before it is restored.
+    """
+    name = "clipboard"
+
+    def __init__(self, restore_delay=0.15):
+        self.restore_delay = restore_delay
+        self.shortcut = "command+v" if sys.platform == "darwin" else "ctrl+v"
+
+    def type(self, text):
+        import keyboard
+        import pyperclip  # installed with pyautogui
+
+        try:
+            previous = pyperclip.paste()
+        except Exception:
+            previous = None
+        pyperclip.copy(text)
+        keyboard.send(self.shortcut)
+        time.sleep(self.restore_delay)
+        if previous is not None:
+            pyperclip.copy(previous)
+
+
+class CommandSink(TextSink):
+    """Types the whole text with a single call to an external tool."""
+    command = None
+
+    def __init__(self):
+        if shutil.which(self.command[0]) is None:
+            raise RuntimeError(f"{self.command[0]} is not installed")
+
+    def type(self, text):
+        subprocess.run(self.command + [text], check=True, capture_output=True)
+
+
+class XdotoolSink(CommandSink):
+    """X11; handles any Unicode text."""
+    name = "xdotool"
+    command = ["xdotool", "type", "--clearmodifiers", "--delay", "0", "--"]
+
+
+class YdotoolSink(CommandSink):
+    """Types through uinput, so it also works on Wayland (needs ydotoold running)."""
+    name = "ydotool"
+    command = ["ydotool", "type", "--key-delay", "0", "--"]
+
+
+class FileSink(TextSink):
+    """Appends text to a file, or stdout for ``"-"``; for tests and headless runs."""
+    name = "file"
+
+    def __init__(self, path="-"):
+        self.path = path
+        self._file = sys.stdout if path == "-" else open(path, "a", encoding="utf-8")
+
+    def type(self, text):
+        self._file.write(text)
+        self._file.flush()
+
+    def close(self):
+        if self._file is not sys.stdout:
+            self._file.close()
+
+
+SINKS = {
+    sink.name: sink for sink in (PyAutoGuiSink, ClipboardSink, XdotoolSink, YdotoolSink, FileSink)
+}
+
+
+def session_type():
+    """``"wayland"``, ``"x11"`` or None for the current Linux desktop session."""
+    session = os.environ.get("XDG_SESSION_TYPE", "").lower()
+    if session in ("wayland", "x11"):
+        return session
+    if os.environ.get("WAYLAND_DISPLAY"):
+        return "wayland"
+    if os.environ.get("DISPLAY"):
+        return "x11"
+    return None
+
+
+def create_sink(kind="auto", path=None):
+    """Build the named sink.
+
+    ``auto`` prefers a bulk typing tool that works in the session: xdotool
+    (then ydotool) under X11, and only ydotool under Wayland, where xdotool
+    can't reach native windows. Otherwise it falls back to pyautogui. The
+    clipboard is only used when asked for, since pasting replaces its
+    contents for a moment.
+    """
+    if kind == "file":
+        return FileSink(path or "-")
+    if kind != "auto":
+        if kind not in SINKS:
+            raise ValueError(f"Unknown output sink: {kind}")
+        return SINKS[kind]()
+
+    if sys.platform.startswith("linux"):
+        session = session_type()
+        candidates = (YdotoolSink,) if session == "wayland" else (XdotoolSink, YdotoolSink)
+        for sink in candidates:
+            try:
+                return sink()
+            except RuntimeError:
+                pass
+    return PyAutoGuiSink()
+
+
+class TextOutput(QThread):
+    """Types results on its own thread, in the order they were submitted.
+
+    The thread that produced the text returns immediately. Each piece of
+    text is typed in one call to the sink; the sink's characters per second
+    are recorded in metrics, and a trace submitted with the text gets its
+    ``typing`` span and ``typed`` mark before it is finished.
+    """
+    typed = pyqtSignal(object)
+    error = pyqtSignal(str)
+
+    def __init__(self, sink):
+        super().__init__()
+        self.sink = sink
+        self.running = True
+        self._items = collections.deque()
+        self._condition = threading.Condition()
+
+    def submit(self, text, trace=None):
+        with self._condition:
+            self._items.append((text, trace))
+            self._condition.notify_all()
+
+    def pending(self):
+        with self._condition:
+            return len(self._items)
+
+    def run(self):
+        while True:
+            with self._condition:
+                while self.running and not self._items:
+                    self._condition.wait()
+                if not self._items:
+                    break
+                text, trace = self._items.popleft()
+                sink = self.sink
+
+            if text:
+                started = time.perf_counter()
+                try:
+                    sink.type(text)
+                except Exception as e:
+                    print(f"Typing error: {str(e)}")
+                    self.error.emit(str(e))
+                else:
+                    elapsed = time.perf_counter() - started
+                    metrics.increment(f"typed_chars_{sink.name}", len(text))
+                    if elapsed > 0:
+                        metrics.observe(f"typing_{sink.name}_chars_per_second", len(text) / elapsed)
+                    if trace:
+                        trace.span("typing", elapsed)
+
+            if trace:
+                trace.mark("typed")
+                metrics.finish(trace)
+            self.typed.emit(trace)
+
+    def stop(self):
+        # Text already submitted is still typed
+        with self._condition:
+            self.running = False
+            self._condition.notify_all()
+        self.wait()
+        self.sink.close()
@@ -0,0 +1,294 @@
+import collections
+import threading
+import time
+
+import numpy as np
+from PyQt5.QtCore import QThread, pyqtSignal
+from .context_cache import ContextCache
+from .engines import DECODE_PROFILES
+from .language_cache import LanguageCache
+from .streaming import LocalAgreement, TextStitcher
+from .metrics import metrics
+
+BACKPRESSURE_POLICIES = ("drop_oldest", "merge", "block")
+
+
+class TranscriptionJob:
+    def __init__(self, audio, partial=False, trace=None, overlap=0):
+        self.audio = audio
+        self.partial = partial
+        self.trace = trace
+        # Leading samples repeated from the previous long-form chunk
+        self.overlap = overlap
+        self.submitted = time.time()
+        # (trace, submitted) of utterances merged into this job by backpressure
+        self.merged = []
+
+
+class TranscriptionWorker(QThread):
+    """Runs Whisper off the GUI thread behind a bounded job queue.
+
+    When utterances arrive faster than they can be decoded and the queue is
+    full, ``backpressure`` decides what happens: ``drop_oldest`` discards the
+    oldest pending job, ``merge`` appends the new audio to the newest pending
+    job, and ``block`` makes ``submit`` wait for space.
+
+    With ``streaming`` enabled, ``submit_partial`` queues re-decodes of the
+    utterance in progress. Only the newest partial is kept, and the words
+    that stay stable across consecutive partials are reported through
+    ``partial_ready`` as committed; the final result then only carries the
+    words that were not committed yet.
+
+    Final utterances that arrive within ``batch_window`` seconds of each
+    other are decoded together, up to ``max_batch`` at a time, so short
+    utterances share one encoder pass.
+
+    Finals are decoded with the options of ``decode_profile`` (see
+    ``DECODE_PROFILES``). With ``language`` set to ``"auto"``,
+    ``language_cache`` skips detection once the session's language is known.
+    ``context`` carries the text of recent finals over as the next prompt.
+
+    Long-form chunks are submitted with the number of leading samples they
+    share with the previous chunk as ``overlap``; the words decoded from
+    that stretch again are dropped from their text.
+    """
+    result_ready = pyqtSignal(object)
+    partial_ready = pyqtSignal(object)
+    progress = pyqtSignal(str)
+    error = pyqtSignal(str)
+
+    def __init__(self, engine, language="auto", max_queue=4, backpressure="drop_oldest",
+                 max_batch=1, batch_window=0.05, decode_profile="fast", language_cache=None,
+                 context=None):
+        super().__init__()
+        if max_queue < 1:
+            raise ValueError(f"The transcription queue needs room for at least one job, not {max_queue}")
+        if backpressure not in BACKPRESSURE_POLICIES:
+            raise ValueError(f"Unknown backpressure policy: {backpressure}")
+        if decode_profile not in DECODE_PROFILES:
+            raise ValueError(f"Unknown decode profile: {decode_profile}")
+        self.engine = engine
+        self.language = language
+        self.max_queue = max_queue
+        self.backpressure = backpressure
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self.decode_profile = decode_profile
+        self.language_cache = language_cache or LanguageCache()
+        self.context = context or ContextCache()
+        self.streaming = False
+        self.running = True
+        self.dropped_jobs = 0
+        self.agreement = LocalAgreement()
+        # Set when the final that the committed words belong to was dropped or merged
+        self._agreement_stale = False
+        self.stitcher = TextStitcher()
+        self._jobs = collections.deque()
+        self._condition = threading.Condition()
+
+    def submit(self, audio, trace=None, overlap=0):
+        with self._condition:
+            # A final result supersedes any partial still waiting for it
+            if self._jobs and self._jobs[-1].partial:
+                self._jobs.pop()
+
+            if len(self._jobs) >= self.max_queue:
+                if self.backpressure == "drop_oldest":
+                    self._jobs.popleft()
+                    self._agreement_stale = True
+                    self.dropped_jobs += 1
+                    metrics.increment("dropped_utterances")
+                    print("Transcription queue full, dropped oldest utterance")
+                elif self.backpressure == "merge":
+                    last = self._jobs[-1]
+                    self._agreement_stale = True
+                    if overlap:
+                        # The next chunk of the same speech; its start is already in there
+                        last.audio = np.concatenate([last.audio, audio[overlap:]])
+                    else:
+                        gap = np.zeros(1600, dtype=np.float32)  # 100 ms of silence between utterances
+                        last.audio = np.concatenate([last.audio, gap, audio])
+                    if last.trace is None:
+                        last.trace = trace
+                    elif trace is not None:
+                        # Its latency is still reported; the decode is counted once, on the longer audio
+                        last.trace.audio_seconds = len(last.audio) / 16000
+                        last.merged.append((trace, time.time()))
+                    self._condition.notify_all()
+                    return
+                else:
+                    while self.running and len(self._jobs) >= self.max_queue:
+                        self._condition.wait()
+                    if not self.running:
+                        return
+
+            self._jobs.append(TranscriptionJob(audio, trace=trace, overlap=overlap))
+            self._condition.notify_all()
+
+    def submit_partial(self, audio, overlap=0):
+        with self._condition:
+            if self._jobs and self._jobs[-1].partial:
+                self._jobs[-1].audio = audio
+                self._jobs[-1].overlap = overlap
+            elif len(self._jobs) < self.max_queue:
+                self._jobs.append(TranscriptionJob(audio, partial=True, overlap=overlap))
+            else:
+                return
+            self._condition.notify_all()
+
+    def tune(self, decode_profile=None, batch_size=None, batch_window=None, max_queue=None, backpressure=None,
+             language_confirmations=None, context_tokens=None, context_max_age=None, hotwords=None):
+        """Changes decoding and queueing options while running; the model and queued jobs are kept."""
+        if decode_profile is not None and decode_profile not in DECODE_PROFILES:
+            raise ValueError(f"Unknown decode profile: {decode_profile}")
+        if backpressure is not None and backpressure not in BACKPRESSURE_POLICIES:
+            raise ValueError(f"Unknown backpressure policy: {backpressure}")
+        if max_queue is not None and max_queue < 1:
+            raise ValueError(f"The transcription queue needs room for at least one job, not {max_queue}")
+        with self._condition:
+            if decode_profile is not None:
+                self.decode_profile = decode_profile
+            if batch_size is not None:
+                self.max_batch = batch_size
+            if batch_window is not None:
+                self.batch_window = batch_window
+            if max_queue is not None:
+                self.max_queue = max_queue
+            if backpressure is not None:
+                self.backpressure = backpressure
+            if language_confirmations is not None:
+                self.language_cache.confirmations = language_confirmations
+            self.context.configure(context_tokens, context_max_age, hotwords)
+            # A larger queue may let a blocked submit through
+            self._condition.notify_all()
+
+    def set_engine(self, engine):
+        # Jobs queue up until the first engine arrives
+        with self._condition:
+            self.engine = engine
+            self.language_cache.reset()
+            self._condition.notify_all()
+
+    def pending(self):
+        with self._condition:
+            return len(self._jobs)
+
+    def run(self):
+        while True:
+            with self._condition:
+                while self.running and (not self._jobs or self.engine is None):
+                    self._condition.wait()
+                if not self.running:
+                    break
+                jobs = [self._jobs.popleft()]
+                if not jobs[0].partial:
+                    self._collect_batch(jobs)
+                queued = len(self._jobs)
+                stale, self._agreement_stale = self._agreement_stale, False
+                self._condition.notify_all()
+
+            if stale:
+                # Its words were typed already; they must not be taken off the next utterance
+                self.agreement.reset()
+            try:
+                if jobs[0].partial:
+                    self._run_partial(jobs[0])
+                    continue
+
+                self.progress.emit(f"Transcribing... ({queued} queued)" if queued else "Transcribing...")
+                started = time.time()
+                results = self.transcribe_batch([job.audio for job in jobs])
+                elapsed = time.time() - started
+                for job, result in zip(jobs, results):
+                    if job.trace:
+                        job.trace.span("queue_wait", started - job.submitted)
+                        for name, seconds in (result["timings"] or {"decode": elapsed}).items():
+                            job.trace.span(name, seconds)
+                        for trace, submitted in job.merged:
+                            trace.span("queue_wait", started - submitted)
+                            job.trace.merged.append(trace)
+                    result["trace"] = job.trace
+                    result["text"] = self.stitcher.add(result["text"], job.overlap)
+                    self.context.add(result["text"])
+                    if self.streaming:
+                        result["text"] = " ".join(self.agreement.finalize(result["text"]))
+                    self.result_ready.emit(result)
+            except Exception as e:
+                print(f"Transcription error: {str(e)}")
+                import traceback
+                traceback.print_exc()
+                self.error.emit(str(e))
+
+    def _collect_batch(self, jobs):
+        # Called with the lock held; waits up to batch_window for more finals
+        deadline = time.time() + self.batch_window
+        while self.running and len(jobs) < self.max_batch:
+            while self._jobs and not self._jobs[0].partial and len(jobs) < self.max_batch:
+                jobs.append(self._jobs.popleft())
+            remaining = deadline - time.time()
+            if len(jobs) >= self.max_batch or remaining <= 0 or self._jobs:
+                break
+            self._condition.wait(remaining)
+
+    def _run_partial(self, job):
+        # A single greedy pass keeps re-decodes cheap enough to run while speaking
+        # Partials re-decode the same audio, so they don't count towards the language cache
+        result = self.transcribe(job.audio, learn_language=False, temperature=0.0, best_of=None, beam_size=None)
+        text = self.stitcher.peek(result["text"], job.overlap)
+        committed = self.agreement.update(text)
+        self.partial_ready.emit({
+            "text": text,
+            "committed": " ".join(committed),
+            "language": result["language"]
+        })
+
+    def transcribe(self, audio, learn_language=True, **options):
+        return self.transcribe_batch([audio], learn_language, **options)[0]
+
+    def transcribe_batch(self, audios, learn_language=True, **options):
+        engine = self.engine
+        if engine is None:
+            raise RuntimeError("Model is not loaded")
+        options = {**DECODE_PROFILES[self.decode_profile], **options}
+        self.context.bind(engine)
+        prompt = self.context.prompt()
+
+        detect = self.language == "auto"
+        language = self.language_cache.language() if detect else self.language
+        results = engine.transcribe_batch(
+            audios,
+            language=language,  # None lets Whisper handle language detection internally
+            task="transcribe",
+            prompt=prompt,
+            **options
+        )
+        fallbacks = sum(result.get("fallbacks") or 0 for result in results)
+
+        if detect and learn_language:
+            if language is None:
+                metrics.increment("language_detections", len(audios))
+            else:
+                metrics.increment("language_detections_skipped", len(audios))
+            for i, result in enumerate(results):
+                if not self.language_cache.update(result, cached=language is not None):
+                    # Poor fit in the cached language; detect and decode again
+                    metrics.increment("language_rechecks")
+                    results[i] = engine.transcribe(audios[i], language=None, task="transcribe", prompt=prompt,
+                                                   **options)
+                    fallbacks += results[i].get("fallbacks") or 0
+                    self.language_cache.update(results[i], cached=False)
+
+        if fallbacks:
+            metrics.increment("temperature_fallbacks", fallbacks)
+        return [{
+            "text": result["text"].strip().replace('\n', ' '),
+            "language": result.get("language") or language or "en",
+            "timings": result.get("timings")
+        } for result in results]
+
+    def stop(self):
+        with self._condition:
+            self.running = False
+            self._jobs.clear()
+            self._condition.notify_all()
+        self.wait()
@@ -0,0 +1,97 @@
+import numpy as np
+
+
+class EnergyVAD:
+    """Energy voice activity detector with an adaptive noise floor.
+
+    The floor follows the block RMS quickly downwards and slowly upwards, so
+    it settles on the background level of the room. A block counts as speech
+    when it is ``noise_ratio`` times louder than the floor (and above
+    ``min_threshold``). The floor keeps creeping up during speech, so a
+    sudden increase in background noise cannot hold the recorder open
+    indefinitely.
+    """
+
+    def __init__(self, min_threshold=0.005, noise_ratio=3.0, max_threshold=0.2):
+        self.min_threshold = min_threshold
+        self.noise_ratio = noise_ratio
+        self.max_threshold = max_threshold
+        self.noise_floor = None
+
+    @property
+    def threshold(self):
+        if self.noise_floor is None:
+            return self.min_threshold
+        return min(max(self.noise_floor * self.noise_ratio, self.min_threshold), self.max_threshold)
+
+    def is_speech(self, block, level):
+        speech = level > self.threshold
+        self._update_floor(level, speech)
+        return speech
+
+    def _update_floor(self, level, speech):
+        if self.noise_floor is None:
+            self.noise_floor = level
+        elif level < self.noise_floor:
+            self.noise_floor += 0.5 * (level - self.noise_floor)
+        elif speech:
+            self.noise_floor += 0.001 * (level - self.noise_floor)
+        else:
+            self.noise_floor += 0.05 * (level - self.noise_floor)
+
+    def reset(self):
+        self.noise_floor = None
+
+
+class SileroVAD(EnergyVAD):
+    """Silero ONNX model behind the energy gate.
+
+    Blocks the energy detector already rejects never reach the model, which
+    keeps CPU use low in quiet rooms. Needs ``onnxruntime`` and a Silero v5
+    ``silero_vad.onnx`` file.
+    """
+    chunk_size = 512
+    context_size = 64
+
+    def __init__(self, model_path, threshold=0.5, samplerate=16000, **kwargs):
+        super().__init__(**kwargs)
+        import onnxruntime
+        options = onnxruntime.SessionOptions()
+        options.inter_op_num_threads = 1
+        options.intra_op_num_threads = 1
+        self.session = onnxruntime.InferenceSession(
+            model_path, sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self.probability_threshold = threshold
+        self._sr = np.array(samplerate, dtype=np.int64)
+        self._input = np.zeros((1, self.context_size + self.chunk_size), dtype=np.float32)
+        self.reset()
+
+    def is_speech(self, block, level):
+        if not super().is_speech(block, level):
+            return False
+
+        probability = 0.0
+        for start in range(0, len(block) - self.chunk_size + 1, self.chunk_size):
+            self._input[0, self.context_size:] = block[start:start + self.chunk_size]
+            out, self._state = self.session.run(
+                None, {"input": self._input, "state": self._state, "sr": self._sr}
+            )
+            self._input[0, :self.context_size] = self._input[0, -self.context_size:]
+            probability = max(probability, float(out[0][0]))
+        return probability >= self.probability_threshold
+
+    def reset(self):
+        super().reset()
+        self._state = np.zeros((2, 1, 128), dtype=np.float32)
+        self._input[:] = 0
+
+
+def create_vad(kind="energy", model_path=None, **kwargs):
+    if kind == "silero":
+        if not model_path:
+            raise ValueError("The silero VAD needs vad_model_path to point at silero_vad.onnx")
+        return SileroVAD(model_path, **kwargs)
+    if kind == "energy":
+        return EnergyVAD(**kwargs)
+    raise ValueError(f"Unknown VAD: {kind}")
@@ -1,6 +1,60 @@
-import sounddevice as sd
-from PyQt5.QtWidgets import QDialog, QLabel, QVBoxLayout, QComboBox, QPushButton, QProgressBar, QApplication
-from PyQt5.QtCore import Qt, pyqtSignal
+import time
+
+from PyQt5.QtWidgets import QDialog, QLabel, QVBoxLayout, QComboBox, QPushButton, QApplication, QWidget
+from PyQt5.QtCore import Qt, QTimer, pyqtSignal
+from PyQt5.QtGui import QColor, QPainter
+from ..core.level_meter import DBFS_FLOOR, PeakHold, to_dbfs
+from ..core.recording_thread import MAX_CAPTURE_CHANNELS
+from ..utils.lazy import lazy_import
+from ..utils.profiling import profiler
+
+sd = lazy_import("sounddevice")
+
+# The meter never repaints faster than this, whatever the display does
+METER_FPS = 30
+
+
+class LevelMeterWidget(QWidget):
+    """Horizontal dBFS meter: RMS bar, peak bar, peak-hold line and a clip light.
+
+    Values are rounded to half a dB and the widget only repaints when the
+    rounded values change.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setFixedHeight(20)
+        # Every pixel is painted below, so Qt can skip repainting the dialog behind it
+        self.setAttribute(Qt.WA_OpaquePaintEvent)
+        self._state = (DBFS_FLOOR, DBFS_FLOOR, DBFS_FLOOR, False)
+        self.repaints = 0
+
+    def set_levels(self, rms_db, peak_db, hold_db, clipping):
+        state = (round(rms_db * 2) / 2, round(peak_db * 2) / 2, round(hold_db * 2) / 2, clipping)
+        if state != self._state:
+            self._state = state
+            self.update()
+
+    def _x(self, db, width):
+        return int(width * (db - DBFS_FLOOR) / -DBFS_FLOOR)
+
+    def paintEvent(self, event):
+        self.repaints += 1
+        rms_db, peak_db, hold_db, clipping = self._state
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor("#2c3e50"))
+        clip_width = 14
+        width = self.width() - clip_width - 4
+        height = self.height()
+        painter.fillRect(0, 0, width, height, QColor("#34495e"))
+        painter.fillRect(0, 0, self._x(peak_db, width), height, QColor("#2c7fb8"))
+        painter.fillRect(0, 0, self._x(rms_db, width), height, QColor("#3498db"))
+        painter.fillRect(max(0, self._x(hold_db, width) - 2), 0, 2, height, QColor("#ecf0f1"))
+        painter.fillRect(width + 4, 0, clip_width, height, QColor("#e74c3c" if clipping else "#34495e"))
+        painter.setPen(QColor("#ecf0f1"))
+        painter.drawText(0, 0, width - 4, height, Qt.AlignRight | Qt.AlignVCenter, f"{rms_db:.0f} dBFS")
+        painter.end()
+
 
 class RecordingDialog(QDialog):
     close_signal = pyqtSignal()
@@ -19,16 +73,6 @@ class RecordingDialog(QDialog):
             QLabel { color: #ecf0f1; font-size: 16px; }
             QComboBox { color: #ecf0f1; background-color: #34495e; }
             QComboBox QAbstractItemView { color: #ecf0f1; background-color: #2c3e50; }
-            QProgressBar { 
-                height: 20px;
-                text-align: center;
-                border: 1px solid #34495e;
-                border-radius: 5px;
-            }
-            QProgressBar::chunk {
-                background-color: #3498db;
-                width: 10px;
-            }
         """)
         
         layout = QVBoxLayout()
@@ -37,10 +81,21 @@ class RecordingDialog(QDialog):
         self.status_label.setAlignment(Qt.AlignCenter)
         layout.addWidget(self.status_label)
 
-        self.audio_level = QProgressBar()
-        self.audio_level.setRange(0, 100)
-        self.audio_level.setFormat("%p%")
-        layout.addWidget(self.audio_level)
+        self.level_meter = LevelMeterWidget()
+        layout.addWidget(self.level_meter)
+        self.meter = None
+        self.peak_hold = PeakHold()
+        self._levels = (DBFS_FLOOR, DBFS_FLOOR)
+        # Levels are pulled at the display rate instead of pushed per audio block
+        refresh = QApplication.primaryScreen().refreshRate() or METER_FPS
+        self.meter_timer = QTimer(self)
+        self.meter_timer.setInterval(round(1000 / min(refresh, METER_FPS)))
+        self.meter_timer.timeout.connect(self.refresh_meter)
+
+        self.latency_label = QLabel("")
+        self.latency_label.setAlignment(Qt.AlignCenter)
+        self.latency_label.setStyleSheet("font-size: 11px; color: #95a5a6;")
+        layout.addWidget(self.latency_label)
 
         self.mic_combo = QComboBox()
         layout.addWidget(self.mic_combo)
@@ -50,15 +105,16 @@ class RecordingDialog(QDialog):
         layout.addWidget(self.close_button)
 
         self.setLayout(layout)
-        self.setFixedSize(300, 180)
+        self.setFixedSize(300, 200)
 
         # Center dialog
         screen = QApplication.primaryScreen().geometry()
         self.move(screen.center().x() - self.width()//2, screen.center().y() - self.height()//2)
 
     def _initialize_devices(self, current_device):
-        self.devices = [(idx, dev) for idx, dev in enumerate(sd.query_devices()) 
-                       if dev['max_input_channels'] > 0]
+        with profiler.phase("device query"):
+            self.devices = [(idx, dev) for idx, dev in enumerate(sd.query_devices())
+                           if dev['max_input_channels'] > 0]
         for idx, dev in self.devices:
             self.mic_combo.addItem(f"{idx}: {dev['name']}", idx)
         
@@ -67,6 +123,15 @@ class RecordingDialog(QDialog):
             
         self.mic_combo.currentIndexChanged.connect(self.on_device_changed)
 
+    def device_format(self, device):
+        """Native (samplerate, channels) of an input device from the list queried at startup."""
+        if device is None:
+            device = sd.default.device[0]
+        for idx, dev in self.devices:
+            if idx == device:
+                return int(dev['default_samplerate']), max(1, min(dev['max_input_channels'], MAX_CAPTURE_CHANNELS))
+        return None
+
     def set_device_selection(self, device):
         for i in range(self.mic_combo.count()):
             if self.mic_combo.itemData(i) == device:
@@ -76,11 +141,34 @@ class RecordingDialog(QDialog):
     def update_status(self, status):
         self.status_label.setText(status)
 
-    def update_audio_level(self, level):
-        # Adjust scaling for better visualization
-        # RMS values are typically much smaller, so we scale them up
-        percent = min(int(level * 1000), 100)  # Increased scaling factor
-        self.audio_level.setValue(percent)
+    def update_latency(self, summary):
+        self.latency_label.setText(summary)
+
+    def attach_meter(self, meter):
+        """Show the levels of a LevelMeter, e.g. the recording thread's."""
+        self.meter = meter
+        self.peak_hold.reset()
+        self._levels = (DBFS_FLOOR, DBFS_FLOOR)
+
+    def refresh_meter(self):
+        levels = self.meter.read() if self.meter else None
+        clipped = False
+        if levels:
+            rms, peak, clipped = levels
+            self._levels = (to_dbfs(rms), to_dbfs(peak))
+        # With no new block since the last tick the bars stay put, but the hold keeps falling
+        now = time.monotonic()
+        rms_db, peak_db = self._levels
+        hold_db = self.peak_hold.update(peak_db, clipped, now)
+        self.level_meter.set_levels(rms_db, peak_db, hold_db, self.peak_hold.clipping(now))
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.meter_timer.start()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.meter_timer.stop()
 
     def on_device_changed(self, index):
         new_device = self.mic_combo.itemData(index)
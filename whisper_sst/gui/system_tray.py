@@ -1,14 +1,24 @@
 from PyQt5.QtWidgets import QWidget, QSystemTrayIcon, QMenu, QActionGroup, QDialog, QVBoxLayout, QLabel, QApplication
-from PyQt5.QtCore import pyqtSignal
+from PyQt5.QtCore import Qt, QTimer, pyqtSignal
 from PyQt5.QtGui import QIcon
-import keyboard
-import torch
-import whisper
-import pyautogui
-import os 
 from ..core.recording_thread import RecordingThread
+from ..core.transcription_worker import TranscriptionWorker
+from ..core.engines import BACKENDS, COMPUTE_TYPES, DECODE_PROFILES
+from ..core.context_cache import ContextCache
+from ..core.language_cache import LanguageCache
+from ..core.model_loader import ModelLoader, cache_budget
+from ..core.multiprocess import ProcessPipeline
+from ..core.vad import create_vad
+from ..core.metrics import metrics, start_metrics_server
+from ..core.text_output import TextOutput, create_sink
 from ..gui.recording_dialog import RecordingDialog
-from ..utils.settings import Settings
+from ..utils.settings import TUNABLE, Settings
+from ..utils.debug_audio import DebugAudioSink
+from ..utils.lazy import lazy_import
+from ..utils.profiling import profiler
+
+# keyboard hooks into the OS on import, which is slow; defer until first use
+keyboard = lazy_import("keyboard")
 
 LANGUAGES = {
     "auto": "Auto Detect",
@@ -30,26 +40,58 @@ LANGUAGES = {
 
 class SystemTrayApp(QWidget):
     toggle_signal = pyqtSignal()
+    ready = pyqtSignal()
+    settings_changed = pyqtSignal(object)
 
     def __init__(self):
         super().__init__()
-        self.settings = Settings()
+        with profiler.phase("settings load"):
+            self.settings = Settings()
         self.init_variables()
-        self.setup_gui()
-        self.setup_recording()
-        self.setup_hotkeys()
+        with profiler.phase("tray setup"):
+            self.setup_gui()
         self.toggle_signal.connect(self.toggle_recording)
 
+        # Let the event loop show the tray icon before the slower setup runs
+        QTimer.singleShot(0, self.finish_startup)
+
+    def finish_startup(self):
+        profiler.mark("tray visible")
+        self.setup_recording()
+        with profiler.phase("hotkey hook"):
+            self.setup_hotkeys()
+        # Query devices now rather than on the first hotkey press
+        self.ensure_recording_dialog()
+        # Edits to settings.json arrive from the settings thread
+        self.settings_changed.connect(self.apply_settings)
+        self.settings.watch(self.settings_changed.emit)
+
     def init_variables(self):
         self.hotkey = self.settings.get("hotkey", "f9")
         self.hotkey_enabled = self.settings.get("hotkey_enabled", True)
         self.input_device = self.settings.get("input_device")
         self.model_name = self.settings.get("model", "large")
+        self.backend = self.settings.get("backend", "whisper")
+        self.compute_type = self.settings.get("compute_type", "int8")
+        self.server = self.settings.get("server")
         self.is_recording = False
         self.recording_thread = None
         self.recording_dialog = None
-        self.model = None
+        self.engine = None
+        self.model_loader = None
+        self.transcription_worker = None
+        self.text_output = None
+        self.pipeline = None
+        self.multiprocess = self.settings.get("multiprocess", False)
         self.selected_language = self.settings.get("language", "auto")
+        self.streaming = self.settings.get("streaming", False) and not self.multiprocess
+        self.long_form = self.settings.get("long_form", False)
+        self.debug_sink = None
+        if self.settings.get("debug_audio", False):
+            self.debug_sink = DebugAudioSink(
+                max_files=self.settings.get("debug_audio_max_files", 50),
+                max_bytes=self.settings.get("debug_audio_max_mb", 100) * 1024 * 1024
+            )
 
     def setup_gui(self):
         self.tray_icon = QSystemTrayIcon(self)
@@ -88,10 +130,50 @@ class SystemTrayApp(QWidget):
             action.triggered.connect(lambda _, m=model: self.change_model(m))
             model_group.addAction(action)
 
+        # Target+draft pairings for speculative decoding (whisper backend only)
+        model_menu.addSeparator()
+        for model in ["large+base", "large+tiny", "medium+tiny"]:
+            action = model_menu.addAction(model)
+            action.setCheckable(True)
+            action.setChecked(model == self.model_name)
+            action.triggered.connect(lambda _, m=model: self.change_model(m))
+            model_group.addAction(action)
+
+        # Inference backend and quantization submenus
+        backend_menu = menu.addMenu("🧠 Select Backend")
+        backend_menu.setStyleSheet(menu.styleSheet())
+        backend_group = QActionGroup(self)
+        for backend in BACKENDS:
+            action = backend_menu.addAction(backend)
+            action.setCheckable(True)
+            action.setChecked(backend == self.backend)
+            action.triggered.connect(lambda _, b=backend: self.change_backend(b))
+            backend_group.addAction(action)
+
+        compute_menu = menu.addMenu("🗜️ Quantization")
+        compute_menu.setStyleSheet(menu.styleSheet())
+        compute_group = QActionGroup(self)
+        for compute_type in COMPUTE_TYPES:
+            action = compute_menu.addAction(compute_type)
+            action.setCheckable(True)
+            action.setChecked(compute_type == self.compute_type)
+            action.triggered.connect(lambda _, c=compute_type: self.change_compute_type(c))
+            compute_group.addAction(action)
+
+        profile_menu = menu.addMenu("🎯 Decode Profile")
+        profile_menu.setStyleSheet(menu.styleSheet())
+        profile_group = self.profile_group = QActionGroup(self)
+        for profile in DECODE_PROFILES:
+            action = profile_menu.addAction(profile)
+            action.setCheckable(True)
+            action.setChecked(profile == self.settings.get("decode_profile", "fast"))
+            action.triggered.connect(lambda _, p=profile: self.change_decode_profile(p))
+            profile_group.addAction(action)
+
         # Language selection submenu with icon
         language_menu = menu.addMenu("🌍 Select Language")
         language_menu.setStyleSheet(menu.styleSheet())
-        language_group = QActionGroup(self)
+        language_group = self.language_group = QActionGroup(self)
         
         # Add frequently used languages first
         priority_langs = ["auto", "hi", "bn", "en"]
@@ -118,6 +200,18 @@ class SystemTrayApp(QWidget):
                 language_group.addAction(action)
         
         menu.addSeparator()
+
+        self.streaming_action = menu.addAction("⚡ Streaming Mode")
+        self.streaming_action.setCheckable(True)
+        self.streaming_action.setChecked(self.streaming)
+        self.streaming_action.triggered.connect(self.toggle_streaming)
+
+        self.long_form_action = menu.addAction("📜 Long-form Mode")
+        self.long_form_action.setCheckable(True)
+        self.long_form_action.setChecked(self.long_form)
+        self.long_form_action.triggered.connect(self.toggle_long_form)
+
+        menu.addSeparator()
         
         # Add icons to other menu items
         self.toggle_hotkey_action = menu.addAction("⌨️ Disable Hotkey" if self.hotkey_enabled else "⌨️ Enable Hotkey")
@@ -134,11 +228,140 @@ class SystemTrayApp(QWidget):
         self.tray_icon.show()
 
     def setup_recording(self):
+        metrics.trace_file = self.settings.get("trace_file")
+        if self.settings.get("metrics_port"):
+            try:
+                start_metrics_server(self.settings.get("metrics_port"))
+            except OSError as e:
+                self.handle_error(f"Failed to start metrics server: {str(e)}")
+
+        # Typing runs on its own thread too, in the order results arrive
+        kind = self.settings.get("output", "auto")
         try:
-            device = "cuda" if torch.cuda.is_available() else "cpu"
-            self.model = whisper.load_model(self.model_name, device=device)
+            sink = create_sink(kind, self.settings.get("output_file"))
         except Exception as e:
-            self.handle_error(f"Failed to load model: {str(e)}")
+            self.handle_error(f"Failed to set up {kind} output, using pyautogui: {str(e)}")
+            sink = create_sink("pyautogui")
+        print(f"Typing with {sink.name}")
+        self.text_output = TextOutput(sink)
+        self.text_output.typed.connect(self.handle_typed)
+        self.text_output.error.connect(self.handle_error)
+        self.text_output.start()
+
+        if self.multiprocess:
+            self.setup_pipeline()
+            return
+
+        # Whisper runs on this worker so decoding never blocks the GUI thread
+        self.transcription_worker = TranscriptionWorker(
+            None,
+            self.selected_language,
+            max_queue=self.settings.get("transcription_queue_size", 4),
+            backpressure=self.settings.get("backpressure", "drop_oldest"),
+            max_batch=self.settings.get("batch_size", 4),
+            batch_window=self.settings.get("batch_window_ms", 50) / 1000,
+            decode_profile=self.settings.get("decode_profile", "fast"),
+            language_cache=LanguageCache(confirmations=self.settings.get("language_confirmations", 3)),
+            context=ContextCache(
+                max_tokens=self.settings.get("context_tokens", 96),
+                max_age=self.settings.get("context_max_age", 60),
+                hotwords=self.settings.get("hotwords", [])
+            )
+        )
+        self.transcription_worker.streaming = self.streaming
+        self.transcription_worker.result_ready.connect(self.handle_result)
+        self.transcription_worker.partial_ready.connect(self.handle_partial)
+        self.transcription_worker.progress.connect(self.handle_progress)
+        self.transcription_worker.error.connect(self.handle_error)
+        self.transcription_worker.start()
+
+        # Models load in the background; recording can start right away and
+        # utterances wait in the transcription queue until a model is ready
+        self.model_loader = ModelLoader(cache_budget(self.settings.get("model_cache_mb")))
+        self.model_loader.loading.connect(self.handle_model_loading)
+        self.model_loader.loaded.connect(self.handle_model_loaded)
+        self.model_loader.failed.connect(self.handle_model_failed)
+        self.model_loader.start()
+        self.load_engine()
+
+    def setup_pipeline(self):
+        # Capture and inference each get a process; this one only runs the GUI and typing
+        self.pipeline = ProcessPipeline(
+            self.engine_spec(),
+            dict(language=self.selected_language, **self.decode_options()),
+            ring_seconds=self.settings.get("shared_ring_seconds", 300)
+        )
+        self.pipeline.result_ready.connect(self.handle_result)
+        self.pipeline.engine_loaded.connect(self.handle_pipeline_loaded)
+        self.pipeline.engine_failed.connect(self.handle_model_failed)
+        self.pipeline.error.connect(self.handle_error)
+        self.pipeline.status.connect(self.handle_progress)
+        self.handle_model_loading(f"Loading {self.model_name} ({self.backend})...")
+        self.pipeline.start()
+
+    def decode_options(self):
+        # Options of the worker that decodes, wherever it runs
+        return dict(
+            decode_profile=self.settings.get("decode_profile", "fast"),
+            language_confirmations=self.settings.get("language_confirmations", 3),
+            context_tokens=self.settings.get("context_tokens", 96),
+            context_max_age=self.settings.get("context_max_age", 60),
+            hotwords=self.settings.get("hotwords", []),
+            batch_size=self.settings.get("batch_size", 4)
+        )
+
+    def engine_spec(self):
+        # With a server configured, its model is used whatever is selected here
+        if self.server:
+            return "remote", self.server, "default"
+        return self.backend, self.model_name, self.compute_type
+
+    def load_engine(self):
+        if self.pipeline:
+            self.handle_model_loading(f"Loading {self.model_name} ({self.backend})...")
+            self.pipeline.set_engine(*self.engine_spec())
+            return
+        self.model_loader.request(*self.engine_spec())
+
+    def handle_model_loading(self, message):
+        self.tray_icon.setToolTip(f"Whisper SST - {message}")
+        self.handle_progress(message)
+
+    def handle_model_failed(self, error_message):
+        self.handle_error(f"Failed to load model: {error_message}")
+        self.ready.emit()
+
+    def handle_model_loaded(self, engine):
+        # The previous engine keeps serving until this point, and stays cached
+        self.engine = engine
+        self.transcription_worker.set_engine(engine)
+        self.tray_icon.setToolTip(f"Whisper SST - {engine.model_name} ({engine.backend})")
+        print(f"Loaded {engine}")
+        profiler.mark("model ready")
+        self.ready.emit()
+        if self.is_recording:
+            self.handle_progress("Listening...")
+
+        if engine.backend == "remote":
+            return
+        self.settings.set("model", engine.model_name)
+        self.settings.set("backend", engine.backend)
+        self.settings.set("compute_type", engine.compute_type)
+
+    def handle_pipeline_loaded(self, spec):
+        backend, model_name, compute_type = spec
+        self.tray_icon.setToolTip(f"Whisper SST - {model_name} ({backend})")
+        print(f"Loaded {model_name} ({backend}) in the inference process")
+        profiler.mark("model ready")
+        self.ready.emit()
+        if self.is_recording:
+            self.handle_progress("Listening...")
+
+        if backend == "remote":
+            return
+        self.settings.set("model", model_name)
+        self.settings.set("backend", backend)
+        self.settings.set("compute_type", compute_type)
 
     def setup_hotkeys(self):
         if self.hotkey_enabled:
@@ -156,24 +379,76 @@ class SystemTrayApp(QWidget):
             return
 
         self.is_recording = True
-        if not self.recording_dialog:
-            self.recording_dialog = RecordingDialog(self.input_device, self.set_input_device)
-            self.recording_dialog.close_signal.connect(self.stop_recording)
+        self.ensure_recording_dialog()
 
-        self.recording_thread = RecordingThread(self.input_device)
-        self.recording_thread.finished.connect(self.handle_result)
+        if self.pipeline:
+            self.pipeline.start_capture(
+                self.input_device,
+                self.recording_dialog.device_format(self.input_device),
+                dict(
+                    kind=self.settings.get("vad", "energy"),
+                    model_path=self.settings.get("vad_model_path"),
+                    **self.vad_tuning()
+                ),
+                self.chunking()
+            )
+            self.recording_dialog.attach_meter(self.pipeline.meter)
+            self.recording_dialog.show()
+            return
+
+        self.recording_thread = RecordingThread(
+            self.input_device, self.debug_sink, self.create_vad(),
+            capture_format=self.recording_dialog.device_format(self.input_device),
+            **self.chunking()
+        )
+        # Submit from the recording thread so a blocking queue never stalls the GUI
+        self.recording_thread.finished.connect(self.transcription_worker.submit, Qt.DirectConnection)
+        if self.streaming:
+            self.recording_thread.streaming_interval = self.settings.get("streaming_interval", 0.3)
+            self.recording_thread.partial.connect(self.transcription_worker.submit_partial, Qt.DirectConnection)
         self.recording_thread.error.connect(self.handle_error)
         self.recording_thread.status.connect(self.recording_dialog.update_status)
-        self.recording_thread.audio_level_updated.connect(self.recording_dialog.update_audio_level)
+        self.recording_dialog.attach_meter(self.recording_thread.meter)
 
         self.recording_dialog.show()
         self.recording_thread.start()
 
+    def chunking(self):
+        # Long-form mode transcribes continuous speech in overlapping chunks as it goes
+        if not self.long_form:
+            return {}
+        return dict(
+            chunk_duration=self.settings.get("chunk_seconds", 30),
+            chunk_overlap=self.settings.get("chunk_overlap", 1.0)
+        )
+
+    def vad_tuning(self):
+        return dict(
+            min_threshold=self.settings.get("vad_min_threshold", 0.005),
+            noise_ratio=self.settings.get("vad_noise_ratio", 3.0)
+        )
+
+    def create_vad(self):
+        kwargs = self.vad_tuning()
+        kind = self.settings.get("vad", "energy")
+        try:
+            return create_vad(kind, self.settings.get("vad_model_path"), **kwargs)
+        except Exception as e:
+            self.handle_error(f"Failed to load {kind} VAD, using energy VAD: {str(e)}")
+            return create_vad("energy", **kwargs)
+
+    def ensure_recording_dialog(self):
+        if not self.recording_dialog:
+            self.recording_dialog = RecordingDialog(self.input_device, self.set_input_device)
+            self.recording_dialog.close_signal.connect(self.stop_recording)
+
     def stop_recording(self):
         if not self.is_recording:
             return
 
         self.is_recording = False
+        if self.pipeline:
+            self.pipeline.stop_capture()
         if self.recording_thread:
             self.recording_thread.stop()
             self.recording_thread = None
@@ -181,53 +456,40 @@ class SystemTrayApp(QWidget):
         if self.recording_dialog:
             self.recording_dialog.hide()
 
-    def handle_result(self, data):
-        audio, wav_path = data
-        if audio is None or len(audio) == 0 or not os.path.exists(wav_path):
-            return
+    def handle_result(self, result):
+        text = result["text"]
+        detected_lang = result["language"]
+        if self.selected_language == "auto":
+            print(f"Detected language: {LANGUAGES.get(detected_lang, detected_lang)}")
 
-        try:
-            # Skip initial language detection and use direct transcription
-            if self.selected_language == "auto":
-                # Use transcribe with no language specified for auto-detection
-                result = self.model.transcribe(
-                    wav_path,
-                    language=None,  # Let Whisper handle language detection internally
-                    task="transcribe",
-                    temperature=0.2,
-                    best_of=2,
-                    fp16=False
-                )
-                detected_lang = result.get("language", "en")
-                print(f"Detected language: {LANGUAGES.get(detected_lang, detected_lang)}")
-            else:
-                # Use specified language
-                result = self.model.transcribe(
-                    wav_path,
-                    language=self.selected_language,
-                    task="transcribe",
-                    temperature=0.2,
-                    best_of=2,
-                    fp16=False
+        if text:
+            if self.selected_language == "auto" and self.recording_dialog:
+                self.recording_dialog.update_status(
+                    f"Detected: {LANGUAGES.get(detected_lang, detected_lang)}\n{text[:30]}..."
                 )
-
-            text = result["text"].strip().replace('\n', ' ')
-            if text:
-                if self.selected_language == "auto":
-                    self.recording_dialog.update_status(
-                        f"Detected: {LANGUAGES.get(detected_lang, detected_lang)}\n{text[:30]}..."
-                    )
-                
-                pyautogui.typewrite(text + " ")
-            else:
-                print("No text was transcribed")
+        elif not self.streaming:
+            print("No text was transcribed")
+            if self.recording_dialog:
                 self.recording_dialog.update_status("No speech detected")
 
-        except Exception as e:
-            self.handle_error(str(e))
-            print(f"Transcription error: {str(e)}")
-            import traceback
-            traceback.print_exc()
+        # The trace is finished once the text has been typed
+        self.text_output.submit(text + " " if text else "", result["trace"])
+
+    def handle_typed(self, trace):
+        if trace and self.recording_dialog:
+            self.recording_dialog.update_latency(metrics.summary())
+
+    def handle_partial(self, result):
+        if self.recording_dialog and result["text"]:
+            self.recording_dialog.update_status(f"...{result['text'][-40:]}")
+
+        # Only the prefix that stayed stable across partial decodes is typed
+        if result["committed"]:
+            self.text_output.submit(result["committed"] + " ")
+
+    def handle_progress(self, message):
+        if self.recording_dialog:
+            self.recording_dialog.update_status(message)
 
     def toggle_hotkey(self):
         self.hotkey_enabled = not self.hotkey_enabled
@@ -267,20 +529,56 @@ class SystemTrayApp(QWidget):
         keyboard.hook(on_key)
         dialog.exec_()
 
-    def change_model(self, model_name):
-        self.model_name = model_name
+    def toggle_streaming(self):
+        if self.pipeline:
+            self.streaming_action.setChecked(False)
+            self.handle_error("Streaming mode is not available with multiprocess enabled")
+            return
+        self.streaming = not self.streaming
+        self.streaming_action.setChecked(self.streaming)
+        self.transcription_worker.streaming = self.streaming
+        self.transcription_worker.agreement.reset()
         if self.is_recording:
             self.stop_recording()
-        
-        try:
-            device = "cuda" if torch.cuda.is_available() else "cpu"
-            self.model = whisper.load_model(self.model_name, device=device)
-            self.settings.set("model", self.model_name)
-        except Exception as e:
-            self.handle_error(f"Failed to load model: {str(e)}")  # Fixed missing quotation mark
+            self.start_recording()
+        self.settings.set("streaming", self.streaming)
+
+    def toggle_long_form(self):
+        self.long_form = not self.long_form
+        self.long_form_action.setChecked(self.long_form)
+        if self.is_recording:
+            self.stop_recording()
+            self.start_recording()
+        self.settings.set("long_form", self.long_form)
+
+    def change_model(self, model_name):
+        self.model_name = model_name
+        self.load_engine()
+
+    def change_backend(self, backend):
+        self.backend = backend
+        self.load_engine()
+
+    def change_compute_type(self, compute_type):
+        self.compute_type = compute_type
+        self.load_engine()
+
+    def change_decode_profile(self, profile):
+        if self.pipeline:
+            self.pipeline.configure(decode_profile=profile)
+            self.settings.set("decode_profile", profile)
+            return
+        self.transcription_worker.decode_profile = profile
+        self.settings.set("decode_profile", profile)
 
     def change_language(self, language_code):
         self.selected_language = language_code
+        if self.pipeline:
+            self.pipeline.configure(language=language_code)
+        else:
+            self.transcription_worker.language = language_code
+            self.transcription_worker.language_cache.reset()
+            self.transcription_worker.context.clear()
         self.settings.set("language", language_code)
         print(f"Language changed to: {LANGUAGES[language_code]}")
 
@@ -291,6 +589,44 @@ class SystemTrayApp(QWidget):
             self.start_recording()
         self.settings.set("input_device", device)
 
+    def apply_settings(self, changed):
+        # settings.json was edited while running. Tuning is applied to the
+        # running recorder and worker; capture and the model keep going.
+        later = sorted(key for key in changed if key not in TUNABLE)
+        if later:
+            print(f"Settings take effect after a restart: {', '.join(later)}")
+        tuned = sorted(key for key in changed if key in TUNABLE)
+        if not tuned:
+            return
+        try:
+            language = changed.get("language", self.selected_language)
+            if language != self.selected_language and language in LANGUAGES:
+                self.change_language(language)
+            if self.pipeline:
+                self.pipeline.configure(**self.decode_options())
+                if self.is_recording:
+                    self.pipeline.tune_capture(self.vad_tuning(), self.chunking())
+            else:
+                if self.transcription_worker:
+                    self.transcription_worker.tune(
+                        batch_window=self.settings.get("batch_window_ms", 50) / 1000,
+                        max_queue=self.settings.get("transcription_queue_size", 4),
+                        backpressure=self.settings.get("backpressure", "drop_oldest"),
+                        **self.decode_options()
+                    )
+                if self.recording_thread:
+                    self.recording_thread.tune(self.vad_tuning(), self.chunking())
+                    if self.streaming:
+                        self.recording_thread.streaming_interval = self.settings.get("streaming_interval", 0.3)
+        except ValueError as e:
+            self.handle_error(f"Invalid setting: {str(e)}")
+            return
+        for action in self.language_group.actions():
+            action.setChecked(action.data() == self.selected_language)
+        for action in self.profile_group.actions():
+            action.setChecked(action.text() == self.settings.get("decode_profile", "fast"))
+        print(f"Applied settings: {', '.join(tuned)}")
+
     def handle_error(self, error_message):
         print(f"Error: {error_message}")
         if self.recording_dialog:
@@ -301,4 +637,15 @@ class SystemTrayApp(QWidget):
         if self.hotkey_enabled:
             keyboard.remove_hotkey(self.hotkey)
         keyboard.unhook_all()
+        if self.model_loader:
+            self.model_loader.stop()
+        if self.transcription_worker:
+            self.transcription_worker.stop()
+        if self.pipeline:
+            self.pipeline.stop()
+        if self.text_output:
+            self.text_output.stop()
+        if self.debug_sink:
+            self.debug_sink.close()
+        self.settings.close()
         QApplication.quit()
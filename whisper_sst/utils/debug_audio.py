@@ -0,0 +1,76 @@
+import os
+import queue
+import threading
+import time
+import wave
+
+import numpy as np
+
+
+class DebugAudioSink:
+    """Writes utterances to WAV files on a background thread.
+
+    The directory is capped by file count and total size; the oldest
+    recordings are evicted first. If the writer falls behind, new
+    utterances are dropped instead of blocking the caller.
+    """
+
+    def __init__(self, directory="debug_audio", max_files=50, max_bytes=100 * 1024 * 1024, samplerate=16000):
+        self.directory = directory
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.samplerate = samplerate
+        self._queue = queue.Queue(maxsize=8)
+        self._thread = threading.Thread(target=self._run, name="DebugAudioSink", daemon=True)
+        self._thread.start()
+
+    def submit(self, audio):
+        try:
+            self._queue.put_nowait((time.time(), audio))
+        except queue.Full:
+            print("Debug audio sink is busy, dropping utterance")
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            try:
+                self._write(*item)
+                self._evict()
+            except Exception as e:
+                print(f"Failed to write debug audio: {e}")
+
+    def _write(self, timestamp, audio):
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(timestamp))
+        millis = int((timestamp % 1) * 1000)
+        wav_path = os.path.join(self.directory, f"recording_{stamp}-{millis:03d}.wav")
+        audio_int16 = (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16)
+
+        with wave.open(wav_path, 'wb') as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(self.samplerate)
+            wf.writeframes(audio_int16.tobytes())
+
+        print(f"Saved debug audio to: {wav_path}")
+
+    def _evict(self):
+        files = []
+        for name in os.listdir(self.directory):
+            if name.startswith("recording_") and name.endswith(".wav"):
+                path = os.path.join(self.directory, name)
+                stat = os.stat(path)
+                files.append((stat.st_mtime, stat.st_size, path))
+
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        while files and (len(files) > self.max_files or total > self.max_bytes):
+            _, size, path = files.pop(0)
+            os.remove(path)
+            total -= size
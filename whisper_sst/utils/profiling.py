@@ -0,0 +1,44 @@
+import contextlib
+import threading
+import time
+
+
+class StartupProfiler:
+    """Records how long the startup phases take, relative to process start.
+
+    Phases may run on any thread. ``mark`` records a point in time, such as
+    the tray icon becoming visible.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.phases = []
+        self.milestones = {}
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            with self._lock:
+                self.phases.append((name, start - self.start, end - start, threading.current_thread().name))
+
+    def mark(self, name):
+        with self._lock:
+            self.milestones.setdefault(name, time.perf_counter() - self.start)
+
+    def report(self):
+        lines = [f"{'phase':<24} {'start ms':>9} {'took ms':>9}  thread"]
+        with self._lock:
+            for name, start, duration, thread in sorted(self.phases, key=lambda p: p[1]):
+                lines.append(f"{name:<24} {start * 1000:>9.1f} {duration * 1000:>9.1f}  {thread}")
+            lines.append("")
+            for name, at in sorted(self.milestones.items(), key=lambda m: m[1]):
+                lines.append(f"{name:<24} {at * 1000:>9.1f}")
+        return "\n".join(lines)
+
+
+profiler = StartupProfiler()
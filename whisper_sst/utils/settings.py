@@ -1,34 +1,310 @@
+import atexit
+import copy
 import json
+import os
+import shutil
+import threading
+import time
+
+# Every known setting as (type, default). None is also accepted where the default is None.
+SCHEMA = {
+    "hotkey": (str, "f9"),
+    "hotkey_enabled": (bool, True),
+    "input_device": (int, None),
+    "model": (str, "large"),
+    "backend": (str, "whisper"),  # whisper, faster-whisper or whisper.cpp
+    "compute_type": (str, "int8"),  # used by faster-whisper
+    "model_cache_mb": (int, None),  # null uses half of the physical memory
+    "server": (str, None),  # e.g. "127.0.0.1:8765" to use a shared transcription server
+    "language": (str, "auto"),  # Add default language setting
+    "language_confirmations": (int, 3),
+    "decode_profile": (str, "fast"),  # fast, balanced, accurate or sampling
+    "context_tokens": (int, 96),
+    "context_max_age": (float, 60),
+    "hotwords": (list, []),
+    "output": (str, "auto"),  # auto, xdotool, ydotool, clipboard, pyautogui or file
+    "output_file": (str, None),  # for "file"; null writes to stdout
+    "debug_audio": (bool, False),
+    "debug_audio_max_files": (int, 50),
+    "debug_audio_max_mb": (float, 100),
+    "metrics_port": (int, None),  # e.g. 9464 to serve /metrics
+    "trace_file": (str, None),
+    "transcription_queue_size": (int, 4),
+    "backpressure": (str, "drop_oldest"),  # drop_oldest, merge or block
+    "batch_size": (int, 4),
+    "batch_window_ms": (float, 50),
+    "streaming": (bool, False),
+    "streaming_interval": (float, 0.3),
+    "long_form": (bool, False),
+    "chunk_seconds": (float, 30),
+    "chunk_overlap": (float, 1.0),
+    "multiprocess": (bool, False),  # capture and inference in their own processes
+    "shared_ring_seconds": (int, 300),
+    "vad": (str, "energy"),  # energy or silero
+    "vad_model_path": (str, None),
+    "vad_min_threshold": (float, 0.005),
+    "vad_noise_ratio": (float, 3.0)
+}
+
+# Allowed values where the type alone isn't enough
+CHOICES = {
+    "decode_profile": ("fast", "balanced", "accurate", "sampling"),
+    "output": ("auto", "xdotool", "ydotool", "clipboard", "pyautogui", "file"),
+    "backpressure": ("drop_oldest", "merge", "block"),
+    "vad": ("energy", "silero")
+}
+MINIMUMS = {
+    "language_confirmations": 0,
+    "context_tokens": 0,
+    "context_max_age": 0,
+    "model_cache_mb": 0,
+    "debug_audio_max_files": 1,
+    "debug_audio_max_mb": 0,
+    "transcription_queue_size": 1,
+    "batch_size": 1,
+    "batch_window_ms": 0,
+    "chunk_overlap": 0,
+    "shared_ring_seconds": 1,
+    "vad_min_threshold": 0
+}
+# Type of every item of the list settings
+ITEM_TYPES = {
+    "hotwords": str
+}
+
+# Applied to the running recorder and worker when settings.json is edited;
+# anything else takes effect the next time the app starts
+TUNABLE = (
+    "language", "decode_profile", "language_confirmations", "context_tokens", "context_max_age", "hotwords",
+    "transcription_queue_size", "backpressure", "batch_size", "batch_window_ms", "streaming_interval",
+    "chunk_seconds", "chunk_overlap", "vad_min_threshold", "vad_noise_ratio"
+)
+
+
+def validate(key, value):
+    """Returns ``value`` if it fits ``key``'s type and allowed values, else raises ValueError."""
+    if key not in SCHEMA:
+        return value
+    kind, default = SCHEMA[key]
+    if value is None and default is None:
+        return value
+    # bool is an int to Python, but not to settings.json
+    if isinstance(value, bool) and kind is not bool:
+        raise ValueError(f"{key} should be {kind.__name__}, not {value!r}")
+    if not isinstance(value, kind) and not (kind is float and isinstance(value, int)):
+        raise ValueError(f"{key} should be {kind.__name__}, not {value!r}")
+    if key in CHOICES and value not in CHOICES[key]:
+        raise ValueError(f"{key} should be one of {', '.join(CHOICES[key])}, not {value!r}")
+    if key in MINIMUMS and value < MINIMUMS[key]:
+        raise ValueError(f"{key} should be at least {MINIMUMS[key]}, not {value!r}")
+    if key in ITEM_TYPES:
+        item_kind = ITEM_TYPES[key]
+        if not all(isinstance(item, item_kind) for item in value):
+            raise ValueError(f"{key} should be a list of {item_kind.__name__}, not {value!r}")
+    return value
+
 
 class Settings:
-    def __init__(self):
-        self.settings_file = "settings.json"
-        self.default_settings = {
-            "hotkey": "f9",
-            "hotkey_enabled": True,
-            "input_device": None,
-            "model": "large",
-            "language": "auto"  # Add default language setting
-        }
+    """settings.json, merged over the defaults in SCHEMA.
+
+    ``set`` only changes the settings in memory. A background thread writes
+    the file once no change has come for ``write_delay`` seconds (or
+    ``max_delay`` after the first pending change), to a temporary file that
+    is then renamed over the old one, so the file is never half-written.
+    ``flush`` writes pending changes right away.
+
+    After ``watch``, the same thread checks the file every
+    ``watch_interval`` seconds. When something else has changed it, it is
+    reloaded and the callbacks get a dict of the settings that changed.
+    Settings changed here and not written yet win over the file's values.
+    """
+
+    def __init__(self, settings_file="settings.json", write_delay=0.5, max_delay=2.0, watch_interval=1.0):
+        self.settings_file = settings_file
+        self.default_settings = {key: default for key, (_, default) in SCHEMA.items()}
+        self.write_delay = write_delay
+        self.max_delay = max_delay
+        self.watch_interval = watch_interval
+        self.running = True
+        self._condition = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._thread = None
+        self._callbacks = []
+        self._pending = set()
+        self._changed_at = None
+        self._dirty_since = None
+        self._checked_at = 0.0
+        self._stat = None
         self.load()
+        atexit.register(self.flush)
 
     def load(self):
         try:
-            with open(self.settings_file, "r") as f:
-                self._settings = json.load(f)
-        except:
-            self._settings = self.default_settings.copy()
+            stored = self._read()
+        except FileNotFoundError:
+            stored = {}
+        except (OSError, ValueError) as e:
+            # Keep the user's file around rather than overwriting it on the next save
+            backup = f"{self.settings_file}.bad"
+            print(f"Failed to load settings, using defaults (a copy of the file is kept at {backup}): {e}")
+            try:
+                shutil.copyfile(self.settings_file, backup)
+            except OSError:
+                pass
+            stored = {}
+        with self._condition:
+            self._settings = self._merge(stored)
+            self._stat = self._file_stat()
 
     def save(self):
-        try:
-            with open(self.settings_file, "w") as f:
-                json.dump(self._settings, f)
-        except Exception as e:
-            print(f"Failed to save settings: {e}")
+        """Schedules a write of the current settings."""
+        with self._condition:
+            now = time.monotonic()
+            self._changed_at = now
+            if self._dirty_since is None:
+                self._dirty_since = now
+            self._start_thread()
+            self._condition.notify_all()
+
+    def flush(self):
+        """Writes pending changes now, on the calling thread."""
+        self._write_pending()
+
+    def close(self):
+        self.flush()
+        with self._condition:
+            self.running = False
+            self._condition.notify_all()
+        if self._thread:
+            self._thread.join()
+
+    def watch(self, callback):
+        """Calls ``callback(changed)`` on the settings thread when settings.json changes on disk."""
+        with self._condition:
+            self._callbacks.append(callback)
+            self._start_thread()
+            self._condition.notify_all()
 
     def get(self, key, default=None):
         return self._settings.get(key, default)
 
     def set(self, key, value):
-        self._settings[key] = value
+        value = validate(key, value)
+        with self._condition:
+            if key in self._settings and self._settings[key] == value:
+                return
+            self._settings[key] = value
+            self._pending.add(key)
         self.save()
+
+    def _start_thread(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="Settings", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if not self.running:
+                    return
+                self._condition.wait(self._timeout())
+                now = time.monotonic()
+                due = self._dirty_since is not None and (
+                    now - self._changed_at >= self.write_delay or now - self._dirty_since >= self.max_delay
+                )
+                check = self._callbacks and (due or now - self._checked_at >= self.watch_interval)
+            if check:
+                # Pick up edits made elsewhere before they are written over
+                self._check()
+            if due:
+                self._write_pending()
+
+    def _timeout(self):
+        timeouts = []
+        if self._dirty_since is not None:
+            timeouts.append(min(self._changed_at + self.write_delay, self._dirty_since + self.max_delay))
+        if self._callbacks:
+            timeouts.append(self._checked_at + self.watch_interval)
+        if not timeouts:
+            return None
+        return max(0.0, min(timeouts) - time.monotonic())
+
+    def _write_pending(self):
+        # The text is taken under the write lock, so writes land in the order it was taken
+        with self._write_lock:
+            with self._condition:
+                if self._dirty_since is None:
+                    return
+                text = self._take_pending()
+            self._write(text)
+
+    def _take_pending(self):
+        text = json.dumps(self._settings, indent=4)
+        self._pending.clear()
+        self._changed_at = self._dirty_since = None
+        return text
+
+    def _write(self, text):
+        # Called with the write lock held
+        temporary = f"{self.settings_file}.tmp"
+        try:
+            with open(temporary, "w") as f:
+                f.write(text)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temporary, self.settings_file)
+        except OSError as e:
+            print(f"Failed to save settings: {e}")
+            return
+        with self._condition:
+            self._stat = self._file_stat()
+
+    def _check(self):
+        self._checked_at = time.monotonic()
+        stat = self._file_stat()
+        if stat is None or stat == self._stat:
+            return
+        try:
+            stored = self._read()
+        except (OSError, ValueError) as e:
+            # Probably saved halfway through an edit; the next save is read again
+            print(f"Ignoring changes to {self.settings_file}: {e}")
+            self._stat = stat
+            return
+        with self._condition:
+            settings = self._merge(stored, self._settings)
+            for key in self._pending:
+                settings[key] = self._settings[key]
+            changed = {key: value for key, value in settings.items() if self._settings.get(key) != value}
+            self._settings = settings
+            self._stat = stat
+            callbacks = list(self._callbacks)
+        if changed:
+            for callback in callbacks:
+                callback(changed)
+
+    def _read(self):
+        with open(self.settings_file, "r") as f:
+            stored = json.load(f)
+        if not isinstance(stored, dict):
+            raise ValueError("expected a JSON object")
+        return stored
+
+    def _merge(self, stored, current=None):
+        # An invalid value leaves the setting as it was, or at its default
+        settings = copy.deepcopy(self.default_settings)
+        for key, value in stored.items():
+            try:
+                settings[key] = validate(key, value)
+            except ValueError as e:
+                print(f"Ignoring setting: {e}")
+                if current and key in current:
+                    settings[key] = current[key]
+        return settings
+
+    def _file_stat(self):
+        try:
+            stat = os.stat(self.settings_file)
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size